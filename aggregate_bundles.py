@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Aggregate Bundle Builder
+Precomputes the dashboard aggregates into compact, content-hashed JSON files
+(with gzip and, when available, brotli siblings) that can be served statically
+with long-lived caching
+"""
+
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from amazon_analysis_generator import DEFAULT_CSV_PATH, AmazonAnalysisGenerator, json_default
+from query_result_cache import dataset_fingerprint
+
+BUNDLE_DIR = 'aggregates'
+MANIFEST_FILE = 'manifest.json'
+BUNDLE_FORMAT_VERSION = 1
+
+# <name>.<12 hex digits>.json, plus its .gz and .br siblings
+HASHED_BUNDLE = re.compile(r'^\w+\.[0-9a-f]{12}\.json(\.gz|\.br)?$')
+
+
+def _round_floats(value, digits=2):
+    if isinstance(value, float):
+        return round(value, digits)
+    if isinstance(value, dict):
+        return {key: _round_floats(item, digits) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_round_floats(item, digits) for item in value]
+    return value
+
+
+def encode_bundle(payload):
+    """Serialize a payload as compact, key-sorted JSON so identical data hashes identically"""
+    return json.dumps(_round_floats(payload), separators=(',', ':'), sort_keys=True, default=json_default).encode('utf-8')
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_bundle(output_dir, name, payload):
+    """Write one bundle under a content-hash filename plus compressed siblings; returns its manifest entry"""
+    data = encode_bundle(payload)
+    digest = hashlib.sha256(data).hexdigest()
+    file_name = f"{name}.{digest[:12]}.json"
+    entry = {'file': file_name, 'sha256': digest, 'bytes': len(data)}
+
+    path = os.path.join(output_dir, file_name)
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+        # mtime=0 keeps the gzip bytes reproducible for unchanged data
+        _write_atomic(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli:
+            _write_atomic(path + '.br', brotli.compress(data, quality=11))
+
+    entry['gzip_bytes'] = os.path.getsize(path + '.gz')
+    if os.path.exists(path + '.br'):
+        entry['brotli_bytes'] = os.path.getsize(path + '.br')
+    return entry
+
+
+def prune_stale_bundles(output_dir, manifest):
+    """Remove hashed bundle files no longer referenced by the manifest, including bundles no longer built"""
+    current = {entry['file'] for entry in manifest['bundles'].values()}
+    for path in glob.glob(os.path.join(output_dir, '*.json*')):
+        base = os.path.basename(path)
+        if not HASHED_BUNDLE.match(base):
+            continue
+        if not any(base == file_name or base.startswith(file_name + '.') for file_name in current):
+            os.remove(path)
+
+
+def collect_bundles(analyzer):
+    """Map the bundle names amazon_dashboard.html reads to payloads from a connected generator
+
+    The category and daily results reach the page through the chart specs;
+    channel and state rows fill its metric cards.
+    """
+    analyzer.run_fused_analysis()
+    analyzer.analyze_daily_performance()
+    results = analyzer.results
+    return {
+        'channel': results.get('channel_analysis'),
+        'state': results.get('geographic_analysis'),
+        'charts': analyzer.chart_specs()
+    }
+
+
+def build_bundles(csv_file_path, output_dir=BUNDLE_DIR, **generator_options):
+    """Compute every dashboard aggregate and publish the bundles and their manifest"""
+    analyzer = AmazonAnalysisGenerator(csv_file_path, **generator_options)
+    if not analyzer.connect_to_duckdb():
+        return None
+    try:
+        bundles = collect_bundles(analyzer)
+    finally:
+        analyzer.close_connection()
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {
+        'version': BUNDLE_FORMAT_VERSION,
+        'generated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'dataset': dataset_fingerprint(analyzer.source_files()),
+        'bundles': {
+            name: write_bundle(output_dir, name, payload)
+            for name, payload in bundles.items() if payload is not None
+        }
+    }
+    # The manifest is the only unhashed file; it is written last so readers never see missing bundles
+    _write_atomic(os.path.join(output_dir, MANIFEST_FILE), json.dumps(manifest, indent=2).encode('utf-8'))
+    prune_stale_bundles(output_dir, manifest)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute dashboard aggregates into static, content-hashed bundles')
+    parser.add_argument('--csv', default=DEFAULT_CSV_PATH, help='sales CSV, or a glob/directory of shards')
+    parser.add_argument('--output-dir', default=BUNDLE_DIR)
+    parser.add_argument('--cache-dir', default='.duckdb_cache', help='Parquet cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='parse the CSV directly')
+    args = parser.parse_args()
+
+    manifest = build_bundles(args.csv, args.output_dir, cache_dir=None if args.no_cache else args.cache_dir)
+    if manifest is None:
+        print("❌ Could not build aggregate bundles")
+        return
+
+    print(f"✅ Wrote {len(manifest['bundles'])} bundles to {args.output_dir}/")
+    for name, entry in manifest['bundles'].items():
+        compressed = entry.get('brotli_bytes', entry['gzip_bytes'])
+        print(f"   {entry['file']:<32} {entry['bytes']:>9,} bytes ({compressed:,} compressed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,187 +4,878 @@ Amazon Logistics Optimization Analysis Generator
 Generates comprehensive analysis and visualizations for Amazon seller data
 """
 
-import duckdb
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
+import time
+_IMPORTS_STARTED = time.perf_counter()
+
+# Heavy dependencies (duckdb, plotly, thread pools) are imported by the stages that use them
+import argparse
+import contextlib
+import glob
 import json
 import os
+import sys
+import threading
+from decimal import Decimal
+
+from analysis_registry import (ANALYSIS_REGISTRY, CONFIDENCE_Z, DRILL_DOWNS, MEASURES, amount_filter, dimension_expression,
+                               failure_flag, failure_rate, failure_rate_margin, placeholders, revenue_share,
+                               sample_clause, sampled_measures)
+from analysis_snapshot import SNAPSHOT_BATCH_ROWS, AnalysisSnapshot, query_digest
+from csv_parquet_cache import cache_entry_base, ensure_parquet_cache
+from csv_schema import CsvSchemaContract, detect_encoding
+from dataset_profiler import AMAZON_CROSSTABS, DatasetProfiler, print_profile
+from drill_down import DRILL_ORDER_BY, DrillDownIndex
+from incremental_aggregates import IncrementalAggregateStore
+from model_training import DEFAULT_FOLDS, MODEL_SPECS, FeatureCache, print_model_results, train_models
+from query_instrumentation import InstrumentedConnection, QueryRecorder
+from query_result_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, QueryResultCache, dataset_fingerprint
+from time_series import (ROLLING_WINDOWS, TimeSeriesStore, compile_daily_aggregates, compile_rolling_windows,
+                         rollup_weeks, series_dimensions)
+
+MODULE_IMPORT_SECONDS = time.perf_counter() - _IMPORTS_STARTED
+
+# Startup import budget for single-analysis CLI runs such as `summary`
+IMPORT_BUDGET_SECONDS = 0.3
+
+# Heavy modules a single-analysis CLI run imports before its first result, all counted against the budget;
+# queries are fetched and fanned out as Arrow tables, and the model command also needs numpy
+SINGLE_ANALYSIS_IMPORTS = ['duckdb', 'pyarrow', 'pyarrow.compute']
+COMMAND_IMPORTS = {'model': SINGLE_ANALYSIS_IMPORTS + ['numpy']}
+
+DEFAULT_CSV_PATH = r'C:\Users\swath\DashCam_Practicum\temp_portfolio\hq4743.github.io\Amazon Sale Report.csv'
+
+# Columns read by the summary, the failure flag and the time series; streaming
+# ingestion projects only these plus each registered analysis's dimension column
+REQUIRED_COLUMNS = ['"Order ID"', 'Date', 'Category', '"ship-state"', 'Amount', 'Status', 'Fulfilment']
+
+# Summary distinct counts, each the number of non-null groups of one grouping set in the fused scan
+SUMMARY_DISTINCT_COUNTS = {
+    'unique_orders': {'column': '"Order ID"', 'label': 'order_id'},
+    'unique_categories': ANALYSIS_REGISTRY['category_analysis'],
+    'unique_states': ANALYSIS_REGISTRY['geographic_analysis']
+}
+
+def peak_rss_mb():
+    """Return this process's peak resident set size in MB, or None where unsupported"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+RESULTS_FILE = 'amazon_analysis_results.json'
+RESULTS_EXPORT_DIR = 'amazon_analysis_results'
+
+def json_default(value):
+    """Serialize values json can't: Decimals as numbers, dates and anything else as strings"""
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+CHART_DASHBOARD_FILE = 'amazon_analysis_charts.html'
+CHART_SPECS_FILE = 'amazon_charts.json'
+PLOTLY_CDN_URL = 'https://cdn.plot.ly/plotly-2.35.2.min.js'
+
+def render_chart_dashboard(specs, plotly_src=PLOTLY_CDN_URL):
+    """Render chart specs into one HTML page that loads plotly.js once"""
+    containers = '\n'.join(f'    <div id="{name}" class="chart"></div>' for name in specs)
+    # Escape "</" so data values can never close the inline script early
+    specs_json = json.dumps(specs, separators=(',', ':'), default=str).replace('</', '<\\/')
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Amazon Logistics Analysis Charts</title>
+    <script src="{plotly_src}"></script>
+    <style>
+        body {{ font-family: 'Segoe UI', sans-serif; margin: 20px; }}
+        .chart {{ max-width: 900px; height: 450px; margin: 0 auto 30px; }}
+    </style>
+</head>
+<body>
+{containers}
+    <script>
+        const specs = {specs_json};
+        Object.entries(specs).forEach(([id, spec]) => Plotly.newPlot(id, spec.data, spec.layout, {{responsive: true}}));
+    </script>
+</body>
+</html>
+"""
 
 class AmazonAnalysisGenerator:
-    def __init__(self, csv_file_path):
+    def __init__(self, csv_file_path, cache_dir='.duckdb_cache', incremental=False,
+                 streaming=False, memory_limit=None, temp_directory=None, chunk_size=None,
+                 parallel=False, max_workers=None, partition_filters=None,
+                 profile_path=None, trace_path=None, chart_format='html',
+                 result_cache_dir=None, result_cache_max_bytes=DEFAULT_MAX_BYTES, analysis_keys=None,
+                 sample_percent=None, export_dir=RESULTS_EXPORT_DIR, drill_downs=None, refresh_schema=False,
+                 output_dir=None, threads=None, snapshot_dir=None):
+        # A single CSV, or a glob, directory or list of CSV/Parquet shards
         self.csv_file_path = csv_file_path
+        # Hive partition pruning, e.g. {'month': ('2022-04', '2022-06'), 'region': ['WEST', 'EAST']}
+        self.partition_filters = partition_filters or {}
+        self.cache_dir = cache_dir  # None disables the Parquet cache
+        self.incremental = incremental
+        self.parallel = parallel
+        self.max_workers = max_workers
+        self.streaming = streaming
+        self.memory_limit = memory_limit  # e.g. '2GB'; DuckDB spills to temp_directory beyond this
+        self.temp_directory = temp_directory
+        self.threads = threads  # DuckDB worker threads; defaults to one per core
+        self.chunk_size = chunk_size  # CSV reader buffer size in bytes
+        self.incremental_store = None
+        # Single-CSV loads read with the schema recorded on first sight; refresh re-detects it once
+        self.refresh_schema = refresh_schema
+        # Approximate mode estimates the summary and grouped analyses from a sample of this many percent of rows
+        self.sample_percent = sample_percent if not incremental else None
+        # Instrumentation is on when paths are given or AMAZON_ANALYSIS_PROFILE/TRACE is set
+        if profile_path or trace_path:
+            self.recorder = QueryRecorder(profile_path, trace_path)
+        else:
+            self.recorder = QueryRecorder.from_environment()
+        self.chart_format = chart_format  # 'html' (one file per chart), 'dashboard' or 'json'
+        # Reruns against an unchanged dataset are answered from disk without loading it
+        self.result_cache = QueryResultCache(result_cache_dir, result_cache_max_bytes) if result_cache_dir and not incremental else None
+        self.dataset_fingerprint = None
+        # The loaded table and results are kept as a memory-mapped Arrow snapshot other runs open instantly
+        self.snapshot = AnalysisSnapshot(snapshot_dir) if snapshot_dir and not incremental else None
+        self.sales_table = None  # Arrow table registered as amazon_sales, when it isn't a DuckDB table
+        self._load_pending = False
+        self._load_lock = threading.Lock()
+        self.output_files = []
+        self.output_dir = output_dir  # where results, charts and exports are written; None is the working directory
         self.con = None
         self.results = {}
+        self.tables = {}  # Arrow tables behind self.results, exported with their column types
+        self.export_dir = export_dir  # None skips the Parquet/Arrow export
+        # Registry analyses to compute; optional ones such as city_analysis are opt-in
+        if analysis_keys is None:
+            analysis_keys = [key for key, spec in ANALYSIS_REGISTRY.items() if spec.get('default', True)]
+        self.analyses = {key: dict(ANALYSIS_REGISTRY[key]) for key in analysis_keys}
+        # Drill-down hierarchies whose columns are loaded, e.g. ['geography']; indexes are built on first use
+        self.drill_downs = list(drill_downs or [])
+        self.drill_indexes = {}
         
     def connect_to_duckdb(self):
         """Connect to DuckDB and load the Amazon sales data"""
+        if self.incremental:
+            return self.connect_incremental()
+
         try:
-            self.con = duckdb.connect(database=':memory:')
-            
-            # Load the CSV data
-            load_query = f"""
-            CREATE OR REPLACE TABLE amazon_sales AS
-            SELECT * FROM read_csv_auto('{self.csv_file_path}', HEADER=TRUE, ENCODING='LATIN1');
-            """
-            
-            self.con.execute(load_query)
-            print("✅ Successfully loaded Amazon sales data into DuckDB")
+            self.con = self._connect(':memory:')
+            self.configure_memory()
+
+            if self.result_cache:
+                self.dataset_fingerprint = self.source_fingerprint()
+                # Opening a current snapshot is cheaper than deferring, and lets misses skip the load
+                if not (self.snapshot and self.open_snapshot()):
+                    self._load_pending = True
+                    print("🗄️ Result cache enabled; data is loaded only if a query misses")
+                return True
+
+            self.load_data()
             return True
             
         except Exception as e:
             print(f"❌ Error connecting to DuckDB: {e}")
             return False
+
+    def load_data(self):
+        """Load the sales data into the amazon_sales table, or open it from a current snapshot"""
+        if self.snapshot and self.open_snapshot():
+            return
+
+        buffer_option = ", buffer_size=?" if self.chunk_size else ''
+        buffer_params = [int(self.chunk_size)] if self.chunk_size else []
+        contract = None  # set when the CSV itself is scanned under its schema contract
+        if self.is_sharded():
+            # DuckDB scans shards in parallel and skips partitions excluded by the filters
+            shards = self.resolve_shards()
+            if all(shard.endswith('.parquet') for shard in shards):
+                source = "read_parquet(?, hive_partitioning=TRUE, union_by_name=TRUE)"
+                params = [shards]
+            else:
+                # Shards may differ in layout, so types are still sniffed; the encoding comes from the first shard
+                source = f"read_csv_auto(?, HEADER=TRUE, ENCODING=?, hive_partitioning=TRUE, union_by_name=TRUE{buffer_option})"
+                params = [shards, detect_encoding(shards[0])] + buffer_params
+            print(f"🧩 Scanning {len(shards)} shards")
+
+        # Load from the Parquet cache when possible, parsing the CSV only when it changed
+        elif self.cache_dir:
+            parquet_path, cache_hit = ensure_parquet_cache(self.con, self.csv_file_path, self.cache_dir,
+                                                           self.load_schema_contract())
+            print(f"{'♻️ Reusing' if cache_hit else '🗃️ Created'} Parquet cache: {parquet_path}")
+            source = "read_parquet(?)"
+            params = [parquet_path]
+        else:
+            contract = self.load_schema_contract()
+            source = params = None
+
+        # Streaming mode keeps only the analysed columns and pushes the Amount filter into the scan
+        columns = ', '.join(self.required_columns()) if self.streaming else '*'
+        conditions, condition_params = self.partition_conditions()
+        if self.streaming:
+            amount_sql, amount_params = amount_filter()
+            conditions.append(amount_sql)
+            condition_params += amount_params
+        where = 'WHERE ' + ' AND '.join(conditions) if conditions else ''
+
+        def load(target):
+            def load_query(source, params):
+                return f"""
+        {target}
+        SELECT {columns} FROM {source}
+        {where};
+        """, params + condition_params
+
+            if contract:
+                return contract.execute(self.con, load_query, buffer_size=int(self.chunk_size) if self.chunk_size else None)
+            return self.con.execute(*load_query(source, params))
+
+        # With a snapshot the rows stream in batches into the file and are served memory-mapped from it
+        if not (self.snapshot and self.write_snapshot(load('').to_arrow_reader(SNAPSHOT_BATCH_ROWS))):
+            load('CREATE OR REPLACE TABLE amazon_sales AS')
+            if self.sales_table is not None:
+                self.con.unregister('amazon_sales')
+                self.sales_table = None
+        print("✅ Successfully loaded Amazon sales data into DuckDB")
+
+    def source_fingerprint(self):
+        """Fingerprint the source files, the schema contract and the load options that shape amazon_sales"""
+        options = {
+            'columns': self.required_columns() if self.streaming else '*',
+            'conditions': self.partition_conditions(),
+            'streaming': self.streaming
+        }
+        if not self.is_sharded():
+            # A refreshed contract can retype columns of an unchanged file
+            options['contract'] = self.load_schema_contract().digest()
+        return dataset_fingerprint(self.source_files(), options)
+
+    def open_snapshot(self):
+        """Serve amazon_sales memory-mapped from a snapshot of the current data; False when there is none"""
+        if not self.snapshot.open(self.source_fingerprint()):
+            return False
+        self._register_sales(self.snapshot.table)
+        print(f"🗺️ Opened snapshot {self.snapshot.directory}: {self.snapshot.table.num_rows:,} rows and "
+              f"{len(self.snapshot.aggregates)} result tables memory-mapped")
+        return True
+
+    def write_snapshot(self, reader):
+        """Stream the loaded rows into the snapshot and serve them from its mapping; False if that failed"""
+        try:
+            if not self.snapshot.write_table(reader, self.source_fingerprint()):
+                raise OSError('the written snapshot could not be opened')
+        except Exception as e:
+            # Schema drift and encoding retries surface here too, and are handled by the direct load
+            print(f"❌ Error writing snapshot, loading into DuckDB instead: {e}")
+            return False
+        self._register_sales(self.snapshot.table)
+        print(f"🗺️ Wrote snapshot {self.snapshot.directory} ({self.snapshot.size_bytes() / (1024 * 1024):,.1f} MB)")
+        return True
+
+    def _register_sales(self, table):
+        # Registering again swaps the table atomically for new queries; cursors register it themselves
+        self.con.register('amazon_sales', table)
+        self.sales_table = table
+
+    def cursor(self):
+        """Return a new cursor to the database, with the snapshot's amazon_sales registered on it"""
+        if self.snapshot:
+            # The mapped table is registered per cursor, so a load the result cache deferred can't wait for a miss
+            self._ensure_loaded()
+        cursor = self.con.cursor()
+        if self.sales_table is not None:
+            cursor.register('amazon_sales', self.sales_table)
+        return cursor
+
+    def stored_aggregate(self, key):
+        """Return an analysis's result table from the snapshot if the current query produced it, else None"""
+        if not self.snapshot or not self.snapshot.aggregates:
+            return None
+        query, params, _ = self.compile_fused_query([key])
+        return self.snapshot.aggregate(key, query_digest(query, params))
+
+    def load_schema_contract(self):
+        """Load the CSV's schema contract, recording it on first sight; raises SchemaDriftError on drift"""
+        contract = CsvSchemaContract(self.csv_file_path, self.cache_dir or '.duckdb_cache')
+        contract.load(self.con, refresh=self.refresh_schema)
+        self.refresh_schema = False
+        return contract
+
+    def _ensure_loaded(self):
+        """Load the data deferred by the result cache, once, on the first cache miss"""
+        with self._load_lock:
+            if self._load_pending:
+                self.load_data()
+                self._load_pending = False
+
+    def _query(self, sql, params, con=None, prepare=None):
+        """Return a query's result as an Arrow table, from the result cache when enabled
+
+        prepare builds anything the query reads besides amazon_sales; with the
+        result cache it only runs on a miss.
+        """
+        con = con or self.con
+        if self.result_cache:
+            def before_miss():
+                self._ensure_loaded()
+                if prepare:
+                    prepare()
+            return self.result_cache.fetch(con, self.dataset_fingerprint, sql, params, before_miss=before_miss)
+        if prepare:
+            prepare()
+        return con.execute(sql, params).to_arrow_table()
     
-    def get_data_summary(self):
-        """Get basic data summary statistics"""
+    def _connect(self, database):
+        """Open a DuckDB connection, wrapped for query profiling when instrumentation is on"""
+        import duckdb
+
+        con = duckdb.connect(database=database)
+        if self.recorder:
+            return InstrumentedConnection(con, self.recorder)
+        return con
+
+    def _stage(self, name):
+        """Return a context manager recording a pipeline stage span when instrumentation is on"""
+        return self.recorder.stage(name) if self.recorder else contextlib.nullcontext()
+
+    def is_sharded(self):
+        """Return True when the source is a glob, directory or list of shards rather than one file"""
+        path = self.csv_file_path
+        return isinstance(path, (list, tuple)) or os.path.isdir(path) or glob.has_magic(path)
+
+    def source_files(self):
+        """Return the files the dataset is read from"""
+        return self.resolve_shards() if self.is_sharded() else [self.csv_file_path]
+
+    def resolve_shards(self):
+        """Expand the source into a sorted list of shard files; raises FileNotFoundError when none match"""
+        path = self.csv_file_path
+        if isinstance(path, (list, tuple)):
+            shards = list(path)
+        elif os.path.isdir(path):
+            shards = sorted(glob.glob(os.path.join(path, '**', '*.parquet'), recursive=True))
+            shards = shards or sorted(glob.glob(os.path.join(path, '**', '*.csv'), recursive=True))
+        else:
+            shards = sorted(glob.glob(path, recursive=True))
+        if not shards:
+            raise FileNotFoundError(f"No CSV or Parquet shards match {path}")
+        return shards
+
+    def partition_conditions(self):
+        """Compile partition_filters into (conditions, params) DuckDB can prune hive partitions with"""
+        conditions = []
+        params = []
+        for column, value in self.partition_filters.items():
+            if isinstance(value, tuple):
+                conditions.append(f"{column} BETWEEN ? AND ?")
+                params += list(value)
+            elif isinstance(value, list):
+                conditions.append(f"{column} IN ({placeholders(value)})")
+                params += value
+            else:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        return conditions, params
+
+    def configure_memory(self):
+        """Apply the memory ceiling, spill directory and thread count to the current connection"""
+        if self.memory_limit:
+            self.con.execute("SET memory_limit = ?;", [self.memory_limit])
+        if self.temp_directory:
+            self.con.execute("SET temp_directory = ?;", [self.temp_directory])
+        if self.threads:
+            self.con.execute("SET threads = ?;", [int(self.threads)])
+        if self.streaming:
+            # Lets the reader stream chunks out of order instead of buffering to preserve row order
+            self.con.execute("SET preserve_insertion_order = false;")
+
+    def required_columns(self):
+        """Return the source columns needed by the summary and every registered analysis"""
+        columns = list(REQUIRED_COLUMNS)
+        for spec in self.analyses.values():
+            for column in [spec['column']] + list(spec.get('filters', {})):
+                if column not in columns:
+                    columns.append(column)
+        for name in self.drill_downs:
+            for level in DRILL_DOWNS[name]:
+                if level['column'] not in columns:
+                    columns.append(level['column'])
+        return columns
+
+    def connect_incremental(self):
+        """Open the persistent aggregate store and ingest only rows appended since the last run"""
+        if self.is_sharded():
+            print("❌ Incremental ingestion needs a single append-only CSV, not a set of shards")
+            return False
+
         try:
-            summary_query = """
-            SELECT 
-                COUNT(*) as total_records,
-                COUNT(DISTINCT "Order ID") as unique_orders,
-                COUNT(DISTINCT Category) as unique_categories,
-                COUNT(DISTINCT "ship-state") as unique_states,
-                SUM(Amount) as total_revenue,
-                AVG(Amount) as avg_order_value
-            FROM amazon_sales
-            WHERE Amount > 0;
-            """
-            
-            result = self.con.execute(summary_query).fetchone()
-            self.results['summary'] = {
-                'total_records': result[0],
-                'unique_orders': result[1],
-                'unique_categories': result[2],
-                'unique_states': result[3],
-                'total_revenue': result[4],
-                'avg_order_value': result[5]
+            cache_dir = self.cache_dir or '.duckdb_cache'
+            os.makedirs(cache_dir, exist_ok=True)
+            state_path = cache_entry_base(self.csv_file_path, cache_dir) + '.duckdb'
+            self.con = self._connect(state_path)
+            self.configure_memory()
+
+            # Every registry dimension is maintained whichever analyses this run reports, so switching
+            # commands keeps the high-water mark; summary distinct counts come from the category and state partials
+            dimensions = []
+            for spec in list(ANALYSIS_REGISTRY.values()) + list(self.analyses.values()):
+                expression, params = dimension_expression(spec)
+                if [expression, spec['label'], params] not in dimensions:
+                    dimensions.append([expression, spec['label'], params])
+
+            self.incremental_store = IncrementalAggregateStore(
+                self.con, self.csv_file_path, dimensions, contract=self.load_schema_contract(),
+                time_series=TimeSeriesStore(self.con, series_dimensions())
+            )
+            new_rows = self.incremental_store.ingest()
+            print(f"✅ Incrementally ingested {new_rows:,} new rows into {state_path}")
+            return True
+
+        except Exception as e:
+            print(f"❌ Error during incremental ingestion: {e}")
+            return False
+
+    def register_analysis(self, key, spec):
+        """Register a grouped analysis to be computed by the fused aggregation scan"""
+        self.analyses[key] = spec
+
+    def compile_fused_query(self, keys):
+        """Compile the requested analyses into a single GROUPING SETS query; returns (sql, params, labels)"""
+        fraction = self.sample_percent / 100 if self.sample_percent else None
+        specs = [self.analyses[key] for key in keys if key in self.analyses]
+        # Exact summary distinct counts are the non-null groups of one grouping set per column,
+        # so they come out of the same scan; the per-order rows are counted, then dropped
+        distinct_specs = SUMMARY_DISTINCT_COUNTS if 'summary' in keys and not fraction else {}
+
+        dimensions = []
+        for spec in specs + list(distinct_specs.values()):
+            expression, params = dimension_expression(spec)
+            if any(label == spec['label'] and (expression, params) != (other, other_params)
+                   for other, label, other_params in dimensions):
+                raise ValueError(f"Analyses share the label '{spec['label']}' but group by different expressions")
+            if (expression, spec['label'], params) not in dimensions:
+                dimensions.append((expression, spec['label'], params))
+
+        projections = ',\n                    '.join(f"{expression} AS {label}" for expression, label, _ in dimensions)
+        labels = ', '.join(label for _, label, _ in dimensions)
+        grouping_sets = ', '.join(['()'] + [f"({label})" for _, label, _ in dimensions])
+        grouping_id = f"GROUPING({labels})" if dimensions else '0'
+        grand_total_id = 2 ** len(dimensions) - 1
+        # A single-dimension grouping set has only that dimension's bit cleared
+        set_ids = {label: grand_total_id - 2 ** (len(dimensions) - 1 - position)
+                   for position, (_, label, _) in enumerate(dimensions)}
+        measures = ',\n                    '.join(
+            f"{sql} as {name}" for name, sql in (sampled_measures(fraction) if fraction else MEASURES).items()
+        )
+        sample = ' ' + sample_clause(self.sample_percent) if fraction else ''
+        failed_sql, failed_params = failure_flag()
+        amount_sql, amount_params = amount_filter()
+        params = [param for _, _, dimension_params in dimensions for param in dimension_params]
+        params += failed_params + amount_params
+
+        distinct_cte = ''
+        distinct_columns = ''
+        distinct_join = ''
+        where = ''
+        if distinct_specs:
+            counts = ',\n                    '.join(
+                f"COUNT({spec['label']}) FILTER (WHERE grouping_id = {set_ids[spec['label']]}) as {name}"
+                for name, spec in distinct_specs.items()
+            )
+            distinct_cte = f""",
+            distincts AS (
+                SELECT
+                    {counts}
+                FROM grouped
+            )"""
+            distinct_columns = ',\n                ' + ', '.join(f"d.{name}" for name in distinct_specs)
+            distinct_join = '\n            CROSS JOIN distincts d'
+            where = f"\n            WHERE g.grouping_id != {set_ids[SUMMARY_DISTINCT_COUNTS['unique_orders']['label']]}"
+        elif 'summary' in keys:
+            # Order IDs are sampled by hash so each sampled order keeps all of its rows; the
+            # distinct count over that slice scales up with a binomial error bound. The slice
+            # is drawn from every row, so unlike the rest it can't come from the sampled scan.
+            # DuckDB's approx_count_distinct is too coarse for this (about 13% standard error),
+            # and the few categories and states are cheap to count exactly.
+            sampled_ids = f"COUNT(DISTINCT \"Order ID\") FILTER (WHERE hash(\"Order ID\") % 1000000 < {round(fraction * 1000000)})"
+            distinct_cte = f""",
+            distincts AS (
+                SELECT
+                    ROUND({sampled_ids} / {fraction!r})::BIGINT as unique_orders,
+                    {CONFIDENCE_Z} * SQRT({sampled_ids} * {1 - fraction!r}) / {fraction!r} as unique_orders_margin,
+                    COUNT(DISTINCT Category) as unique_categories,
+                    COUNT(DISTINCT "ship-state") as unique_states
+                FROM amazon_sales
+                WHERE {amount_sql}
+            )"""
+            distinct_columns = ',\n                d.unique_orders, d.unique_orders_margin, d.unique_categories, d.unique_states'
+            distinct_join = '\n            CROSS JOIN distincts d'
+            params += amount_params
+
+        grand_total = f"MAX(g.total_revenue) FILTER (WHERE g.grouping_id = {grand_total_id}) OVER ()"
+        margin_columns = ''
+        if fraction:
+            margin_columns = f""",
+                ROUND(100.0 * g.total_revenue_margin / {grand_total}, 2) as revenue_percentage_margin,
+                {failure_rate_margin('g.failed_orders', 'g.total_orders', 'g.sample_orders')} as failure_rate_margin"""
+        return f"""
+            WITH base AS (
+                SELECT
+                    {projections + ',' if dimensions else ''}
+                    Amount,
+                    {failed_sql} as is_failed
+                FROM amazon_sales{sample}
+                WHERE {amount_sql}
+            ),
+            grouped AS (
+                SELECT
+                    {grouping_id} as grouping_id,
+                    {labels + ',' if dimensions else ''}
+                    {measures}
+                FROM base
+                GROUP BY GROUPING SETS ({grouping_sets})
+            ){distinct_cte}
+            SELECT
+                g.*,
+                {revenue_share('g.total_revenue', grand_total)} as revenue_percentage,
+                {failure_rate('g.failed_orders', 'g.total_orders')} as failure_rate{margin_columns}{distinct_columns}
+            FROM grouped g{distinct_join}{where};
+            """, params, [label for _, label, _ in dimensions]
+
+    def run_fused_analysis(self, keys=None, con=None):
+        """Compute the summary and all registered analyses in one scan and fan results out"""
+        try:
+            keys = list(keys) if keys is not None else ['summary'] + list(self.analyses)
+            # Results a current snapshot already holds are read from its mapping instead of recomputed
+            stored = {key: self.stored_aggregate(key) for key in keys}
+            self._restore_results({key: table for key, table in stored.items() if table is not None})
+            keys = [key for key in keys if stored[key] is None]
+            if not keys:
+                return
+            import pyarrow.compute as pc
+
+            query, params, labels = self.compile_fused_query(keys)
+            table = self._query(query, params, con)
+
+            # Rows for a single-dimension grouping set have only that dimension's bit cleared
+            grand_total_id = 2 ** len(labels) - 1
+            total = table.filter(pc.equal(table['grouping_id'], grand_total_id)).to_pylist()[0]
+            groups = {
+                label: table.filter(pc.equal(table['grouping_id'], grand_total_id - 2 ** (len(labels) - 1 - position)))
+                for position, label in enumerate(labels)
             }
-            
-            print(f"📊 Data Summary:")
-            print(f"   Total Records: {result[0]:,}")
-            print(f"   Unique Orders: {result[1]:,}")
-            print(f"   Categories: {result[2]}")
-            print(f"   States: {result[3]}")
-            print(f"   Total Revenue: ₹{result[4]:,.2f}")
-            print(f"   Avg Order Value: ₹{result[5]:,.2f}")
-            
+
+            self._fan_out_results(keys, total, groups)
+
         except Exception as e:
-            print(f"❌ Error getting data summary: {e}")
-    
-    def analyze_channel_performance(self):
-        """Analyze fulfillment channel performance"""
+            print(f"❌ Error running fused analysis: {e}")
+
+    def run_parallel_analysis(self, max_workers=None):
+        """Run each analysis on its own cursor concurrently, then insights and charts as their inputs complete"""
+        analysis_keys = list(self.analyses)
+
+        def run_on_cursor(task):
+            # Cursors are independent connections to the same in-memory database
+            cursor = self.cursor()
+            try:
+                task(cursor)
+            finally:
+                cursor.close()
+
+        tasks = {
+            key: ([], lambda key=key: run_on_cursor(lambda con: self.run_fused_analysis([key], con=con)))
+            for key in ['summary'] + analysis_keys
+        }
+        tasks['time_series'] = ([], lambda: run_on_cursor(lambda con: self.analyze_time_series(con=con)))
+        tasks['insights'] = (analysis_keys, self.generate_insights)
+        tasks['visualizations'] = (analysis_keys + ['time_series'], self.create_visualizations)
+        if self.recorder:
+            tasks = {
+                name: (dependencies, lambda name=name, task=task: self._run_stage(name, task))
+                for name, (dependencies, task) in tasks.items()
+            }
+        self._run_task_graph(tasks, max_workers)
+
+    def _run_stage(self, name, task):
+        with self._stage(name):
+            task()
+
+    def _run_task_graph(self, tasks, max_workers=None):
+        """Run {name: (dependencies, callable)} on a thread pool, starting each task once its dependencies finish"""
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        pending = dict(tasks)
+        done = set()
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or running:
+                for name, (dependencies, task) in list(pending.items()):
+                    if all(dependency in done for dependency in dependencies):
+                        running[executor.submit(task)] = name
+                        del pending[name]
+
+                if not running:
+                    raise RuntimeError(f"Unsatisfiable task dependencies: {sorted(pending)}")
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    future.result()
+                    done.add(name)
+
+    def run_incremental_analysis(self, keys=None):
+        """Fan out results from the running aggregates maintained by incremental ingestion"""
         try:
-            channel_query = """
-            SELECT 
-                Fulfilment,
-                COUNT(*) as total_orders,
-                SUM(Amount) as total_revenue,
-                ROUND(100.0 * SUM(Amount) / (SELECT SUM(Amount) FROM amazon_sales WHERE Amount > 0), 2) as revenue_percentage,
-                COUNT(CASE WHEN Status IN ('Cancelled', 'Undelivered', 'RTO', 'Lost') THEN 1 END) as failed_orders,
-                ROUND(100.0 * COUNT(CASE WHEN Status IN ('Cancelled', 'Undelivered', 'RTO', 'Lost') THEN 1 END) / COUNT(*), 2) as failure_rate
-            FROM amazon_sales
-            WHERE Amount > 0
-            GROUP BY Fulfilment
-            ORDER BY total_revenue DESC;
-            """
-            
-            result = self.con.execute(channel_query).fetchall()
-            self.results['channel_analysis'] = []
-            
-            print(f"\n🚚 Channel Performance Analysis:")
-            for row in result:
-                channel_data = {
-                    'fulfillment': row[0],
-                    'total_orders': row[1],
-                    'total_revenue': row[2],
-                    'revenue_percentage': row[3],
-                    'failed_orders': row[4],
-                    'failure_rate': row[5]
-                }
-                self.results['channel_analysis'].append(channel_data)
-                
-                print(f"   {row[0]}:")
-                print(f"     Revenue Share: {row[3]}%")
-                print(f"     Failure Rate: {row[5]}%")
-                print(f"     Total Revenue: ₹{row[2]:,.2f}")
-            
+            keys = list(keys) if keys is not None else ['summary'] + list(self.analyses)
+            total, groups = self.incremental_store.fetch()
+            if total is None:
+                print("⚠️ No rows ingested yet")
+                return
+
+            total['unique_categories'] = len(groups['category']) - groups['category']['category'].null_count
+            total['unique_states'] = len(groups['state']) - groups['state']['state'].null_count
+            self._fan_out_results(keys, total, groups)
+
         except Exception as e:
-            print(f"❌ Error analyzing channel performance: {e}")
-    
+            print(f"❌ Error running incremental analysis: {e}")
+
+    def _fan_out_results(self, keys, total, groups):
+        """Filter, rank and trim each analysis's grouped Arrow table into self.tables and self.results"""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        if 'summary' in keys:
+            columns = {
+                'total_records': 'total_orders',
+                'unique_orders': 'unique_orders',
+                'unique_categories': 'unique_categories',
+                'unique_states': 'unique_states',
+                'total_revenue': 'total_revenue',
+                'avg_order_value': 'avg_order_value'
+            }
+            summary = {name: total[column] for name, column in columns.items()}
+            # Approximate runs report a 95% margin next to each estimate
+            summary.update({
+                f"{name}_margin": total[f"{column}_margin"]
+                for name, column in columns.items() if f"{column}_margin" in total
+            })
+            if self.sample_percent:
+                summary['sample_percent'] = self.sample_percent
+            self.results['summary'] = summary
+            self.tables['summary'] = pa.Table.from_pylist([summary])
+            self._print_summary()
+
+        for key in keys:
+            spec = self.analyses.get(key)
+            if not spec:
+                continue
+
+            # Groups stay columnar until trimmed, so high-cardinality dimensions never become Python rows
+            group_rows = groups[spec['label']]
+            if spec.get('drop_null') or spec.get('filters'):
+                group_rows = group_rows.filter(pc.is_valid(group_rows[spec['label']]))
+            if spec.get('min_orders'):
+                group_rows = group_rows.filter(pc.greater_equal(group_rows['total_orders'], spec['min_orders']))
+
+            # Arrow's sort is stable and places nulls last
+            group_rows = group_rows.sort_by([(spec['order_by'], 'descending')])
+            if spec.get('limit'):
+                group_rows = group_rows.slice(0, spec['limit'])
+
+            fields = [spec['label']] + spec['fields']
+            fields += [f"{field}_margin" for field in spec['fields'] if f"{field}_margin" in total]
+            self.tables[key] = group_rows.select(fields)
+            self.results[key] = self.tables[key].to_pylist()
+            self._print_result(key)
+
+    def _restore_results(self, tables):
+        """Fan result tables read from the snapshot out into self.tables and self.results"""
+        for key, table in tables.items():
+            self.tables[key] = table
+            self.results[key] = table.to_pylist()[0] if key == 'summary' else table.to_pylist()
+            self._print_result(key)
+
+    def _print_result(self, key):
+        printer = getattr(self, f"_print_{key}", None)
+        if printer:
+            printer()
+        else:
+            self._print_grouped(key)
+
+    def get_data_summary(self):
+        """Get basic data summary statistics"""
+        self.run_fused_analysis(['summary'])
+
+    def analyze_channel_performance(self):
+        """Analyze fulfillment channel performance"""
+        self.run_fused_analysis(['channel_analysis'])
+
     def analyze_geographic_performance(self):
         """Analyze performance by geographic region"""
-        try:
-            geo_query = """
-            SELECT 
-                "ship-state" as state,
-                COUNT(*) as total_orders,
-                SUM(Amount) as total_revenue,
-                COUNT(CASE WHEN Status IN ('Cancelled', 'Undelivered', 'RTO', 'Lost') THEN 1 END) as failed_orders,
-                ROUND(100.0 * COUNT(CASE WHEN Status IN ('Cancelled', 'Undelivered', 'RTO', 'Lost') THEN 1 END) / COUNT(*), 2) as failure_rate
-            FROM amazon_sales
-            WHERE Amount > 0 AND "ship-state" IS NOT NULL
-            GROUP BY "ship-state"
-            HAVING COUNT(*) >= 100  -- Only states with significant volume
-            ORDER BY failure_rate DESC
-            LIMIT 10;
-            """
-            
-            result = self.con.execute(geo_query).fetchall()
-            self.results['geographic_analysis'] = []
-            
-            print(f"\n🗺️ Geographic Performance Analysis (Top 10 by Failure Rate):")
-            for row in result:
-                geo_data = {
-                    'state': row[0],
-                    'total_orders': row[1],
-                    'total_revenue': row[2],
-                    'failed_orders': row[3],
-                    'failure_rate': row[4]
-                }
-                self.results['geographic_analysis'].append(geo_data)
-                
-                print(f"   {row[0]}: {row[4]}% failure rate ({row[3]} failed out of {row[1]} orders)")
-            
-        except Exception as e:
-            print(f"❌ Error analyzing geographic performance: {e}")
-    
+        self.run_fused_analysis(['geographic_analysis'])
+
     def analyze_category_performance(self):
         """Analyze performance by product category"""
+        self.run_fused_analysis(['category_analysis'])
+
+    def analyze_time_series(self, con=None):
+        """Analyze daily and weekly trends with rolling windows, overall and per channel and state"""
         try:
-            category_query = """
-            SELECT 
-                Category,
-                COUNT(*) as total_orders,
-                SUM(Amount) as total_revenue,
-                ROUND(100.0 * SUM(Amount) / (SELECT SUM(Amount) FROM amazon_sales WHERE Amount > 0), 2) as revenue_percentage,
-                AVG(Amount) as avg_order_value
-            FROM amazon_sales
-            WHERE Amount > 0 AND Category IS NOT NULL
-            GROUP BY Category
-            ORDER BY total_revenue DESC
-            LIMIT 10;
-            """
-            
-            result = self.con.execute(category_query).fetchall()
-            self.results['category_analysis'] = []
-            
-            print(f"\n📦 Category Performance Analysis (Top 10 by Revenue):")
-            for row in result:
-                category_data = {
-                    'category': row[0],
-                    'total_orders': row[1],
-                    'total_revenue': row[2],
-                    'revenue_percentage': row[3],
-                    'avg_order_value': row[4]
-                }
-                self.results['category_analysis'].append(category_data)
-                
-                print(f"   {row[0]}: {row[3]}% revenue share (₹{row[2]:,.2f})")
-            
+            import pyarrow.compute as pc
+
+            if self.incremental:
+                # Windows are maintained by incremental ingestion for the newly arrived days only
+                series = self.incremental_store.time_series.fetch()
+            else:
+                # One scan yields the daily totals and windows; weeks are rolled up from that result
+                daily_sql, daily_params = compile_daily_aggregates('amazon_sales', series_dimensions())
+                daily = self._query(*compile_rolling_windows(daily_sql, daily_params), con)
+                series = {'daily': daily, 'weekly': rollup_weeks(con or self.con, daily)}
+
+            daily = series['daily']
+            self.tables['time_series_daily'] = daily
+            self.tables['time_series_weekly'] = series['weekly']
+            self.tables['daily_series'] = daily.filter(pc.equal(daily['dimension'], '*')).drop(['dimension', 'group_value'])
+            self.results['time_series'] = {name: table.to_pylist() for name, table in series.items()}
+            self.results['daily_series'] = self.tables['daily_series'].to_pylist()
+            self._print_time_series()
+
+        except Exception as e:
+            print(f"❌ Error analyzing time series: {e}")
+
+    def analyze_daily_performance(self):
+        """Analyze orders, revenue and failure rate per order date"""
+        if 'daily_series' not in self.results:
+            self.analyze_time_series()
+
+    def drill_index(self, name):
+        """Return the drill-down index for a hierarchy, created on first use"""
+        return self.drill_indexes.setdefault(name, DrillDownIndex(name))
+
+    def analyze_drill_down(self, name, level, parent=None, order_by='failure_rate', limit=10, min_orders=None, con=None):
+        """Rank the top groups at one drill-down level, optionally within a parent such as ['MAHARASHTRA']"""
+        if self.incremental:
+            print("❌ Drill-downs need the loaded sales table, not the incremental aggregates")
+            return
+        try:
+            index = self.drill_index(name)
+            sql, params = index.compile_top_k(level, parent, order_by, limit, min_orders)
+            table = self._query(sql, params, con, prepare=lambda: index.ensure_built(con or self.con))
+
+            key = f"drill_{name}_{level}"
+            self.tables[key] = table
+            self.results[key] = table.to_pylist()
+            scope = ' / '.join(str(value) for value in parent or []) or 'all'
+            # Rows are grouped by their whole path, so levels below the scope are shown with their ancestors
+            labels = index.labels()
+            path_labels = labels[len(parent or []):labels.index(level) + 1]
+            print(f"\n🔎 {level.replace('_', ' ').title()} Drill-Down, top {len(self.results[key])} by {order_by.replace('_', ' ')} ({scope}):")
+            for row in self.results[key]:
+                path = ' › '.join(str(row[label]) for label in path_labels)
+                print(f"   {path}: {row['failure_rate']}% failure rate, ₹{row['total_revenue']:,.2f} revenue "
+                      f"({row['total_orders']:,} orders)")
+
+        except Exception as e:
+            print(f"❌ Error analyzing {name} drill-down: {e}")
+
+    def profile_data(self, crosstabs=AMAZON_CROSSTABS):
+        """Profile every loaded column of the sales table, with status crosstabs"""
+        if self.incremental:
+            print("❌ Profiling needs the loaded sales table, not the incremental aggregates")
+            return
+        try:
+            self._ensure_loaded()
+            profiler = DatasetProfiler(self.con, 'amazon_sales')
+            # Streaming loads keep only the analysed columns
+            profiler.crosstabs = [pair for pair in crosstabs if all(name in profiler.types for name in pair)]
+            self.results['profile'] = profiler.profile()
+            print_profile(self.results['profile'])
+
+        except Exception as e:
+            print(f"❌ Error profiling the sales data: {e}")
+
+    def train_failure_model(self, folds=DEFAULT_FOLDS, max_workers=None):
+        """Cross-validate order failure classifiers on features cached per column of the sales table"""
+        if self.incremental:
+            print("❌ Failure models need the loaded sales table, not the incremental aggregates")
+            return
+        try:
+            cache = FeatureCache(os.path.join(self.cache_dir or '.duckdb_cache', 'features'))
+            fingerprint = self.dataset_fingerprint or self.source_fingerprint()
+            # An unchanged dataset is answered from the cached matrices without loading it
+            matrices = cache.load('failures', fingerprint)
+            if matrices is None:
+                self._ensure_loaded()
+                table = 'amazon_sales'
+                if self.sales_table is not None:
+                    # Feature blocks are keyed by rowid, which only DuckDB tables have
+                    self.con.execute("CREATE OR REPLACE TEMP TABLE model_sales AS SELECT * FROM amazon_sales;")
+                    table = 'model_sales'
+                matrices = cache.build(self.con, table, 'failures', MODEL_SPECS['failures'], fingerprint)
+            self.results['failure_model'] = train_models(*matrices, folds=folds, max_workers=max_workers or self.max_workers)
+            print_model_results('failure', self.results['failure_model'], cache)
+
         except Exception as e:
-            print(f"❌ Error analyzing category performance: {e}")
+            print(f"❌ Error training failure models: {e}")
+
+    def _margin(self, row, field, format_spec=',.0f', suffix=''):
+        """Return ' ± margin' for approximate results, or '' when the value is exact"""
+        margin = row.get(f"{field}_margin")
+        return f" ± {margin:{format_spec}}{suffix}" if margin is not None else ''
+
+    def _print_summary(self):
+        summary = self.results['summary']
+        if summary.get('sample_percent'):
+            print(f"📊 Data Summary (approximate, {summary['sample_percent']}% sample, 95% margins):")
+        else:
+            print(f"📊 Data Summary:")
+        print(f"   Total Records: {summary['total_records']:,}{self._margin(summary, 'total_records')}")
+        print(f"   Unique Orders: {summary['unique_orders']:,}{self._margin(summary, 'unique_orders')}")
+        print(f"   Categories: {summary['unique_categories']}")
+        print(f"   States: {summary['unique_states']}")
+        print(f"   Total Revenue: ₹{summary['total_revenue']:,.2f}{self._margin(summary, 'total_revenue', ',.2f')}")
+        print(f"   Avg Order Value: ₹{summary['avg_order_value']:,.2f}{self._margin(summary, 'avg_order_value', ',.2f')}")
+
+    def _print_channel_analysis(self):
+        print(f"\n🚚 Channel Performance Analysis:")
+        for row in self.results['channel_analysis']:
+            print(f"   {row['fulfillment']}:")
+            print(f"     Revenue Share: {row['revenue_percentage']}%{self._margin(row, 'revenue_percentage', '', '%')}")
+            print(f"     Failure Rate: {row['failure_rate']}%{self._margin(row, 'failure_rate', '', '%')}")
+            print(f"     Total Revenue: ₹{row['total_revenue']:,.2f}{self._margin(row, 'total_revenue', ',.2f')}")
+
+    def _print_geographic_analysis(self):
+        print(f"\n🗺️ Geographic Performance Analysis (Top 10 by Failure Rate):")
+        for row in self.results['geographic_analysis']:
+            print(f"   {row['state']}: {row['failure_rate']}%{self._margin(row, 'failure_rate', '', '%')} failure rate ({row['failed_orders']} failed out of {row['total_orders']} orders)")
+
+    def _print_grouped(self, key):
+        spec = self.analyses[key]
+        print(f"\n📊 {spec.get('title', key.replace('_', ' ').title())}:")
+        for row in self.results[key]:
+            print(f"   {row[spec['label']]}: {row['failure_rate']}%{self._margin(row, 'failure_rate', '', '%')} failure rate ({row['failed_orders']} failed out of {row['total_orders']} orders)")
+
+    def _print_time_series(self):
+        series = self.results['time_series']
+        days = self.results['daily_series']
+        print(f"\n📅 Time Series: {len(days)} days, {sum(1 for row in series['weekly'] if row['dimension'] == '*')} weeks, "
+              f"{len({(row['dimension'], row['group_value']) for row in series['daily']})} series")
+        if days:
+            latest = days[-1]
+            print(f"   Latest day {latest['order_date']}: {latest['total_orders']:,} orders, {latest['failure_rate']}% failure rate")
+            for window in ROLLING_WINDOWS:
+                print(f"     Trailing {window} days: ₹{latest[f'revenue_{window}d']:,.2f} revenue, "
+                      f"{latest[f'failure_rate_{window}d']}% failure rate")
+
+    def _print_category_analysis(self):
+        print(f"\n📦 Category Performance Analysis (Top 10 by Revenue):")
+        for row in self.results['category_analysis']:
+            print(f"   {row['category']}: {row['revenue_percentage']}%{self._margin(row, 'revenue_percentage', '', '%')} revenue share (₹{row['total_revenue']:,.2f})")
     
     def generate_insights(self):
         """Generate key business insights"""
@@ -237,84 +928,117 @@ class AmazonAnalysisGenerator:
         except Exception as e:
             print(f"❌ Error generating insights: {e}")
     
+    def chart_specs(self):
+        """Build plotly figure specs (plain data/layout dicts) for each available analysis"""
+        specs = {}
+        axis_style = {'gridcolor': '#EBF0F8', 'zerolinecolor': '#EBF0F8'}
+
+        def bar_chart(title, x_title, y_title, x, y, color):
+            return {
+                'data': [{
+                    'type': 'bar',
+                    'x': x,
+                    'y': y,
+                    'name': y_title,
+                    'marker': {'color': color},
+                    'text': [f"{value}%" for value in y],
+                    'textposition': 'auto'
+                }],
+                'layout': {
+                    'title': {'text': title},
+                    'xaxis': dict(axis_style, title={'text': x_title}),
+                    'yaxis': dict(axis_style, title={'text': y_title}),
+                    'plot_bgcolor': 'white',
+                    'paper_bgcolor': 'white'
+                }
+            }
+
+        # Channel Performance Chart
+        if 'channel_analysis' in self.results:
+            channel_data = self.results['channel_analysis']
+            specs['channel_performance'] = bar_chart(
+                'Delivery Failure Rate by Fulfillment Channel', 'Fulfillment Channel', 'Failure Rate (%)',
+                [item['fulfillment'] for item in channel_data],
+                [item['failure_rate'] for item in channel_data],
+                ['#ff6b6b', '#4ecdc4']
+            )
+
+        # Geographic Analysis Chart
+        if 'geographic_analysis' in self.results:
+            geo_data = self.results['geographic_analysis'][:5]  # Top 5 states
+            specs['geographic_analysis'] = bar_chart(
+                'Top 5 States by Delivery Failure Rate', 'State', 'Failure Rate (%)',
+                [item['state'] for item in geo_data],
+                [item['failure_rate'] for item in geo_data],
+                '#ff4757'
+            )
+
+        # Category Revenue Chart
+        if 'category_analysis' in self.results:
+            category_data = self.results['category_analysis'][:5]  # Top 5 categories
+            specs['category_revenue'] = bar_chart(
+                'Top 5 Categories by Revenue Share', 'Product Category', 'Revenue Share (%)',
+                [item['category'] for item in category_data],
+                [item['revenue_percentage'] for item in category_data],
+                '#667eea'
+            )
+
+        # Daily trend chart of the trailing windows
+        if self.results.get('daily_series'):
+            days = self.results['daily_series']
+            window = ROLLING_WINDOWS[0]
+            specs['daily_trend'] = {
+                'data': [
+                    {'type': 'scatter', 'mode': 'lines', 'name': f'Revenue ({window}-day)',
+                     'x': [str(row['order_date']) for row in days], 'y': [row[f'revenue_{window}d'] for row in days],
+                     'line': {'color': '#667eea'}},
+                    {'type': 'scatter', 'mode': 'lines', 'name': f'Failure Rate ({window}-day, %)', 'yaxis': 'y2',
+                     'x': [str(row['order_date']) for row in days], 'y': [row[f'failure_rate_{window}d'] for row in days],
+                     'line': {'color': '#ff4757'}}
+                ],
+                'layout': {
+                    'title': {'text': f'Trailing {window}-Day Revenue and Failure Rate'},
+                    'xaxis': dict(axis_style, title={'text': 'Order Date'}),
+                    'yaxis': dict(axis_style, title={'text': 'Revenue (₹)'}),
+                    'yaxis2': {'title': {'text': 'Failure Rate (%)'}, 'overlaying': 'y', 'side': 'right', 'showgrid': False},
+                    'plot_bgcolor': 'white',
+                    'paper_bgcolor': 'white'
+                }
+            }
+
+        return specs
+
     def create_visualizations(self):
         """Create interactive visualizations"""
         try:
-            # Channel Performance Chart
-            if 'channel_analysis' in self.results:
-                channel_data = self.results['channel_analysis']
-                
-                fig = go.Figure()
-                
-                # Add failure rate bars
-                fig.add_trace(go.Bar(
-                    x=[item['fulfillment'] for item in channel_data],
-                    y=[item['failure_rate'] for item in channel_data],
-                    name='Failure Rate (%)',
-                    marker_color=['#ff6b6b', '#4ecdc4'],
-                    text=[f"{item['failure_rate']}%" for item in channel_data],
-                    textposition='auto'
-                ))
-                
-                fig.update_layout(
-                    title='Delivery Failure Rate by Fulfillment Channel',
-                    xaxis_title='Fulfillment Channel',
-                    yaxis_title='Failure Rate (%)',
-                    template='plotly_white'
-                )
-                
-                fig.write_html('channel_performance_chart.html')
-                print("✅ Created channel performance chart")
-            
-            # Geographic Analysis Chart
-            if 'geographic_analysis' in self.results:
-                geo_data = self.results['geographic_analysis'][:5]  # Top 5 states
-                
-                fig = go.Figure()
-                
-                fig.add_trace(go.Bar(
-                    x=[item['state'] for item in geo_data],
-                    y=[item['failure_rate'] for item in geo_data],
-                    name='Failure Rate (%)',
-                    marker_color='#ff4757',
-                    text=[f"{item['failure_rate']}%" for item in geo_data],
-                    textposition='auto'
-                ))
-                
-                fig.update_layout(
-                    title='Top 5 States by Delivery Failure Rate',
-                    xaxis_title='State',
-                    yaxis_title='Failure Rate (%)',
-                    template='plotly_white'
-                )
-                
-                fig.write_html('geographic_analysis_chart.html')
-                print("✅ Created geographic analysis chart")
-            
-            # Category Revenue Chart
-            if 'category_analysis' in self.results:
-                category_data = self.results['category_analysis'][:5]  # Top 5 categories
-                
-                fig = go.Figure()
-                
-                fig.add_trace(go.Bar(
-                    x=[item['category'] for item in category_data],
-                    y=[item['revenue_percentage'] for item in category_data],
-                    name='Revenue Share (%)',
-                    marker_color='#667eea',
-                    text=[f"{item['revenue_percentage']}%" for item in category_data],
-                    textposition='auto'
-                ))
-                
-                fig.update_layout(
-                    title='Top 5 Categories by Revenue Share',
-                    xaxis_title='Product Category',
-                    yaxis_title='Revenue Share (%)',
-                    template='plotly_white'
-                )
-                
-                fig.write_html('category_revenue_chart.html')
-                print("✅ Created category revenue chart")
+            specs = self.chart_specs()
+
+            if self.chart_format == 'json':
+                # Compact specs that amazon_dashboard.html renders with its own plotly.js
+                path = self.output_path(CHART_SPECS_FILE)
+                with open(path, 'w') as f:
+                    json.dump(specs, f, separators=(',', ':'), default=str)
+                self.output_files.append(path)
+                print(f"✅ Created chart specs for {len(specs)} charts")
+
+            elif self.chart_format == 'dashboard':
+                # One page sharing a single plotly.js reference instead of a bundle per chart
+                path = self.output_path(CHART_DASHBOARD_FILE)
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(render_chart_dashboard(specs))
+                self.output_files.append(path)
+                print(f"✅ Created chart dashboard with {len(specs)} charts")
+
+            else:
+                import plotly.graph_objects as go
+
+                for name, spec in specs.items():
+                    fig = go.Figure(spec)
+                    fig.update_layout(template='plotly_white')
+                    path = self.output_path(f"{name}_chart.html")
+                    fig.write_html(path)
+                    self.output_files.append(path)
+                    print(f"✅ Created {name.replace('_', ' ')} chart")
             
         except Exception as e:
             print(f"❌ Error creating visualizations: {e}")
@@ -322,12 +1046,59 @@ class AmazonAnalysisGenerator:
     def save_results(self):
         """Save analysis results to JSON file"""
         try:
-            with open('amazon_analysis_results.json', 'w') as f:
-                json.dump(self.results, f, indent=2, default=str)
-            print("✅ Saved analysis results to amazon_analysis_results.json")
+            path = self.output_path(RESULTS_FILE)
+            with open(path, 'w') as f:
+                json.dump(self.results, f, indent=2, default=json_default)
+            self.output_files.append(path)
+            print(f"✅ Saved analysis results to {path}")
         except Exception as e:
             print(f"❌ Error saving results: {e}")
+        if self.export_dir:
+            self.export_tables()
+        if self.snapshot:
+            self.save_snapshot()
+
+    def save_snapshot(self):
+        """Add the result tables to the snapshot, tagging each analysis with the query that produced it"""
+        try:
+            # A run answered entirely from the result cache has not loaded, or snapshotted, the table yet
+            self._ensure_loaded()
+            digests = {}
+            for key in ['summary'] + list(self.analyses):
+                if key in self.tables:
+                    query, params, _ = self.compile_fused_query([key])
+                    digests[key] = query_digest(query, params)
+            if self.snapshot.write_aggregates(self.tables, digests):
+                print(f"✅ Saved {len(self.tables)} result tables to snapshot {self.snapshot.directory}/")
+        except Exception as e:
+            print(f"❌ Error saving snapshot: {e}")
+
+    def export_tables(self):
+        """Write each result table as Parquet and Arrow IPC, keeping its column types"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            export_dir = self.output_path(self.export_dir)
+            os.makedirs(export_dir, exist_ok=True)
+            for name, table in self.tables.items():
+                base = os.path.join(export_dir, name)
+                pq.write_table(table, base + '.parquet')
+                with pa.OSFile(base + '.arrow', 'wb') as f:
+                    with pa.ipc.new_file(f, table.schema) as writer:
+                        writer.write_table(table)
+                self.output_files += [base + '.parquet', base + '.arrow']
+            print(f"✅ Exported {len(self.tables)} result tables to {export_dir}/ as Parquet and Arrow IPC")
+        except Exception as e:
+            print(f"❌ Error exporting result tables: {e}")
     
+    def output_path(self, name):
+        """Return where an output file or directory goes, creating the output directory on first use"""
+        if not self.output_dir:
+            return name
+        os.makedirs(self.output_dir, exist_ok=True)
+        return os.path.join(self.output_dir, name)
+
     def close_connection(self):
         """Close DuckDB connection"""
         if self.con:
@@ -338,39 +1109,179 @@ class AmazonAnalysisGenerator:
         """Run the complete analysis pipeline"""
         print("🚀 Starting Amazon Logistics Optimization Analysis...")
         
-        if not self.connect_to_duckdb():
+        with self._stage('load'):
+            connected = self.connect_to_duckdb()
+        if not connected:
             return False
         
-        self.get_data_summary()
-        self.analyze_channel_performance()
-        self.analyze_geographic_performance()
-        self.analyze_category_performance()
-        self.generate_insights()
-        self.create_visualizations()
-        self.save_results()
+        with self._stage('analysis'):
+            if self.incremental:
+                self.run_incremental_analysis()
+            elif self.parallel:
+                self.run_parallel_analysis(self.max_workers)
+            else:
+                self.run_fused_analysis()
+
+        if not self.parallel:
+            with self._stage('time_series'):
+                self.analyze_time_series()
+
+        # Parallel mode already produced insights and charts as part of its task graph
+        if self.incremental or not self.parallel:
+            with self._stage('insights'):
+                self.generate_insights()
+            with self._stage('visualizations'):
+                self.create_visualizations()
+        with self._stage('save'):
+            self.save_results()
         self.close_connection()
+        if self.result_cache:
+            print(self.result_cache.stats_line())
+
+        if self.recorder:
+            for path in self.recorder.write():
+                print(f"✅ Saved query profile to {path}")
         
         print("\n🎉 Analysis Complete! Check the generated files:")
-        print("   - amazon_analysis_results.json")
-        print("   - channel_performance_chart.html")
-        print("   - geographic_analysis_chart.html")
-        print("   - category_revenue_chart.html")
+        for path in self.output_files:
+            print(f"   - {path}")
+
+        peak = peak_rss_mb()
+        if peak is not None:
+            print(f"\n📈 Peak memory (RSS): {peak:,.1f} MB")
         
         return True
 
-def main():
-    # Path to the Amazon sales CSV file
-    csv_file_path = r'C:\Users\swath\DashCam_Practicum\temp_portfolio\hq4743.github.io\Amazon Sale Report.csv'
+# Sample size for --approximate without an explicit percentage
+DEFAULT_SAMPLE_PERCENT = 1.0
+
+# CLI subcommands that run a single analysis after loading the data, by result key
+ANALYSIS_COMMANDS = {
+    'summary': 'summary',
+    'channel': 'channel_analysis',
+    'geo': 'geographic_analysis',
+    'category': 'category_analysis',
+    'city': 'city_analysis',
+    'courier': 'courier_analysis',
+    'trends': 'time_series'
+}
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description='Amazon Logistics Optimization Analysis')
+    parser.add_argument('command', choices=list(ANALYSIS_COMMANDS) + ['drill', 'profile', 'model', 'full'],
+                        help='analysis to run; drill ranks one drill-down level; profile summarizes every column; '
+                             'model cross-validates order failure classifiers; '
+                             'full runs the complete pipeline with charts and saved results')
+    parser.add_argument('--csv', default=DEFAULT_CSV_PATH,
+                        help='sales CSV, or a glob/directory of CSV or Parquet shards')
+    parser.add_argument('--cache-dir', default='.duckdb_cache', help='Parquet cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='parse the CSV directly on every run')
+    parser.add_argument('--refresh-schema', action='store_true',
+                        help="re-detect the CSV's encoding and column types instead of using the recorded schema")
+    parser.add_argument('--result-cache-dir', default=DEFAULT_CACHE_DIR, help='query result cache directory')
+    parser.add_argument('--no-result-cache', action='store_true', help='always run queries against the data')
+    parser.add_argument('--incremental', action='store_true', help='ingest only rows appended since the last run')
+    parser.add_argument('--streaming', action='store_true', help='load only the analysed columns and rows')
+    parser.add_argument('--memory-limit', help="DuckDB memory ceiling, e.g. '4GB'")
+    parser.add_argument('--temp-directory', help='where DuckDB spills beyond the memory limit')
+    parser.add_argument('--threads', type=int, help='DuckDB worker threads (default: one per core)')
+    parser.add_argument('--approximate', type=float, nargs='?', const=DEFAULT_SAMPLE_PERCENT, metavar='PERCENT',
+                        help=f'estimate from a PERCENT%% row sample (default {DEFAULT_SAMPLE_PERCENT}) with 95%% margins')
+    parser.add_argument('--parallel', action='store_true', help='run independent analyses concurrently')
+    parser.add_argument('--workers', type=int, help='thread pool size for --parallel')
+    parser.add_argument('--chart-format', choices=['html', 'dashboard', 'json'], default='html')
+    parser.add_argument('--export-dir', default=RESULTS_EXPORT_DIR,
+                        help='where full runs write result tables as Parquet and Arrow IPC')
+    parser.add_argument('--no-export', action='store_true', help='write only the JSON results')
+    parser.add_argument('--snapshot', metavar='DIR',
+                        help='keep the loaded table and results as a memory-mapped Arrow snapshot in DIR, '
+                             'opened instead of reloading while the source is unchanged')
+    parser.add_argument('--output-dir', help='write results, charts and exports here instead of the working directory')
+    parser.add_argument('--hierarchy', choices=list(DRILL_DOWNS), default='geography', help='drill-down hierarchy')
+    parser.add_argument('--level', help='drill-down level to rank; defaults to the children of --parent')
+    parser.add_argument('--parent', action='append', default=[],
+                        help='scope the drill-down to a parent value; repeat for deeper paths, e.g. --parent KERALA --parent KOCHI')
+    parser.add_argument('--rank-by', choices=DRILL_ORDER_BY, default='failure_rate')
+    parser.add_argument('--top', type=int, default=10, help='number of drill-down groups to show')
+    parser.add_argument('--min-orders', type=int, help="minimum orders per drill-down group (default: the level's threshold)")
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS, help='cross-validation folds for the model command')
+    parser.add_argument('--profile', help='write per-query instrumentation JSON to this path')
+    parser.add_argument('--trace', help='write a Chrome trace of stages and queries to this path')
+    return parser
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
     
     # Check if file exists
-    if not os.path.exists(csv_file_path):
-        print(f"❌ CSV file not found at: {csv_file_path}")
-        print("Please update the csv_file_path variable with the correct path.")
+    if not glob.has_magic(args.csv) and not os.path.exists(args.csv):
+        print(f"❌ CSV file not found at: {args.csv}")
+        print("Please pass the correct path with --csv.")
         return
     
+    # Optional analyses such as city are computed alongside the default ones when requested
+    analysis_keys = [key for key, spec in ANALYSIS_REGISTRY.items() if spec.get('default', True)]
+    if args.command in ANALYSIS_COMMANDS and ANALYSIS_COMMANDS[args.command] in ANALYSIS_REGISTRY:
+        if ANALYSIS_COMMANDS[args.command] not in analysis_keys:
+            analysis_keys.append(ANALYSIS_COMMANDS[args.command])
+
     # Create and run analysis
-    analyzer = AmazonAnalysisGenerator(csv_file_path)
-    analyzer.run_full_analysis()
+    analyzer = AmazonAnalysisGenerator(
+        args.csv,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        incremental=args.incremental,
+        streaming=args.streaming,
+        memory_limit=args.memory_limit,
+        temp_directory=args.temp_directory,
+        parallel=args.parallel,
+        max_workers=args.workers,
+        profile_path=args.profile,
+        trace_path=args.trace,
+        chart_format=args.chart_format,
+        result_cache_dir=None if args.no_result_cache else args.result_cache_dir,
+        analysis_keys=analysis_keys,
+        sample_percent=args.approximate,
+        export_dir=None if args.no_export else args.export_dir,
+        drill_downs=[args.hierarchy] if args.command == 'drill' else None,
+        refresh_schema=args.refresh_schema,
+        output_dir=args.output_dir,
+        threads=args.threads,
+        snapshot_dir=args.snapshot
+    )
+
+    if args.command == 'full':
+        analyzer.run_full_analysis()
+        return
+
+    import importlib
+
+    started = time.perf_counter()
+    for module in COMMAND_IMPORTS.get(args.command, SINGLE_ANALYSIS_IMPORTS):
+        importlib.import_module(module)
+    import_seconds = MODULE_IMPORT_SECONDS + time.perf_counter() - started
+
+    if analyzer.connect_to_duckdb():
+        if args.command == 'drill':
+            levels = DRILL_DOWNS[args.hierarchy]
+            level = args.level or levels[min(len(args.parent), len(levels) - 1)]['label']
+            analyzer.analyze_drill_down(args.hierarchy, level, args.parent, args.rank_by, args.top, args.min_orders)
+        elif args.command == 'trends':
+            analyzer.analyze_time_series()
+        elif args.command == 'profile':
+            analyzer.profile_data()
+        elif args.command == 'model':
+            analyzer.train_failure_model(args.folds)
+        elif args.incremental:
+            analyzer.run_incremental_analysis([ANALYSIS_COMMANDS[args.command]])
+        else:
+            analyzer.run_fused_analysis([ANALYSIS_COMMANDS[args.command]])
+        analyzer.close_connection()
+        if analyzer.result_cache:
+            print(analyzer.result_cache.stats_line())
+        if analyzer.recorder:
+            analyzer.recorder.write()
+
+    status = '✅' if import_seconds <= IMPORT_BUDGET_SECONDS else '⚠️'
+    print(f"{status} Startup imports: {import_seconds:.3f}s (budget {IMPORT_BUDGET_SECONDS:.2f}s)")
 
 if __name__ == "__main__":
     main()
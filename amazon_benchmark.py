@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Amazon Analysis Benchmark Suite
+Synthesizes Amazon Sale Report shaped data and times each stage of the analysis pipeline
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import duckdb
+
+STATES = ['MAHARASHTRA', 'KARNATAKA', 'TELANGANA', 'UTTAR PRADESH', 'TAMIL NADU', 'DELHI',
+          'KERALA', 'WEST BENGAL', 'ANDHRA PRADESH', 'GUJARAT', 'HARYANA', 'RAJASTHAN',
+          'MADHYA PRADESH', 'ODISHA', 'BIHAR', 'PUNJAB', 'ASSAM', 'GOA', 'JHARKHAND', 'UTTARAKHAND']
+CITIES = ['MUMBAI', 'BENGALURU', 'HYDERABAD', 'LUCKNOW', 'CHENNAI', 'NEW DELHI', 'KOCHI', 'KOLKATA',
+          'VISAKHAPATNAM', 'AHMEDABAD', 'GURUGRAM', 'JAIPUR', 'BHOPAL', 'BHUBANESWAR', 'PATNA',
+          'LUDHIANA', 'GUWAHATI', 'PANAJI', 'RANCHI', 'DEHRADUN']
+CATEGORIES = ['Set', 'kurta', 'Western Dress', 'Top', 'Ethnic Dress', 'Blouse', 'Bottom', 'Saree', 'Dupatta']
+SIZES = ['M', 'L', 'XL', 'XXL', 'S', '3XL', 'XS', '6XL', '5XL', '4XL', 'Free']
+
+# Stages timed for every dataset size, in pipeline order; each runs the generator method of the
+# same name unless mapped in STAGE_METHODS
+STAGES = ['load', 'get_data_summary', 'analyze_channel_performance', 'analyze_geographic_performance',
+          'analyze_category_performance', 'fused_analysis', 'analyze_time_series', 'generate_insights',
+          'create_visualizations', 'save_results']
+STAGE_METHODS = {'load': 'connect_to_duckdb', 'fused_analysis': 'run_fused_analysis'}
+
+REGRESSION_THRESHOLD = 0.20
+MIN_REGRESSION_SECONDS = 0.05  # ignore jitter on stages that only take milliseconds
+
+
+def _sql_list(values):
+    return '[' + ', '.join("'" + value + "'" for value in values) + ']'
+
+
+def _skewed_pick(values, skew):
+    """SQL expression picking from values with a power-law bias towards the first entries"""
+    return f"{_sql_list(values)}[1 + CAST(FLOOR({len(values)} * POW(random(), {skew})) AS INTEGER)]"
+
+
+def generate_synthetic_sales(output_path, rows, seed=0.42, merchant_failure_rate=0.1146,
+                             amazon_failure_rate=0.025, skew=2.5):
+    """Write a synthetic Amazon Sale Report CSV with skewed state/category mixes and per-channel failure rates"""
+    con = duckdb.connect(database=':memory:')
+    con.execute(f"SELECT setseed({seed});")
+    con.execute(f"""
+    COPY (
+        WITH orders AS (
+            SELECT
+                i,
+                CASE WHEN random() < 0.70 THEN 'Merchant' ELSE 'Amazon' END as fulfilment,
+                random() as failure_draw,
+                {_skewed_pick(STATES, skew)} as state,
+                {_skewed_pick(CATEGORIES, skew)} as category
+            FROM range({int(rows)}) t(i)
+        )
+        SELECT
+            i as "index",
+            printf('%03d-%07d-%07d', 171 + i % 800, (i * 7919) % 10000000, i % 10000000) as "Order ID",
+            strftime(DATE '2022-03-31' + CAST(FLOOR(random() * 91) AS INTEGER), '%m-%d-%y') as "Date",
+            CASE
+                WHEN failure_draw < CASE WHEN fulfilment = 'Merchant' THEN {merchant_failure_rate} ELSE {amazon_failure_rate} END
+                    THEN ['Cancelled', 'Cancelled', 'Cancelled', 'RTO', 'Undelivered', 'Lost'][1 + CAST(FLOOR(random() * 6) AS INTEGER)]
+                WHEN fulfilment = 'Amazon' THEN 'Shipped'
+                ELSE ['Shipped - Delivered to Buyer', 'Shipped - Delivered to Buyer', 'Shipped', 'Pending'][1 + CAST(FLOOR(random() * 4) AS INTEGER)]
+            END as Status,
+            fulfilment as Fulfilment,
+            'Amazon.in' as "Sales Channel ",
+            CASE WHEN fulfilment = 'Amazon' THEN 'Expedited' ELSE 'Standard' END as "ship-service-level",
+            'SET' || (100 + CAST(FLOOR(POW(random(), {skew}) * 1300) AS INTEGER)) as Style,
+            'SKU' || (1000 + CAST(FLOOR(POW(random(), {skew}) * 7000) AS INTEGER)) as SKU,
+            category as Category,
+            {_sql_list(SIZES)}[1 + CAST(FLOOR(random() * {len(SIZES)}) AS INTEGER)] as Size,
+            'B0' || (10000000 + i % 7000) as ASIN,
+            CASE WHEN failure_draw < 0.06 THEN NULL ELSE 'Shipped' END as "Courier Status",
+            CASE WHEN random() < 0.95 THEN 1 ELSE 2 END as Qty,
+            'INR' as currency,
+            CASE WHEN random() < 0.06 THEN NULL ELSE ROUND(199 + POW(random(), 1.5) * 2400, 2) END as Amount,
+            {_skewed_pick(CITIES, skew)} as "ship-city",
+            state as "ship-state",
+            110000 + CAST(FLOOR(random() * 750000) AS INTEGER) as "ship-postal-code",
+            'IN' as "ship-country",
+            CASE WHEN random() < 0.4 THEN 'IN Core Free Shipping 2015/04/08 23-48-5-108' END as "promotion-ids",
+            random() < 0.01 as B2B,
+            CASE WHEN fulfilment = 'Amazon' THEN 'Easy Ship' END as "fulfilled-by"
+        FROM orders
+    ) TO '{output_path}' (HEADER, DELIMITER ',');
+    """)
+    con.close()
+    return output_path
+
+
+def _timed(timings, stage, func):
+    start = time.perf_counter()
+    result = func()
+    timings[stage] = time.perf_counter() - start
+    return result
+
+
+def benchmark_dataset(csv_path, work_dir):
+    """Time every pipeline stage on one dataset in the current process"""
+    from amazon_analysis_generator import AmazonAnalysisGenerator, peak_rss_mb
+
+    timings = {}
+    previous_dir = os.getcwd()
+    os.makedirs(work_dir, exist_ok=True)
+    os.chdir(work_dir)
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            analyzer = AmazonAnalysisGenerator(csv_path, cache_dir=None)
+            for stage in STAGES:
+                _timed(timings, stage, getattr(analyzer, STAGE_METHODS.get(stage, stage)))
+                if stage == 'load':
+                    rows = analyzer.con.execute("SELECT COUNT(*) FROM amazon_sales;").fetchone()[0]
+            analyzer.close_connection()
+    finally:
+        os.chdir(previous_dir)
+
+    return {
+        'rows': rows,
+        'timings': timings,
+        'total_seconds': sum(timings.values()),
+        # Rows of the dataset processed per second by each stage, for comparing sizes
+        'rows_per_second': {stage: rows / seconds if seconds else None for stage, seconds in timings.items()},
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def compare_to_baseline(report, baseline, threshold=REGRESSION_THRESHOLD):
+    """Return a list of (rows, stage, baseline_seconds, seconds) that slowed down beyond the threshold"""
+    regressions = []
+    for size, result in report['results'].items():
+        previous = baseline.get('results', {}).get(size)
+        if not previous:
+            continue
+        for stage, seconds in result['timings'].items():
+            before = previous['timings'].get(stage)
+            if before and seconds > before * (1 + threshold) and seconds - before > MIN_REGRESSION_SECONDS:
+                regressions.append((size, stage, before, seconds))
+    return regressions
+
+
+def run_benchmarks(sizes, data_dir, baseline_path=None, save_baseline=False, **generator_options):
+    """Generate each dataset size and benchmark it in a fresh process so peak memory is per size"""
+    os.makedirs(data_dir, exist_ok=True)
+    report = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': {}}
+
+    for rows in sizes:
+        csv_path = os.path.abspath(os.path.join(data_dir, f"synthetic_sales_{rows}.csv"))
+        if not os.path.exists(csv_path):
+            print(f"🧪 Generating {rows:,} synthetic rows...")
+            generate_synthetic_sales(csv_path, rows, **generator_options)
+
+        print(f"⏱️ Benchmarking {rows:,} rows...")
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(benchmark_dataset, csv_path, os.path.join(data_dir, f"output_{rows}")).result()
+        report['results'][str(rows)] = result
+
+        for stage in STAGES:
+            throughput = result['rows_per_second'][stage]
+            print(f"   {stage:<32} {result['timings'][stage]:>9.3f}s {throughput or 0:>16,.0f} rows/s")
+        print(f"   {'total':<32} {result['total_seconds']:>9.3f}s {result['rows'] / result['total_seconds']:>16,.0f} rows/s")
+        if result['peak_rss_mb'] is not None:
+            print(f"   Peak memory (RSS): {result['peak_rss_mb']:,.1f} MB")
+
+    if baseline_path and os.path.exists(baseline_path) and not save_baseline:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline)
+        report['regressions'] = [
+            {'rows': size, 'stage': stage, 'baseline_seconds': before, 'seconds': seconds}
+            for size, stage, before, seconds in regressions
+        ]
+        if regressions:
+            print(f"\n⚠️ {len(regressions)} stage(s) regressed by more than {REGRESSION_THRESHOLD:.0%}:")
+            for size, stage, before, seconds in regressions:
+                print(f"   {size} rows / {stage}: {before:.3f}s -> {seconds:.3f}s")
+        else:
+            print("\n✅ No regressions against baseline")
+
+    if baseline_path and save_baseline:
+        with open(baseline_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Saved baseline to {baseline_path}")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Amazon analysis pipeline on synthetic data')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='dataset sizes to generate and benchmark (10k to 100M)')
+    parser.add_argument('--data-dir', default='benchmark_data', help='where synthetic CSVs and outputs are written')
+    parser.add_argument('--baseline', default='benchmark_baseline.json', help='baseline report to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the new baseline')
+    parser.add_argument('--report', default='benchmark_report.json', help='where to write this run\'s report')
+    parser.add_argument('--merchant-failure-rate', type=float, default=0.1146)
+    parser.add_argument('--amazon-failure-rate', type=float, default=0.025)
+    parser.add_argument('--skew', type=float, default=2.5, help='power-law skew of state/category mixes')
+    parser.add_argument('--seed', type=float, default=0.42)
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        args.rows, args.data_dir, baseline_path=args.baseline, save_baseline=args.save_baseline,
+        seed=args.seed, merchant_failure_rate=args.merchant_failure_rate,
+        amazon_failure_rate=args.amazon_failure_rate, skew=args.skew
+    )
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Saved benchmark report to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Analysis Registry
+Declarative grouped-analysis definitions shared by the analysis scripts, and
+the SQL fragments they compile to with bound parameters
+"""
+
+# Order statuses counted as delivery failures
+FAILED_STATUSES = ['Cancelled', 'Undelivered', 'RTO', 'Lost']
+
+# Rows with no positive amount are excluded from every analysis
+MIN_AMOUNT = 0
+
+# The report's Date column is MM-DD-YY text unless the CSV reader already typed it
+DATE_FORMAT = '%m-%d-%y'
+
+# Aggregates available to every analysis, computed over the filtered base rows
+MEASURES = {
+    'total_orders': 'COUNT(*)',
+    'total_revenue': 'SUM(Amount)',
+    'avg_order_value': 'AVG(Amount)',
+    'failed_orders': 'COUNT(*) FILTER (WHERE is_failed)'
+}
+
+# Approximate mode: seeded Bernoulli sampling keeps sampled runs repeatable (and
+# cacheable), and every estimate is reported with a 95% normal-approximation margin
+SAMPLE_SEED = 42
+CONFIDENCE_Z = 1.96
+
+# Grouped analyses. Each entry names the dimension column, the result key it is
+# exposed under, the measures reported, optional equality filters on other
+# columns, and how groups are filtered, ranked and trimmed. Filtered analyses
+# share the fused scan by grouping out-of-scope rows under NULL, so their NULL
+# group is always dropped. Analyses with 'default': False only run when
+# requested explicitly.
+ANALYSIS_REGISTRY = {
+    'channel_analysis': {
+        'column': 'Fulfilment',
+        'label': 'fulfillment',
+        'fields': ['total_orders', 'total_revenue', 'revenue_percentage', 'failed_orders', 'failure_rate'],
+        'order_by': 'total_revenue'
+    },
+    'geographic_analysis': {
+        'column': '"ship-state"',
+        'label': 'state',
+        'fields': ['total_orders', 'total_revenue', 'failed_orders', 'failure_rate'],
+        'drop_null': True,
+        'min_orders': 100,  # Only states with significant volume
+        'order_by': 'failure_rate',
+        'limit': 10
+    },
+    'category_analysis': {
+        'column': 'Category',
+        'label': 'category',
+        'fields': ['total_orders', 'total_revenue', 'revenue_percentage', 'avg_order_value'],
+        'drop_null': True,
+        'order_by': 'total_revenue',
+        'limit': 10
+    },
+    'city_analysis': {
+        'column': '"ship-city"',
+        'label': 'city',
+        'title': 'Top 10 Cities by Failure Rate',
+        'fields': ['total_orders', 'total_revenue', 'failed_orders', 'failure_rate'],
+        'drop_null': True,
+        'min_orders': 100,
+        'order_by': 'failure_rate',
+        'limit': 10,
+        'default': False
+    },
+    'courier_analysis': {
+        'column': '"Courier Status"',
+        'label': 'courier_status',
+        'title': 'Merchant-Fulfilled Orders by Courier Status',
+        'fields': ['total_orders', 'total_revenue', 'revenue_percentage', 'failed_orders', 'failure_rate'],
+        'filters': {'Fulfilment': 'Merchant'},
+        'order_by': 'total_orders',
+        'default': False
+    }
+}
+
+
+# Drill-down hierarchies, coarsest level first. Each level names its source
+# column, the label it is exposed under and the minimum orders a group needs
+# to be ranked. Drill-downs rank any level from one leaf-level aggregate.
+DRILL_DOWNS = {
+    'geography': [
+        {'column': '"ship-state"', 'label': 'state', 'min_orders': 100},
+        {'column': '"ship-city"', 'label': 'city', 'min_orders': 50},
+        {'column': '"ship-postal-code"', 'label': 'postal_code', 'min_orders': 20}
+    ],
+    'product': [
+        {'column': 'Category', 'label': 'category', 'min_orders': 100},
+        {'column': 'SKU', 'label': 'sku', 'min_orders': 20}
+    ]
+}
+
+def placeholders(values):
+    return ', '.join('?' for _ in values)
+
+
+def failure_flag():
+    """Return (sql, params) for the boolean failed-order expression"""
+    return f"Status IN ({placeholders(FAILED_STATUSES)})", list(FAILED_STATUSES)
+
+
+def amount_filter():
+    """Return (sql, params) for the positive-amount row filter"""
+    return "Amount > ?", [MIN_AMOUNT]
+
+
+def filter_conditions(filters):
+    """Compile {column: value} equality filters into (conditions, params)"""
+    conditions = [f"{column} = ?" for column in filters]
+    return conditions, list(filters.values())
+
+
+def dimension_expression(spec):
+    """Return (sql, params) for an analysis's grouping key; rows outside its filters group under NULL"""
+    if not spec.get('filters'):
+        return spec['column'], []
+    conditions, params = filter_conditions(spec['filters'])
+    return f"CASE WHEN {' AND '.join(conditions)} THEN {spec['column']} END", params
+
+
+def order_date():
+    """Return (sql, params) for the order date as a DATE"""
+    return "COALESCE(TRY_CAST(Date AS DATE), CAST(TRY_STRPTIME(CAST(Date AS VARCHAR), ?) AS DATE))", [DATE_FORMAT]
+
+
+def sample_clause(percent):
+    """Return the TABLESAMPLE clause drawing a seeded Bernoulli sample of percent% of rows"""
+    percent = float(percent)
+    if not 0 < percent <= 100:
+        raise ValueError(f"sample percent must be in (0, 100], got {percent}")
+    # DuckDB only accepts constants in sample clauses, so the validated float is inlined
+    return f"TABLESAMPLE {percent!r} PERCENT (bernoulli, {SAMPLE_SEED})"
+
+
+def sampled_measures(fraction):
+    """Return {name: sql} estimating MEASURES from a Bernoulli sample, plus a <name>_margin per estimate
+
+    Totals are Horvitz-Thompson estimates (sample sums scaled by 1 / fraction);
+    margins are 95% half-widths from the estimators' sampling variance.
+    """
+    p = float(fraction)
+    return {
+        'total_orders': f"ROUND(COUNT(*) / {p!r})::BIGINT",
+        'total_revenue': f"SUM(Amount) / {p!r}",
+        'avg_order_value': 'AVG(Amount)',
+        'failed_orders': f"ROUND(COUNT(*) FILTER (WHERE is_failed) / {p!r})::BIGINT",
+        'sample_orders': 'COUNT(*)',
+        'total_orders_margin': f"{CONFIDENCE_Z} * SQRT(COUNT(*) * {1 - p!r}) / {p!r}",
+        'total_revenue_margin': f"{CONFIDENCE_Z} * SQRT({1 - p!r} * SUM(Amount * Amount)) / {p!r}",
+        'avg_order_value_margin': f"{CONFIDENCE_Z} * STDDEV_SAMP(Amount) / SQRT(COUNT(*))",
+        'failed_orders_margin': f"{CONFIDENCE_Z} * SQRT(COUNT(*) FILTER (WHERE is_failed) * {1 - p!r}) / {p!r}"
+    }
+
+
+def failure_rate_margin(failed, total, sample_size):
+    """Return the 95% margin, in percentage points, of a failure rate estimated from sample_size rows"""
+    rate = f"({failed} / {total})"
+    return f"ROUND(100.0 * {CONFIDENCE_Z} * SQRT({rate} * (1 - {rate}) / {sample_size}), 2)"
+
+
+def revenue_share(revenue, grand_total):
+    return f"ROUND(100.0 * {revenue} / {grand_total}, 2)"
+
+
+def failure_rate(failed, total):
+    return f"ROUND(100.0 * {failed} / {total}, 2)"
+
+
+def compile_analysis_query(spec, min_orders=None, limit=None, table='amazon_sales'):
+    """Compile one analysis into a standalone (sql, params) query returning its ranked groups"""
+    label = spec['label']
+    failed_sql, failed_params = failure_flag()
+    amount_sql, amount_params = amount_filter()
+    dimension_sql, dimension_params = dimension_expression(spec)
+    min_orders = spec.get('min_orders') if min_orders is None else min_orders
+    limit = spec.get('limit') if limit is None else limit
+
+    measures = ',\n                '.join(f"{sql} as {name}" for name, sql in MEASURES.items())
+    # Groups are trimmed after the revenue-share window so shares stay relative to all rows
+    qualify = []
+    params = dimension_params + failed_params + amount_params
+    if spec.get('drop_null') or spec.get('filters'):
+        qualify.append(f"{label} IS NOT NULL")
+    if min_orders:
+        qualify.append("total_orders >= ?")
+        params.append(min_orders)
+
+    sql = f"""
+        WITH base AS (
+            SELECT
+                {dimension_sql} AS {label},
+                Amount,
+                {failed_sql} as is_failed
+            FROM {table}
+            WHERE {amount_sql}
+        ),
+        grouped AS (
+            SELECT
+                {label},
+                {measures}
+            FROM base
+            GROUP BY {label}
+        )
+        SELECT
+            {label},
+            {', '.join(spec['fields'])}
+        FROM (
+            SELECT
+                *,
+                {revenue_share('total_revenue', 'SUM(total_revenue) OVER ()')} as revenue_percentage,
+                {failure_rate('failed_orders', 'total_orders')} as failure_rate
+            FROM grouped
+            {'QUALIFY ' + ' AND '.join(qualify) if qualify else ''}
+        )
+        ORDER BY {spec['order_by']} DESC NULLS LAST
+        """
+    if limit:
+        sql += "LIMIT ?"
+        params.append(limit)
+    return sql, params
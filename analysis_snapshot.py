@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Analysis Snapshots
+Stores the loaded sales table and the computed result tables as uncompressed
+Arrow IPC files with dictionary-encoded categoricals, so later runs and other
+processes memory-map them instead of parsing and aggregating the source again
+"""
+
+import hashlib
+import json
+import os
+import time
+
+SNAPSHOT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+# Low-cardinality text columns stored once per distinct value
+DICTIONARY_COLUMNS = ['Status', 'Fulfilment', 'ship-state', 'Category']
+
+# Rows per record batch streamed from DuckDB into the snapshot, one DuckDB row group
+SNAPSHOT_BATCH_ROWS = 122880
+
+
+def query_digest(sql, params):
+    """Return a short hash identifying the query that produced an aggregate"""
+    from query_result_cache import normalize_sql
+
+    payload = json.dumps([normalize_sql(sql), params], default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class DictionaryEncoder:
+    """Dictionary-encodes string columns batch by batch against dictionaries that only grow
+
+    The IPC file format allows one dictionary per column plus deltas appended
+    to it, so each batch's dictionary extends the previous one.
+    """
+
+    def __init__(self, schema, columns=DICTIONARY_COLUMNS):
+        import pyarrow as pa
+
+        self.columns = [
+            name for name in columns
+            if name in schema.names and (pa.types.is_string(schema.field(name).type)
+                                         or pa.types.is_large_string(schema.field(name).type))
+        ]
+        self.dictionaries = {name: pa.array([], schema.field(name).type) for name in self.columns}
+        self.schema = schema
+        for name in self.columns:
+            index = schema.get_field_index(name)
+            self.schema = self.schema.set(index, schema.field(index).with_type(pa.dictionary(pa.int32(), schema.field(index).type)))
+
+    def encode(self, batch):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        columns = list(batch.columns)
+        for name in self.columns:
+            index = batch.schema.get_field_index(name)
+            values = batch.column(index)
+            dictionary = self.dictionaries[name]
+            distinct = pc.unique(values.drop_null())
+            new_values = distinct.filter(pc.invert(pc.is_in(distinct, value_set=dictionary)))
+            if len(new_values):
+                dictionary = self.dictionaries[name] = pa.concat_arrays([dictionary, new_values])
+            columns[index] = pa.DictionaryArray.from_arrays(pc.index_in(values, value_set=dictionary), dictionary)
+        return pa.record_batch(columns, schema=self.schema)
+
+
+def write_arrow(path, reader):
+    """Stream a RecordBatchReader into an uncompressed Arrow IPC file atomically; returns the row count
+
+    Uncompressed files can be memory-mapped as written. DICTIONARY_COLUMNS are dictionary-encoded.
+    """
+    import pyarrow as pa
+
+    encoder = DictionaryEncoder(reader.schema)
+    options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+    rows = 0
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with pa.OSFile(tmp_path, 'wb') as f:
+            with pa.ipc.new_file(f, encoder.schema, options=options) as writer:
+                for batch in reader:
+                    writer.write_batch(encoder.encode(batch))
+                    rows += batch.num_rows
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return rows
+
+
+def read_arrow(path):
+    """Memory-map an Arrow IPC file; the table's buffers point into the shared page cache"""
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+class AnalysisSnapshot:
+    """A directory holding one dataset's table and result tables, valid for one source fingerprint"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, MANIFEST_FILE)
+        self.manifest = None
+        self.table = None
+        self.aggregates = {}
+
+    def read_manifest(self, fingerprint):
+        """Return the manifest if the snapshot was written from data with this fingerprint, else None"""
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('version') != SNAPSHOT_VERSION or manifest.get('fingerprint') != fingerprint:
+            return None
+        return manifest
+
+    def open(self, fingerprint):
+        """Memory-map the table and aggregates; returns False when there is no current snapshot"""
+        self.manifest = self.table = None
+        self.aggregates = {}
+        manifest = self.read_manifest(fingerprint)
+        if not manifest:
+            return False
+        try:
+            self.table = read_arrow(os.path.join(self.directory, manifest['table']))
+            self.aggregates = {
+                name: read_arrow(os.path.join(self.directory, entry['file']))
+                for name, entry in manifest['aggregates'].items()
+            }
+        except (OSError, ValueError):  # removed, or truncated (pyarrow.ArrowInvalid)
+            self.table = None
+            self.aggregates = {}
+            return False
+        self.manifest = manifest
+        return True
+
+    def aggregate(self, name, digest):
+        """Return a stored aggregate if it was computed by the query with this digest, else None"""
+        entry = self.manifest['aggregates'].get(name) if self.manifest else None
+        if entry and entry.get('query') == digest:
+            return self.aggregates[name]
+        return None
+
+    def write_table(self, reader, fingerprint):
+        """Store the loaded rows from a RecordBatchReader, replacing any snapshot of other data, and open it"""
+        os.makedirs(self.directory, exist_ok=True)
+        # Files are named by fingerprint, so processes still mapping a replaced snapshot keep reading it intact
+        name = f"amazon_sales-{fingerprint[:16]}.arrow"
+        rows = write_arrow(os.path.join(self.directory, name), reader)
+        self._save_manifest({
+            'version': SNAPSHOT_VERSION,
+            'fingerprint': fingerprint,
+            'created_at': time.time(),
+            'rows': rows,
+            'table': name,
+            'dictionary_columns': [column for column in DICTIONARY_COLUMNS if column in reader.schema.names],
+            'aggregates': {}
+        })
+        self._remove_unreferenced()
+        return self.open(fingerprint)
+
+    def write_aggregates(self, tables, digests):
+        """Add result tables to the open snapshot, each tagged with the digest of its query if known"""
+        if not self.manifest:
+            return False
+        suffix = self.manifest['fingerprint'][:16]
+        aggregates = {}
+        for name, table in tables.items():
+            file_name = f"{name}-{suffix}.arrow"
+            write_arrow(os.path.join(self.directory, file_name), table.to_reader())
+            aggregates[name] = {'file': file_name, 'rows': table.num_rows, 'query': digests.get(name)}
+        self._save_manifest(dict(self.manifest, aggregates=aggregates))
+        self._remove_unreferenced()
+        return self.open(self.manifest['fingerprint'])
+
+    def size_bytes(self):
+        """Return the size of the files the manifest references"""
+        if not self.manifest:
+            return 0
+        files = [self.manifest['table']] + [entry['file'] for entry in self.manifest['aggregates'].values()]
+        return sum(os.path.getsize(os.path.join(self.directory, name)) for name in files)
+
+    def _save_manifest(self, manifest):
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        self.manifest = manifest
+
+    def _remove_unreferenced(self):
+        """Delete Arrow files from earlier snapshots; open mappings of them stay readable until closed"""
+        referenced = {self.manifest['table']} | {entry['file'] for entry in self.manifest['aggregates'].values()}
+        for name in os.listdir(self.directory):
+            if name.endswith('.arrow') and name not in referenced:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass  # still mapped where the platform forbids deleting open files
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Amazon Analytics Service
+Keeps one warm in-process DuckDB database loaded with the sales data and serves
+the registered analyses and the e-commerce table over a local HTTP/JSON API
+"""
+
+import contextlib
+import json
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from amazon_analysis_generator import AmazonAnalysisGenerator
+from analysis_registry import ANALYSIS_REGISTRY, DRILL_DOWNS, compile_analysis_query
+from ecommerce_table import EcommerceTableIndex
+from query_result_cache import dataset_fingerprint
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 4213
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_POLL_SECONDS = 5.0
+
+# /ecommerce/orders parameters that page and sort rather than filter
+PAGE_PARAMS = ['page', 'page_size', 'sort', 'desc']
+
+# An entity tag in an If-None-Match list, optionally weak, or the '*' wildcard
+ENTITY_TAG = re.compile(r'(?:W/)?("[^"]*")|\*')
+
+
+def etag_matches(header, etag):
+    """Return True when an If-None-Match header lists etag or '*', comparing weakly as RFC 9110 requires"""
+    for match in ENTITY_TAG.finditer(header or ''):
+        if match.group(0) == '*' or match.group(1) == etag:
+            return True
+    return False
+
+
+class AnalyticsService:
+    """Owns the warm database and reloads it whenever the source data changes"""
+
+    def __init__(self, csv_file_path, cache_dir='.duckdb_cache', poll_seconds=DEFAULT_POLL_SECONDS,
+                 ecommerce_csv_path=None, snapshot_dir=None):
+        # Either dataset may be omitted; the service serves whichever is configured
+        # With a snapshot, every service process maps the same sales table instead of loading its own copy
+        self.generator = AmazonAnalysisGenerator(csv_file_path, cache_dir=cache_dir,
+                                                 snapshot_dir=snapshot_dir) if csv_file_path else None
+        self.ecommerce = EcommerceTableIndex(ecommerce_csv_path, cache_dir) if ecommerce_csv_path else None
+        self.poll_seconds = poll_seconds
+        self.con = None
+        self.fingerprint = None
+        self.loaded_at = None
+        self.row_count = None
+        self.ecommerce_row_count = None
+        self.error = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    @property
+    def ready(self):
+        return self.loaded_at is not None
+
+    def start(self):
+        """Load the data in the background, then keep watching the source for changes"""
+        self._watcher = threading.Thread(target=self._load_and_watch, name='source-watcher', daemon=True)
+        self._watcher.start()
+
+    def _load_and_watch(self):
+        try:
+            if self.generator:
+                fingerprint = dataset_fingerprint(self.generator.source_files())
+                if not self.generator.connect_to_duckdb():
+                    raise RuntimeError('the sales data could not be loaded')
+                self.con = self.generator.con
+                self._mark_loaded(fingerprint)
+            else:
+                import duckdb
+                self.con = duckdb.connect(database=':memory:')
+            if self.ecommerce:
+                self.ecommerce_row_count = self.ecommerce.load(self.con)
+            self.loaded_at = time.time()
+        except Exception as e:
+            self.error = str(e)
+            return
+        self._watch()
+
+    def _mark_loaded(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.row_count = self.con.execute("SELECT COUNT(*) FROM amazon_sales;").fetchone()[0]
+        # Drill-down aggregates are rebuilt from the new table on their next request
+        for index in self.generator.drill_indexes.values():
+            index.invalidate()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                print(f"❌ Error reloading data: {e}")
+
+    def reload_if_changed(self):
+        """Reload any table whose source changed; returns True if something was reloaded"""
+        reloaded = False
+        with self._reload_lock:
+            # CREATE OR REPLACE swaps tables atomically, so in-flight queries finish on the old data
+            if self.generator:
+                fingerprint = dataset_fingerprint(self.generator.source_files())
+                if fingerprint != self.fingerprint:
+                    self.generator.load_data()
+                    self._mark_loaded(fingerprint)
+                    self.loaded_at = time.time()
+                    print(f"♻️ Reloaded {self.row_count:,} rows after the source changed")
+                    reloaded = True
+            if self.ecommerce and self.ecommerce.is_stale():
+                self.ecommerce_row_count = self.ecommerce.load(self.con)
+                self.loaded_at = time.time()
+                print(f"♻️ Reloaded {self.ecommerce_row_count:,} e-commerce rows after the source changed")
+                reloaded = True
+        return reloaded
+
+    @contextlib.contextmanager
+    def cursor(self):
+        """Yield a cursor of its own to the warm database"""
+        cursor = self.generator.cursor() if self.generator else self.con.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+    def query(self, sql, params):
+        """Run a query on its own cursor and return the rows as dicts"""
+        with self.cursor() as cursor:
+            result = cursor.execute(sql, params)
+            columns = [desc[0] for desc in result.description]
+            return [dict(zip(columns, row)) for row in result.fetchall()]
+
+    def status(self):
+        return {
+            'ready': self.ready,
+            'rows': self.row_count,
+            'ecommerce_rows': self.ecommerce_row_count,
+            'loaded_at': self.loaded_at,
+            'fingerprint': self.fingerprint,
+            'error': self.error
+        }
+
+    def summary(self):
+        stored = self.generator.stored_aggregate('summary')
+        if stored is not None:
+            return stored.to_pylist()[0]
+        sql, params, _ = self.generator.compile_fused_query(['summary'])
+        row = self.query(sql, params)[0]
+        return {
+            'total_records': row['total_orders'],
+            'unique_orders': row['unique_orders'],
+            'unique_categories': row['unique_categories'],
+            'unique_states': row['unique_states'],
+            'total_revenue': row['total_revenue'],
+            'avg_order_value': row['avg_order_value']
+        }
+
+    def analysis(self, key, min_orders=None, limit=None):
+        sql, params = compile_analysis_query(ANALYSIS_REGISTRY[key], min_orders=min_orders, limit=limit)
+        return self.query(sql, params)
+
+    def drill_down(self, name, level, parent=None, order_by='failure_rate', limit=10, min_orders=None):
+        index = self.generator.drill_index(name)
+        sql, params = index.compile_top_k(level, parent, order_by, limit, min_orders)
+        with self.cursor() as cursor:
+            index.ensure_built(cursor)
+            result = cursor.execute(sql, params)
+            columns = [desc[0] for desc in result.description]
+            return [dict(zip(columns, row)) for row in result.fetchall()]
+
+    def ecommerce_page(self, request):
+        with self.cursor() as cursor:
+            return self.ecommerce.page(cursor, request)
+
+    def ecommerce_facets(self):
+        with self.cursor() as cursor:
+            return self.ecommerce.facets(cursor)
+
+    def stop(self):
+        self._stop.set()
+        if self.con:
+            self.con.close()
+            print("✅ Closed DuckDB connection")
+
+
+class AnalyticsRequestHandler(BaseHTTPRequestHandler):
+    """Routes GET requests to the service on the server's worker pool"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        query = parse_qs(url.query)
+        service = self.server.service
+
+        try:
+            if parts == ['health']:
+                return self._send_json(200, {'status': 'ok'})
+            if parts == ['ready']:
+                return self._send_json(200 if service.ready else 503, service.status())
+            if not service.ready:
+                return self._send_json(503, {'error': service.error or 'data is still loading'})
+
+            if parts[:1] == ['ecommerce'] and service.ecommerce:
+                return self._ecommerce(parts[1:], query)
+            if parts[:1] in (['analyses'], ['drill']) and not service.generator:
+                return self._send_json(404, {'error': 'no sales data is configured'})
+
+            if parts == ['analyses']:
+                return self._send_json(200, {
+                    'analyses': ['summary'] + list(ANALYSIS_REGISTRY),
+                    'drill_downs': {name: [level['label'] for level in levels] for name, levels in DRILL_DOWNS.items()}
+                })
+            if parts == ['analyses', 'summary']:
+                return self._send_json(200, service.summary())
+            if len(parts) == 2 and parts[0] == 'analyses' and parts[1] in ANALYSIS_REGISTRY:
+                options = {name: self._int_param(query, name) for name in ('min_orders', 'limit')}
+                return self._send_json(200, {'rows': service.analysis(parts[1], **options)})
+            if len(parts) == 3 and parts[0] == 'drill' and parts[1] in DRILL_DOWNS:
+                rows = service.drill_down(
+                    parts[1], parts[2], parent=query.get('parent', []),
+                    order_by=query.get('order_by', ['failure_rate'])[0],
+                    limit=self._int_param(query, 'limit', 10),
+                    min_orders=self._int_param(query, 'min_orders')
+                )
+                return self._send_json(200, {'rows': rows})
+
+            self._send_json(404, {'error': f"unknown endpoint {url.path}"})
+
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+
+    def _ecommerce(self, parts, query):
+        """Serve /ecommerce/facets and paged, sorted, filtered /ecommerce/orders, honouring If-None-Match"""
+        service = self.server.service
+        if parts == ['facets']:
+            request = 'facets'
+        elif parts == ['orders']:
+            request = service.ecommerce.normalize_request(
+                page=self._int_param(query, 'page', 1),
+                page_size=self._int_param(query, 'page_size', 20),
+                sort=query.get('sort', [None])[0],
+                descending=query.get('desc', ['0'])[0] in ('1', 'true'),
+                # Every other parameter is a filter, so misspelt or missing columns are rejected
+                filters={name: values for name, values in query.items() if name not in PAGE_PARAMS}
+            )
+        else:
+            return self._send_json(404, {'error': f"unknown endpoint {self.path}"})
+
+        etag = service.ecommerce.etag(request)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            return self._send_json(304, None, headers)
+        payload = service.ecommerce_facets() if request == 'facets' else service.ecommerce_page(request)
+        self._send_json(200, payload, headers)
+
+    def _int_param(self, query, name, default=None):
+        values = query.get(name)
+        if not values:
+            return default
+        try:
+            return int(values[0])
+        except ValueError:
+            raise ValueError(f"{name} must be an integer")
+
+    def _send_json(self, status, payload, headers=None):
+        # 304 responses carry no body
+        body = json.dumps(payload, default=str).encode('utf-8') if status != 304 else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        # The portfolio page is served from a different origin than the local API
+        self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTP server that handles requests on a bounded thread pool and sheds load when it is full"""
+
+    def __init__(self, address, service, max_workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE):
+        super().__init__(address, AnalyticsRequestHandler)
+        self.service = service
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analytics')
+        self._slots = threading.BoundedSemaphore(max_workers + queue_size)
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nRetry-After: 1\r\n\r\n")
+            self.shutdown_request(request)
+            return
+        self._executor.submit(self._process_pooled, request, client_address)
+
+    def _process_pooled(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+def wait_until_ready(base_url, timeout=300.0, interval=0.1):
+    """Poll /ready until the service is serving; returns (ready, status) where status is the last /ready payload"""
+    deadline = time.monotonic() + timeout
+    status = None
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/ready", timeout=5) as response:
+                return True, json.load(response)
+        except urllib.error.HTTPError as e:
+            status = json.load(e)  # 503 while the data is loading
+            if status.get('error'):
+                return False, status
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(interval)
+    return False, status
+
+
+def start_service(csv_file_path, host=DEFAULT_HOST, port=DEFAULT_PORT, cache_dir='.duckdb_cache',
+                  max_workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE, poll_seconds=DEFAULT_POLL_SECONDS,
+                  ecommerce_csv_path=None, snapshot_dir=None):
+    """Serve on a background thread while the data loads; returns (service, server)"""
+    service = AnalyticsService(csv_file_path, cache_dir=cache_dir, poll_seconds=poll_seconds,
+                               ecommerce_csv_path=ecommerce_csv_path, snapshot_dir=snapshot_dir)
+    server = PooledHTTPServer((host, port), service, max_workers=max_workers, queue_size=queue_size)
+    threading.Thread(target=server.serve_forever, name='analytics-http', daemon=True).start()
+    service.start()
+    return service, server
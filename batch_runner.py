@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Batch Analysis Runner
+Runs the full Amazon analysis pipeline for every dataset in a manifest, one
+process per dataset, with per-dataset output directories and a cross-seller rollup
+"""
+
+import argparse
+import contextlib
+import glob
+import json
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from amazon_analysis_generator import AmazonAnalysisGenerator, json_default
+from analysis_registry import ANALYSIS_REGISTRY
+from query_result_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_OUTPUT_ROOT = 'batch_results'
+ROLLUP_FILE = 'batch_rollup.json'
+
+# Share of physical memory split between workers when no per-worker limit is given
+MEMORY_FRACTION = 0.75
+
+# category_analysis keeps each dataset's top 10, so the rollup sums an untrimmed copy computed in the same scan
+CATEGORY_TOTALS = dict(ANALYSIS_REGISTRY['category_analysis'], limit=None, title='All Categories',
+                       fields=['total_orders', 'total_revenue', 'failed_orders', 'failure_rate'])
+
+# Results each worker hands back for the rollup; everything else stays in its output directory
+ROLLUP_KEYS = ['summary', 'channel_analysis', 'category_analysis', 'category_totals', 'geographic_analysis']
+
+
+def load_manifest(manifest_path):
+    """Return [{'name', 'csv'}, ...] from a JSON list of paths or objects, optionally under 'datasets'
+
+    Relative CSV paths are resolved against the manifest's directory and names
+    are made unique and safe to use as directory names.
+    """
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    entries = manifest['datasets'] if isinstance(manifest, dict) else manifest
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    datasets = []
+    names = set()
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {'csv': entry}
+        if 'csv' not in entry:
+            raise ValueError(f"manifest entry without a 'csv' path: {entry}")
+        csv_file_path = os.path.join(base_dir, entry['csv'])
+        name = entry.get('name') or os.path.splitext(os.path.basename(entry['csv'].rstrip('/\\')))[0]
+        name = re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('._') or 'dataset'
+        unique = name
+        suffix = 2
+        while unique in names:
+            unique = f"{name}-{suffix}"
+            suffix += 1
+        names.add(unique)
+        datasets.append({'name': unique, 'csv': csv_file_path})
+    return datasets
+
+
+def physical_memory_bytes():
+    """Return total physical memory, or None where os.sysconf can't tell (e.g. Windows)"""
+    try:
+        return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def worker_limits(workers, memory_limit=None):
+    """Return (threads, memory_limit) per worker so the pool never oversubscribes cores or memory"""
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    if memory_limit is None:
+        total = physical_memory_bytes()
+        if total:
+            memory_limit = f"{max(256, int(total * MEMORY_FRACTION / workers / (1024 * 1024)))}MB"
+    return threads, memory_limit
+
+
+def run_dataset(job):
+    """Run one dataset's full pipeline in a worker process, logging to its output directory"""
+    started = time.perf_counter()
+    os.makedirs(job['output_dir'], exist_ok=True)
+    log_path = os.path.join(job['output_dir'], 'analysis.log')
+    outcome = {'name': job['name'], 'csv': job['csv'], 'output_dir': job['output_dir'], 'log': log_path}
+
+    try:
+        with open(log_path, 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+            analyzer = AmazonAnalysisGenerator(
+                job['csv'],
+                cache_dir=job['cache_dir'],
+                memory_limit=job['memory_limit'],
+                threads=job['threads'],
+                # Spill files stay with the dataset instead of sharing DuckDB's default directory
+                temp_directory=os.path.join(job['output_dir'], '.duckdb_tmp'),
+                chart_format=job['chart_format'],
+                result_cache_dir=job['result_cache_dir'],
+                export_dir=job['export_dir'],
+                output_dir=job['output_dir']
+            )
+            analyzer.register_analysis('category_totals', CATEGORY_TOTALS)
+            completed = analyzer.run_full_analysis()
+        results = {key: analyzer.results.get(key) for key in ROLLUP_KEYS}
+        if not completed or not results['summary']:
+            outcome['error'] = f"analysis did not complete; see {log_path}"
+        outcome['results'] = results
+    except Exception as e:
+        outcome['error'] = str(e)
+
+    outcome['ok'] = 'error' not in outcome
+    outcome['seconds'] = round(time.perf_counter() - started, 2)
+    return outcome
+
+
+def build_rollup(outcomes):
+    """Combine per-dataset results into seller, channel and category rollups"""
+    sellers = []
+    channels = {}
+    categories = {}
+    for outcome in outcomes:
+        if not outcome['ok']:
+            continue
+        results = outcome['results']
+        summary = results['summary']
+        channel_rows = results['channel_analysis'] or []
+        orders = sum(row['total_orders'] for row in channel_rows)
+        failed = sum(row['failed_orders'] for row in channel_rows)
+        top_category = (results['category_analysis'] or [{}])[0]
+        worst_state = (results['geographic_analysis'] or [{}])[0]
+        sellers.append({
+            'name': outcome['name'],
+            'total_records': summary['total_records'],
+            'unique_orders': summary['unique_orders'],
+            'total_revenue': summary['total_revenue'],
+            'avg_order_value': summary['avg_order_value'],
+            'failed_orders': failed,
+            'failure_rate': round(100.0 * failed / orders, 2) if orders else None,
+            'top_category': top_category.get('category'),
+            'worst_state': worst_state.get('state'),
+            'worst_state_failure_rate': worst_state.get('failure_rate')
+        })
+        for row in channel_rows:
+            totals = channels.setdefault(row['fulfillment'], {'total_orders': 0, 'total_revenue': 0.0, 'failed_orders': 0})
+            totals['total_orders'] += row['total_orders']
+            totals['total_revenue'] += row['total_revenue']
+            totals['failed_orders'] += row['failed_orders']
+        for row in results['category_totals'] or []:
+            totals = categories.setdefault(row['category'], {'total_orders': 0, 'total_revenue': 0.0, 'sellers': 0})
+            totals['total_orders'] += row['total_orders']
+            totals['total_revenue'] += row['total_revenue']
+            totals['sellers'] += 1
+
+    grand_total = sum(seller['total_revenue'] for seller in sellers)
+
+    def share(revenue):
+        return round(100.0 * revenue / grand_total, 2) if grand_total else None
+
+    for seller in sellers:
+        seller['revenue_percentage'] = share(seller['total_revenue'])
+    return {
+        'datasets': len(outcomes),
+        'succeeded': len(sellers),
+        'total_revenue': grand_total,
+        'sellers': sorted(sellers, key=lambda seller: seller['total_revenue'], reverse=True),
+        'channels': sorted(
+            [{'fulfillment': name, **totals, 'revenue_percentage': share(totals['total_revenue']),
+              'failure_rate': round(100.0 * totals['failed_orders'] / totals['total_orders'], 2) if totals['total_orders'] else None}
+             for name, totals in channels.items()],
+            key=lambda row: row['total_revenue'], reverse=True
+        ),
+        'categories': sorted(
+            [{'category': name, **totals, 'revenue_percentage': share(totals['total_revenue'])}
+             for name, totals in categories.items()],
+            key=lambda row: row['total_revenue'], reverse=True
+        ),
+        'failed': [{'name': outcome['name'], 'error': outcome['error'], 'log': outcome['log']}
+                   for outcome in outcomes if not outcome['ok']]
+    }
+
+
+def run_batch(datasets, output_root=DEFAULT_OUTPUT_ROOT, workers=None, memory_limit=None,
+              cache_dir='.duckdb_cache', result_cache_dir=DEFAULT_CACHE_DIR, chart_format='json', export=True):
+    """Analyze every dataset in a process pool and write the rollup; returns the rollup"""
+    workers = max(1, min(workers or os.cpu_count() or 1, len(datasets)))
+    threads, memory_limit = worker_limits(workers, memory_limit)
+    print(f"🚀 Analyzing {len(datasets)} datasets with {workers} workers "
+          f"({threads} DuckDB thread(s), {memory_limit or 'default'} memory each)")
+
+    jobs = [{
+        'name': dataset['name'],
+        'csv': dataset['csv'],
+        'output_dir': os.path.join(output_root, dataset['name']),
+        'threads': threads,
+        'memory_limit': memory_limit,
+        'cache_dir': cache_dir,
+        'result_cache_dir': result_cache_dir,
+        'chart_format': chart_format,
+        'export_dir': 'tables' if export else None
+    } for dataset in datasets]
+
+    outcomes = []
+    # spawn gives every worker a fresh interpreter, so no DuckDB state is inherited across a fork
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {pool.submit(run_dataset, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:  # the worker process died, e.g. killed for memory
+                outcome = {'name': job['name'], 'csv': job['csv'], 'output_dir': job['output_dir'],
+                           'log': os.path.join(job['output_dir'], 'analysis.log'), 'ok': False, 'error': repr(e)}
+            outcomes.append(outcome)
+            if outcome['ok']:
+                print(f"✅ {outcome['name']}: done in {outcome['seconds']:.1f}s -> {outcome['output_dir']}")
+            else:
+                print(f"❌ {outcome['name']}: {outcome['error']}")
+
+    order = {dataset['name']: index for index, dataset in enumerate(datasets)}
+    outcomes.sort(key=lambda outcome: order[outcome['name']])
+    rollup = build_rollup(outcomes)
+
+    os.makedirs(output_root, exist_ok=True)
+    rollup_path = os.path.join(output_root, ROLLUP_FILE)
+    with open(rollup_path, 'w') as f:
+        json.dump(rollup, f, indent=2, default=json_default)
+    print_rollup(rollup)
+    print(f"\n✅ Saved cross-seller rollup to {rollup_path}")
+    return rollup
+
+
+def print_rollup(rollup):
+    print(f"\n📊 Cross-Seller Rollup ({rollup['succeeded']} of {rollup['datasets']} datasets, "
+          f"₹{rollup['total_revenue']:,.2f} revenue):")
+    for seller in rollup['sellers']:
+        print(f"   {seller['name']}: ₹{seller['total_revenue']:,.2f} ({seller['revenue_percentage']}%), "
+              f"{seller['failure_rate']}% failure rate, top category {seller['top_category']}, "
+              f"worst state {seller['worst_state']}")
+
+    print("\n🚚 Channels Across Sellers:")
+    for channel in rollup['channels']:
+        print(f"   {channel['fulfillment']}: {channel['revenue_percentage']}% revenue, {channel['failure_rate']}% failure rate")
+
+    print("\n📦 Top Categories Across Sellers:")
+    for category in rollup['categories'][:5]:
+        print(f"   {category['category']}: {category['revenue_percentage']}% revenue across {category['sellers']} seller(s)")
+
+    for failure in rollup['failed']:
+        print(f"❌ {failure['name']} failed: {failure['error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the Amazon analysis for every dataset in a manifest')
+    parser.add_argument('manifest', help='JSON list of CSV paths or {"name", "csv"} objects')
+    parser.add_argument('--output-root', default=DEFAULT_OUTPUT_ROOT, help='one subdirectory per dataset is written here')
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per core, at most one per dataset)')
+    parser.add_argument('--worker-memory-limit', help="DuckDB memory ceiling per worker, e.g. '2GB' (default: a share of RAM)")
+    parser.add_argument('--cache-dir', default='.duckdb_cache', help='Parquet cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='parse each CSV directly')
+    parser.add_argument('--result-cache-dir', default=DEFAULT_CACHE_DIR, help='query result cache directory')
+    parser.add_argument('--no-result-cache', action='store_true', help='always run queries against the data')
+    parser.add_argument('--chart-format', choices=['html', 'dashboard', 'json'], default='json')
+    parser.add_argument('--no-export', action='store_true', help='write only JSON results per dataset')
+    args = parser.parse_args(argv)
+
+    try:
+        datasets = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error reading manifest {args.manifest}: {e}")
+        return
+    missing = [dataset['csv'] for dataset in datasets
+               if not glob.has_magic(dataset['csv']) and not os.path.exists(dataset['csv'])]
+    for path in missing:
+        print(f"❌ CSV file not found at: {path}")
+    datasets = [dataset for dataset in datasets if dataset['csv'] not in missing]
+    if not datasets:
+        print("❌ No datasets to analyze")
+        return
+
+    run_batch(
+        datasets,
+        output_root=args.output_root,
+        workers=args.workers,
+        memory_limit=args.worker_memory_limit,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        result_cache_dir=None if args.no_result_cache else args.result_cache_dir,
+        chart_format=args.chart_format,
+        export=not args.no_export
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+CSV to Parquet Cache
+Converts source CSV files to Parquet once and reuses them until the source changes
+"""
+
+import hashlib
+import json
+import os
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def content_hash(file_path):
+    """Return the SHA-256 of a file, read in fixed-size chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_entry_base(csv_file_path, cache_dir):
+    """Return the extension-less cache path derived from a source CSV's absolute path"""
+    source = os.path.abspath(csv_file_path)
+    name = os.path.splitext(os.path.basename(source))[0].replace(' ', '_')
+    key = hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{name}-{key}")
+
+
+def cache_entry_paths(csv_file_path, cache_dir):
+    """Return the Parquet and manifest paths for a source CSV"""
+    base = cache_entry_base(csv_file_path, cache_dir)
+    return base + '.parquet', base + '.json'
+
+
+def _load_manifest(manifest_path):
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(manifest_path, manifest):
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def is_cache_valid(csv_file_path, parquet_path, manifest_path, schema=None):
+    """Check a cache entry against the source's size, mtime and content hash, and the schema it was read with"""
+    manifest = _load_manifest(manifest_path)
+    if not manifest or not os.path.exists(parquet_path):
+        return False
+    if manifest.get('schema') != schema:
+        return False
+
+    stat = os.stat(csv_file_path)
+    if manifest['size'] != stat.st_size:
+        return False
+    if manifest['mtime_ns'] == stat.st_mtime_ns:
+        return True
+
+    # Same size but touched: only a content change invalidates the entry
+    if manifest['sha256'] != content_hash(csv_file_path):
+        return False
+    manifest['mtime_ns'] = stat.st_mtime_ns
+    _write_manifest(manifest_path, manifest)
+    return True
+
+
+def ensure_parquet_cache(con, csv_file_path, cache_dir, contract=None):
+    """Return (parquet_path, cache_hit), converting the CSV with the given connection on a miss
+
+    With a loaded CsvSchemaContract the CSV is read with its recorded schema;
+    otherwise DuckDB sniffs it, with the encoding detected from the file.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    parquet_path, manifest_path = cache_entry_paths(csv_file_path, cache_dir)
+    schema = contract.digest() if contract else None
+
+    if is_cache_valid(csv_file_path, parquet_path, manifest_path, schema):
+        return parquet_path, True
+
+    stat = os.stat(csv_file_path)
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    if contract:
+        # COPY binds its target first, so the reader takes numbered parameters after it
+        contract.execute(con, lambda source, params: (
+            f"COPY (SELECT * FROM {source}) TO $1 (FORMAT PARQUET, COMPRESSION ZSTD);", [tmp_path] + params
+        ), numbered_from=2)
+        schema = contract.digest()  # the encoding may have been corrected while reading
+    else:
+        from csv_schema import detect_encoding  # csv_schema imports this module
+
+        con.execute("""
+        COPY (
+            SELECT * FROM read_csv_auto($1, HEADER=TRUE, ENCODING=$3)
+        ) TO $2 (FORMAT PARQUET, COMPRESSION ZSTD);
+        """, [csv_file_path, tmp_path, detect_encoding(csv_file_path)])
+    os.replace(tmp_path, parquet_path)
+
+    _write_manifest(manifest_path, {
+        'source': os.path.abspath(csv_file_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': content_hash(csv_file_path),
+        'schema': schema
+    })
+    return parquet_path, False
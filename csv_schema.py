@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+CSV Schema Contract
+Detects a CSV's encoding and dialect from a bounded prefix, persists the
+detected columns, types and date formats, and reads later loads with exactly
+that schema instead of re-sniffing, failing fast when the file drifts from it
+"""
+
+import codecs
+import csv
+import hashlib
+import json
+import os
+
+from csv_parquet_cache import cache_entry_base
+
+CONTRACT_VERSION = 1
+
+# Encoding is decided from this many leading bytes, types from this many leading rows
+SNIFF_BYTES = 1024 * 1024
+SNIFF_ROWS = 20480
+
+
+class SchemaDriftError(ValueError):
+    """Raised when a CSV no longer matches its recorded schema contract"""
+
+
+def detect_encoding(csv_file_path, prefix_bytes=SNIFF_BYTES):
+    """Return the DuckDB encoding name for a CSV from its BOM or its first prefix_bytes"""
+    with open(csv_file_path, 'rb') as f:
+        prefix = f.read(prefix_bytes)
+    if prefix.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    try:
+        # Incremental decoding tolerates a multi-byte character cut off at the prefix boundary
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+def _sniffed(value):
+    # sniff_csv reports an unset quote or escape character as '(empty)'
+    return '' if value == '(empty)' else value
+
+
+class CsvSchemaContract:
+    def __init__(self, csv_file_path, schema_dir='.duckdb_cache'):
+        self.csv_file_path = csv_file_path
+        self.path = cache_entry_base(csv_file_path, schema_dir) + '.schema.json'
+        self.contract = None
+
+    @property
+    def encoding(self):
+        return self.contract['encoding']
+
+    @property
+    def columns(self):
+        return self.contract['columns']
+
+    def load(self, con, refresh=False):
+        """Load the recorded contract, detecting and saving one when missing; raises SchemaDriftError on drift"""
+        if not refresh:
+            try:
+                with open(self.path) as f:
+                    self.contract = json.load(f)
+            except (OSError, ValueError):
+                self.contract = None
+        if not self.contract or self.contract.get('version') != CONTRACT_VERSION:
+            self.contract = self.detect(con)
+            self.save()
+        self.check_header()
+        return self
+
+    def detect(self, con):
+        """Detect encoding, dialect, column types and date formats from the start of the file"""
+        encoding = detect_encoding(self.csv_file_path)
+        sniffed = con.execute("""
+        SELECT Delimiter, Quote, Escape, SkipRows, HasHeader, Columns, DateFormat, TimestampFormat
+        FROM sniff_csv(?, sample_size=?, encoding=?);
+        """, [self.csv_file_path, SNIFF_ROWS, encoding]).fetchone()
+        delimiter, quote, escape, skip_rows, has_header, columns, date_format, timestamp_format = sniffed
+        return {
+            'version': CONTRACT_VERSION,
+            'source': os.path.abspath(self.csv_file_path),
+            'encoding': encoding,
+            'delimiter': delimiter,
+            'quote': _sniffed(quote),
+            'escape': _sniffed(escape),
+            'skip_rows': skip_rows,
+            'header': has_header,
+            'columns': {column['name']: column['type'] for column in columns},
+            'date_format': date_format,
+            'timestamp_format': timestamp_format
+        }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.contract, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def digest(self):
+        """Return a short hash of the contract, for caches derived from reads under it"""
+        payload = json.dumps(self.contract, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def header(self):
+        """Read just the header row with the recorded encoding and dialect"""
+        with open(self.csv_file_path, newline='', encoding=self.encoding) as f:
+            for _ in range(self.contract['skip_rows']):
+                f.readline()
+            reader = csv.reader(f, delimiter=self.contract['delimiter'], quotechar=self.contract['quote'] or None)
+            return next(reader, [])
+
+    def check_header(self):
+        """Raise SchemaDriftError when the file's columns differ from the contract's"""
+        if not self.contract['header']:
+            return
+        # DuckDB trims and may re-case header names, so compare them normalized
+        header = [name.lstrip('﻿').strip() for name in self.header()]
+        expected = list(self.columns)
+        if [name.lower() for name in header] == [name.lower() for name in expected]:
+            return
+        missing = [name for name in expected if name.lower() not in {h.lower() for h in header}]
+        added = [name for name in header if name.lower() not in {e.lower() for e in expected}]
+        details = []
+        if missing:
+            details.append(f"missing {', '.join(missing)}")
+        if added:
+            details.append(f"new {', '.join(added)}")
+        raise SchemaDriftError(
+            f"{self.csv_file_path} no longer matches its schema contract "
+            f"({'; '.join(details) or 'columns reordered'}); rerun with a schema refresh to accept the new layout"
+        )
+
+    def source(self, path=None, numbered_from=None, **options):
+        """Return (sql, params) for a read_csv call with the contract's explicit schema and no sniffing
+
+        Placeholders are '?' unless numbered_from is given, for statements such
+        as COPY that need $n parameters. Extra reader options are bound too.
+        """
+        reader_options = {
+            'header': self.contract['header'],
+            'delim': self.contract['delimiter'],
+            'quote': self.contract['quote'],
+            'escape': self.contract['escape'],
+            'skip': self.contract['skip_rows'],
+            'encoding': self.encoding,
+            'columns': self.columns,
+            'dateformat': self.contract['date_format'],
+            'timestampformat': self.contract['timestamp_format']
+        }
+        reader_options.update(options)
+        reader_options = {name: value for name, value in reader_options.items() if value is not None}
+
+        params = [path or self.csv_file_path] + list(reader_options.values())
+        if numbered_from is None:
+            placeholders = ['?'] * len(params)
+        else:
+            placeholders = [f"${number}" for number in range(numbered_from, numbered_from + len(params))]
+        arguments = ', '.join(f"{name}={placeholder}" for name, placeholder in zip(reader_options, placeholders[1:]))
+        return f"read_csv({placeholders[0]}, auto_detect=false, {arguments})", params
+
+    def execute(self, con, build_statement, path=None, **options):
+        """Execute build_statement(source_sql, source_params) -> (sql, params) reading the CSV under the contract
+
+        A prefix can be valid UTF-8 while later rows hold Latin-1 bytes; that is
+        retried once as latin-1 and recorded. Other CSV read errors are schema drift.
+        """
+        try:
+            return con.execute(*build_statement(*self.source(path, **options)))
+        except Exception as e:
+            message = str(e)
+            if self.encoding == 'utf-8' and 'unicode' in message.lower():
+                self.contract['encoding'] = 'latin-1'
+                self.save()
+                return con.execute(*build_statement(*self.source(path, **options)))
+            if 'CSV Error' in message:
+                raise SchemaDriftError(
+                    f"{path or self.csv_file_path} no longer matches its schema contract: {message.splitlines()[0]}"
+                ) from e
+            raise
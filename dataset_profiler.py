@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Dataset Profiler
+Univariate numeric summaries, categorical frequency tables and pairwise
+crosstabs for any DuckDB table, each computed for all columns in one scan
+"""
+
+import argparse
+import json
+import os
+
+from csv_parquet_cache import ensure_parquet_cache
+from csv_schema import CsvSchemaContract
+
+# Datasets shipped with the site; numeric/categorical lists follow assets/Source_code.R,
+# crosstabs are (outcome, group) pairs
+DATASET_PROFILES = {
+    'healthcare': {
+        'csv': 'assets/watson_healthcare_modified.csv',
+        'numeric': ['Age', 'DailyRate', 'DistanceFromHome', 'HourlyRate', 'MonthlyIncome', 'MonthlyRate',
+                    'NumCompaniesWorked', 'PercentSalaryHike', 'TotalWorkingYears', 'TrainingTimesLastYear',
+                    'YearsAtCompany', 'YearsInCurrentRole', 'YearsSinceLastPromotion', 'YearsWithCurrManager'],
+        'categorical': ['Attrition', 'BusinessTravel', 'Department', 'Education', 'EducationField',
+                        'EnvironmentSatisfaction', 'Gender', 'JobInvolvement', 'JobLevel', 'JobRole',
+                        'JobSatisfaction', 'MaritalStatus', 'OverTime', 'PerformanceRating',
+                        'RelationshipSatisfaction', 'WorkLifeBalance'],
+        'crosstabs': [['Attrition', 'Department'], ['Attrition', 'JobRole'], ['Attrition', 'OverTime'],
+                      ['Attrition', 'MaritalStatus'], ['Attrition', 'BusinessTravel']]
+    },
+    'ecommerce': {
+        'csv': 'assets/cleaned_data.csv',
+        'crosstabs': [['returned', 'channel'], ['returned', 'category'], ['returned', 'payment_method'],
+                      ['order_status', 'channel'], ['returned', 'customer_segment']]
+    }
+}
+
+# Crosstabs for the Amazon sales table profiled by amazon_analysis_generator.py
+AMAZON_CROSSTABS = [['Status', 'Fulfilment'], ['Status', 'ship-service-level'], ['Courier Status', 'Category']]
+
+# Categorical columns with more distinct values than this (IDs, free text) get no frequency table
+MAX_FREQUENCY_LEVELS = 50
+
+# Leading rows checked for such columns before the frequency pass
+CARDINALITY_PROBE_ROWS = 100000
+
+NUMERIC_TYPES = ('TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT', 'UTINYINT', 'USMALLINT',
+                 'UINTEGER', 'UBIGINT', 'FLOAT', 'DOUBLE', 'DECIMAL')
+CATEGORICAL_TYPES = ('VARCHAR', 'BOOLEAN', 'ENUM')
+TEMPORAL_TYPES = ('DATE', 'TIMESTAMP', 'TIME')
+
+
+def quote_identifier(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def column_kind(column_type):
+    """Return 'numeric', 'categorical', 'temporal' or None for a DuckDB column type"""
+    for kind, types in [('numeric', NUMERIC_TYPES), ('categorical', CATEGORICAL_TYPES), ('temporal', TEMPORAL_TYPES)]:
+        if column_type.startswith(types):
+            return kind
+    return None
+
+
+def load_table(con, csv_file_path, table='dataset', cache_dir='.duckdb_cache'):
+    """Load a CSV (through its schema contract and the Parquet cache) or a Parquet file into table"""
+    if csv_file_path.endswith('.parquet'):
+        con.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM read_parquet(?);", [csv_file_path])
+        return
+    contract = CsvSchemaContract(csv_file_path, cache_dir or '.duckdb_cache').load(con)
+    if cache_dir:
+        parquet_path, _ = ensure_parquet_cache(con, csv_file_path, cache_dir, contract)
+        con.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM read_parquet(?);", [parquet_path])
+    else:
+        contract.execute(con, lambda source, params: (
+            f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM {source};", params
+        ))
+
+
+class DatasetProfiler:
+    def __init__(self, con, table, numeric_columns=None, categorical_columns=None, crosstabs=None,
+                 max_levels=MAX_FREQUENCY_LEVELS):
+        self.con = con
+        self.table = table
+        self.types = dict(con.execute(f"SELECT column_name, column_type FROM (DESCRIBE {table});").fetchall())
+        # Columns default to their storage type; coded columns such as Education can be listed as categorical
+        self.numeric_columns = list(numeric_columns) if numeric_columns is not None else [
+            name for name, column_type in self.types.items() if column_kind(column_type) == 'numeric'
+        ]
+        self.categorical_columns = list(categorical_columns) if categorical_columns is not None else [
+            name for name, column_type in self.types.items() if column_kind(column_type) == 'categorical'
+        ]
+        self.temporal_columns = [name for name, column_type in self.types.items() if column_kind(column_type) == 'temporal']
+        # A pair listed twice is profiled once; (A, B) and (B, A) stay distinct views of the same counts
+        self.crosstabs = []
+        for pair in crosstabs or []:
+            if len(pair) != 2 or pair[0] == pair[1]:
+                raise ValueError(f"a crosstab needs two different columns, an outcome and a group, got {pair}")
+            if list(pair) not in self.crosstabs:
+                self.crosstabs.append(list(pair))
+        self.max_levels = max_levels
+
+        for name in self.numeric_columns + self.categorical_columns + [c for pair in self.crosstabs for c in pair]:
+            if name not in self.types:
+                raise ValueError(f"unknown column '{name}' in {table}")
+        for name in self.numeric_columns:
+            if column_kind(self.types[name]) != 'numeric':
+                raise ValueError(f"column '{name}' is {self.types[name]}, not numeric")
+
+    def column_statistics(self):
+        """Summarize every profiled column in one scan; returns (rows, {column: stats})"""
+        expressions = ['COUNT(*)']
+        layout = []
+        for name in self.numeric_columns:
+            column = quote_identifier(name)
+            expressions += [
+                f"COUNT({column})", f"AVG({column})::DOUBLE", f"STDDEV_SAMP({column})::DOUBLE",
+                f"MIN({column})::DOUBLE", f"quantile_cont({column}, [0.25, 0.5, 0.75])::DOUBLE[]",
+                f"MAX({column})::DOUBLE"
+            ]
+            layout.append((name, 'numeric', ['count', 'mean', 'std', 'min', 'quartiles', 'max']))
+        for name in self.categorical_columns:
+            expressions.append(f"COUNT({quote_identifier(name)})")
+            layout.append((name, 'categorical', ['count']))
+        for name in self.temporal_columns:
+            column = quote_identifier(name)
+            expressions += [f"COUNT({column})", f"MIN({column})", f"MAX({column})"]
+            layout.append((name, 'temporal', ['count', 'min', 'max']))
+
+        values = list(self.con.execute(f"SELECT {', '.join(expressions)} FROM {self.table};").fetchone())
+        rows = values.pop(0)
+        statistics = {}
+        for name, kind, fields in layout:
+            stats = dict(zip(fields, values[:len(fields)]))
+            del values[:len(fields)]
+            if kind == 'numeric':
+                q1, median, q3 = stats.pop('quartiles') or [None, None, None]
+                stats.update({'q1': q1, 'median': median, 'q3': q3})
+            stats['kind'] = kind
+            stats['missing'] = rows - stats['count']
+            statistics[name] = stats
+        return rows, statistics
+
+    def high_cardinality_columns(self):
+        """Return categorical columns with over max_levels distinct values in the leading rows"""
+        if not self.categorical_columns:
+            return []
+        # A bounded prefix is enough to spot identifiers; an exact full-table distinct count costs a scan
+        counts = self.con.execute(
+            f"SELECT {', '.join(f'COUNT(DISTINCT {quote_identifier(name)})' for name in self.categorical_columns)} "
+            f"FROM (SELECT * FROM {self.table} LIMIT ?);", [CARDINALITY_PROBE_ROWS]
+        ).fetchone()
+        return [name for name, count in zip(self.categorical_columns, counts) if count > self.max_levels]
+
+    def frequency_tables(self, columns):
+        """Return ({column: [{value, count, percentage}, ...]}, {column: level count}) from one GROUPING SETS scan"""
+        if not columns:
+            return {}, {}
+        quoted = [quote_identifier(name) for name in columns]
+        name_case = ' '.join(f"WHEN GROUPING({column}) = 0 THEN ?" for column in quoted)
+        value_case = ' '.join(f"WHEN GROUPING({column}) = 0 THEN CAST({column} AS VARCHAR)" for column in quoted)
+        cursor = self.con.execute(f"""
+        WITH counts AS (
+            SELECT
+                CASE {name_case} END as column_name,
+                CASE {value_case} END as value,
+                COUNT(*) as count
+            FROM {self.table}
+            GROUP BY GROUPING SETS ({', '.join(f'({column})' for column in quoted)})
+        )
+        SELECT
+            column_name,
+            value,
+            count,
+            ROUND(100.0 * count / SUM(count) OVER (PARTITION BY column_name), 2) as percentage,
+            COUNT(*) OVER (PARTITION BY column_name) as levels
+        FROM counts
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY column_name ORDER BY count DESC, value) <= ?
+        ORDER BY column_name, count DESC, value;
+        """, list(columns) + [self.max_levels])
+
+        frequencies = {name: [] for name in columns}
+        levels = {}
+        for column_name, value, count, percentage, level_count in cursor.fetchall():
+            frequencies[column_name].append({'value': value, 'count': count, 'percentage': percentage})
+            levels[column_name] = level_count
+        return frequencies, levels
+
+    def crosstab_tables(self):
+        """Return one crosstab per (outcome, group) pair, all from one GROUPING SETS scan
+
+        percentage is the outcome's share within each group value, e.g. the
+        attrition rate per department for ('Attrition', 'Department').
+        """
+        if not self.crosstabs:
+            return []
+        columns = []
+        for pair in self.crosstabs:
+            columns += [name for name in pair if name not in columns]
+        quoted = {name: quote_identifier(name) for name in columns}
+        projections = ', '.join(f"CAST({quoted[name]} AS VARCHAR) as {quoted[name]}" for name in columns)
+
+        # Each unordered column pair is grouped once, however many crosstabs read it; a
+        # repeated grouping set would count its rows twice under the first matching CASE
+        column_pairs = []
+        for pair in self.crosstabs:
+            if sorted(pair) not in column_pairs:
+                column_pairs.append(sorted(pair))
+
+        def set_case(position):
+            return ' '.join(
+                f"WHEN GROUPING({quoted[first]}, {quoted[second]}) = 0 THEN {quoted[[first, second][position]]}"
+                for first, second in column_pairs
+            )
+
+        index_case = ' '.join(
+            f"WHEN GROUPING({quoted[first]}, {quoted[second]}) = 0 THEN {index}"
+            for index, (first, second) in enumerate(column_pairs)
+        )
+        grouping_sets = ', '.join(f"({quoted[first]}, {quoted[second]})" for first, second in column_pairs)
+        pairs = ', '.join(
+            f"({index}, {column_pairs.index(sorted(pair))}, {str(pair != sorted(pair)).upper()})"
+            for index, pair in enumerate(self.crosstabs)
+        )
+        cursor = self.con.execute(f"""
+        WITH base AS (
+            SELECT {projections} FROM {self.table}
+        ),
+        counts AS (
+            SELECT
+                CASE {index_case} END as column_pair,
+                CASE {set_case(0)} END as first_value,
+                CASE {set_case(1)} END as second_value,
+                COUNT(*) as count
+            FROM base
+            GROUP BY GROUPING SETS ({grouping_sets})
+        ),
+        pairs(pair, column_pair, reversed) AS (
+            VALUES {pairs}
+        ),
+        cells AS (
+            SELECT
+                pair,
+                CASE WHEN reversed THEN second_value ELSE first_value END as outcome,
+                CASE WHEN reversed THEN first_value ELSE second_value END as group_value,
+                count
+            FROM pairs
+            JOIN counts USING (column_pair)
+        )
+        SELECT
+            pair,
+            outcome,
+            group_value,
+            count,
+            ROUND(100.0 * count / SUM(count) OVER (PARTITION BY pair, group_value), 2) as percentage
+        FROM cells
+        ORDER BY pair, group_value, outcome;
+        """)
+
+        crosstabs = [{'outcome': outcome, 'group': group, 'cells': []} for outcome, group in self.crosstabs]
+        for pair, outcome, group_value, count, percentage in cursor.fetchall():
+            crosstabs[pair]['cells'].append(
+                {'outcome': outcome, 'group_value': group_value, 'count': count, 'percentage': percentage}
+            )
+        return crosstabs
+
+    def profile(self):
+        """Run every profiling pass and return the combined profile"""
+        rows, statistics = self.column_statistics()
+        # Identifier-like columns would dominate the grouping work without telling us anything
+        skipped = self.high_cardinality_columns()
+        frequencies, levels = self.frequency_tables([name for name in self.categorical_columns if name not in skipped])
+        for name in self.categorical_columns:
+            statistics[name]['distinct'] = levels.get(name)
+        return {
+            'table': self.table,
+            'rows': rows,
+            'columns': statistics,
+            'frequencies': frequencies,
+            'crosstabs': self.crosstab_tables()
+        }
+
+
+def print_profile(profile):
+    print(f"\n📋 Profile of {profile['table']}: {profile['rows']:,} rows, {len(profile['columns'])} columns")
+
+    numeric = {name: stats for name, stats in profile['columns'].items() if stats['kind'] == 'numeric'}
+    if numeric:
+        print("\n🔢 Numeric Summary:")
+        print(f"   {'column':<28}{'min':>12}{'q1':>12}{'median':>12}{'mean':>12}{'q3':>12}{'max':>12}{'missing':>9}")
+        for name, stats in numeric.items():
+            cells = ''.join(f"{stats[key]:>12,.2f}" if stats[key] is not None else f"{'-':>12}"
+                            for key in ['min', 'q1', 'median', 'mean', 'q3', 'max'])
+            print(f"   {name[:27]:<28}{cells}{stats['missing']:>9,}")
+
+    if profile['frequencies']:
+        print("\n🏷️ Categorical Frequencies:")
+        for name, levels in profile['frequencies'].items():
+            shown = '' if len(levels) == profile['columns'][name]['distinct'] else f", top {len(levels)}"
+            print(f"   {name} ({profile['columns'][name]['distinct']} levels{shown}):")
+            for level in levels:
+                print(f"      {str(level['value']):<30}{level['count']:>10,}  {level['percentage']:>6.2f}%")
+    skipped = [name for name, stats in profile['columns'].items()
+               if stats['kind'] == 'categorical' and name not in profile['frequencies']]
+    if skipped:
+        print(f"   ~ no frequency table for high-cardinality columns: {', '.join(skipped)}")
+
+    for crosstab in profile['crosstabs']:
+        print(f"\n🔀 {crosstab['outcome']} × {crosstab['group']} (% of each {crosstab['group']}):")
+        outcomes = sorted({str(cell['outcome']) for cell in crosstab['cells']})
+        groups = sorted({str(cell['group_value']) for cell in crosstab['cells']})
+        cells = {(str(cell['outcome']), str(cell['group_value'])): cell for cell in crosstab['cells']}
+        print(f"   {'':<24}" + ''.join(f"{outcome[:14]:>16}" for outcome in outcomes))
+        for group in groups:
+            row = ''.join(
+                f"{cells[(outcome, group)]['count']:>8,} {cells[(outcome, group)]['percentage']:>6.1f}%"
+                if (outcome, group) in cells else f"{'-':>16}"
+                for outcome in outcomes
+            )
+            print(f"   {group[:23]:<24}{row}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Profile a dataset with DuckDB')
+    parser.add_argument('dataset', nargs='?', choices=list(DATASET_PROFILES), help='a shipped dataset to profile')
+    parser.add_argument('--csv', help='profile this CSV or Parquet file instead')
+    parser.add_argument('--crosstab', action='append', default=[], metavar='OUTCOME:GROUP',
+                        help='add a crosstab, e.g. Attrition:Department; repeatable')
+    parser.add_argument('--max-levels', type=int, default=MAX_FREQUENCY_LEVELS,
+                        help='skip frequency tables for columns with more distinct values')
+    parser.add_argument('--cache-dir', default='.duckdb_cache', help='Parquet cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='parse the CSV directly on every run')
+    parser.add_argument('--output', help='write the profile as JSON to this path')
+    args = parser.parse_args(argv)
+
+    preset = DATASET_PROFILES.get(args.dataset, {})
+    csv_file_path = args.csv or preset.get('csv')
+    if not csv_file_path:
+        parser.error('pass a dataset name or --csv')
+    if not os.path.exists(csv_file_path):
+        print(f"❌ File not found at: {csv_file_path}")
+        return
+
+    crosstabs = preset.get('crosstabs', []) + [pair.split(':', 1) for pair in args.crosstab if ':' in pair]
+
+    import duckdb
+
+    con = duckdb.connect(database=':memory:')
+    try:
+        load_table(con, csv_file_path, 'dataset', None if args.no_cache else args.cache_dir)
+        profiler = DatasetProfiler(con, 'dataset', preset.get('numeric'), preset.get('categorical'),
+                                   crosstabs, args.max_levels)
+        profile = profiler.profile()
+    except Exception as e:
+        print(f"❌ Error profiling {csv_file_path}: {e}")
+        return
+    finally:
+        con.close()
+
+    profile['source'] = csv_file_path
+    print_profile(profile)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(profile, f, indent=2, default=str)
+        print(f"\n✅ Profile saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
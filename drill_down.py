@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Drill-Down Analysis
+Ranks the top groups at any level of a hierarchy such as state -> city ->
+postal code from one leaf-level aggregate, optionally scoped to a parent
+"""
+
+import threading
+
+from analysis_registry import DRILL_DOWNS, amount_filter, failure_flag, failure_rate, revenue_share
+
+# Metrics a drill-down can be ranked by, highest first
+DRILL_ORDER_BY = ['failure_rate', 'total_revenue']
+
+MAX_DRILL_LIMIT = 1000
+
+
+class DrillDownIndex:
+    """Leaf-level aggregate for one hierarchy, built once per load and queried at any level or parent scope"""
+
+    def __init__(self, name, source='amazon_sales'):
+        if name not in DRILL_DOWNS:
+            raise ValueError(f"unknown drill-down '{name}'; use {', '.join(DRILL_DOWNS)}")
+        self.name = name
+        self.levels = DRILL_DOWNS[name]
+        self.source = source
+        self.table = f"drill_{name}"
+        self._built = False
+        self._lock = threading.Lock()
+
+    def labels(self):
+        return [level['label'] for level in self.levels]
+
+    def build(self, con):
+        """(Re)build the leaf aggregate from the source table"""
+        failed_sql, failed_params = failure_flag()
+        amount_sql, amount_params = amount_filter()
+        columns = ', '.join(f"{level['column']} AS {level['label']}" for level in self.levels)
+        labels = ', '.join(self.labels())
+        # Rows are clustered by the hierarchy so a parent scope only reads its own row groups
+        con.execute(f"""
+        CREATE OR REPLACE TABLE {self.table} AS
+        SELECT
+            {labels},
+            COUNT(*) as total_orders,
+            SUM(Amount) as total_revenue,
+            COUNT(*) FILTER (WHERE is_failed) as failed_orders
+        FROM (
+            SELECT {columns}, Amount, {failed_sql} as is_failed
+            FROM {self.source}
+            WHERE {amount_sql}
+        )
+        GROUP BY {labels}
+        ORDER BY {labels};
+        """, failed_params + amount_params)
+        self._built = True
+
+    def ensure_built(self, con):
+        with self._lock:
+            if not self._built:
+                self.build(con)
+
+    def invalidate(self):
+        """Mark the aggregate stale after the source table is reloaded"""
+        with self._lock:
+            self._built = False
+
+    def compile_top_k(self, level, parent=None, order_by='failure_rate', limit=10, min_orders=None):
+        """Compile (sql, params) ranking one level's groups, optionally within a parent path of ancestor values"""
+        labels = self.labels()
+        if level not in labels:
+            raise ValueError(f"unknown {self.name} level '{level}'; use {', '.join(labels)}")
+        depth = labels.index(level)
+        parent = list(parent or [])
+        if len(parent) > depth:
+            expected = ', '.join(labels[:depth]) if depth else 'none'
+            raise ValueError(f"too many parent values for a {level} drill-down; its parents are: {expected}")
+        if order_by not in DRILL_ORDER_BY:
+            raise ValueError(f"cannot rank by '{order_by}'; use {', '.join(DRILL_ORDER_BY)}")
+        if not 1 <= limit <= MAX_DRILL_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_DRILL_LIMIT}")
+        if min_orders is None:
+            min_orders = self.levels[depth]['min_orders']
+
+        group_labels = ', '.join(labels[:depth + 1])
+        conditions = [f"CAST({label} AS VARCHAR) = ?" for label in labels[:len(parent)]]
+        conditions.append(f"{level} IS NOT NULL")
+        params = [str(value) for value in parent] + [min_orders, limit]
+
+        # Shares are relative to the scope; ORDER BY ... LIMIT lets DuckDB keep only a top-K heap
+        sql = f"""
+        WITH grouped AS (
+            SELECT
+                {group_labels},
+                SUM(total_orders)::BIGINT as orders,
+                SUM(total_revenue) as revenue,
+                SUM(failed_orders)::BIGINT as failed
+            FROM {self.table}
+            WHERE {' AND '.join(conditions)}
+            GROUP BY {group_labels}
+        )
+        SELECT
+            {group_labels},
+            orders as total_orders,
+            revenue as total_revenue,
+            failed as failed_orders,
+            {failure_rate('failed', 'orders')} as failure_rate,
+            {revenue_share('revenue', 'SUM(revenue) OVER ()')} as revenue_percentage
+        FROM grouped
+        QUALIFY orders >= ?
+        ORDER BY {order_by} DESC NULLS LAST, {group_labels}
+        LIMIT ?
+        """
+        return sql, params
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+E-commerce Table Index
+Loads assets/cleaned_data.csv into DuckDB through the Parquet cache and answers
+paged, sorted and filtered table requests with ETags
+"""
+
+import hashlib
+import json
+import math
+
+from csv_parquet_cache import ensure_parquet_cache
+from csv_schema import CsvSchemaContract
+from query_result_cache import dataset_fingerprint
+
+DEFAULT_ECOMMERCE_CSV = 'assets/cleaned_data.csv'
+ECOMMERCE_TABLE = 'ecommerce_orders'
+
+# Columns the table can be filtered on, each by one or more exact values
+FILTER_COLUMNS = ['category', 'channel', 'country', 'order_status']
+
+MAX_PAGE_SIZE = 500
+
+
+class EcommerceTableIndex:
+    def __init__(self, csv_file_path=DEFAULT_ECOMMERCE_CSV, cache_dir='.duckdb_cache'):
+        self.csv_file_path = csv_file_path
+        self.cache_dir = cache_dir
+        self.columns = []
+        self.fingerprint = None
+
+    def load(self, con):
+        """(Re)build the table from the Parquet cache; returns the row count"""
+        fingerprint = dataset_fingerprint([self.csv_file_path])
+        contract = CsvSchemaContract(self.csv_file_path, self.cache_dir or '.duckdb_cache').load(con)
+        if self.cache_dir:
+            parquet_path, _ = ensure_parquet_cache(con, self.csv_file_path, self.cache_dir, contract)
+            con.execute(f"CREATE OR REPLACE TABLE {ECOMMERCE_TABLE} AS SELECT * FROM read_parquet(?);", [parquet_path])
+        else:
+            contract.execute(con, lambda source, params: (
+                f"CREATE OR REPLACE TABLE {ECOMMERCE_TABLE} AS SELECT * FROM {source};", params
+            ))
+        self.columns = [row[0] for row in con.execute(f"DESCRIBE {ECOMMERCE_TABLE};").fetchall()]
+        self.fingerprint = fingerprint
+        return con.execute(f"SELECT COUNT(*) FROM {ECOMMERCE_TABLE};").fetchone()[0]
+
+    def is_stale(self):
+        return dataset_fingerprint([self.csv_file_path]) != self.fingerprint
+
+    def normalize_request(self, page=1, page_size=20, sort=None, descending=False, filters=None):
+        """Validate a page request; raises ValueError for unknown columns or out-of-range paging"""
+        if sort is not None and sort not in self.columns:
+            raise ValueError(f"cannot sort by unknown column '{sort}'")
+        filters = {column: sorted(values) for column, values in (filters or {}).items() if values}
+        available = [column for column in FILTER_COLUMNS if column in self.columns]
+        unknown = [column for column in filters if column not in available]
+        if unknown:
+            raise ValueError(f"cannot filter by {', '.join(unknown)}; use {', '.join(available)}")
+        if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"page must be >= 1 and page_size between 1 and {MAX_PAGE_SIZE}")
+        return {'page': page, 'page_size': page_size, 'sort': sort, 'descending': bool(descending), 'filters': filters}
+
+    def etag(self, request):
+        """Return a strong ETag for a normalized request against the loaded data"""
+        payload = json.dumps([self.fingerprint, request], sort_keys=True)
+        return '"' + hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32] + '"'
+
+    def _where(self, filters):
+        conditions = []
+        params = []
+        for column, values in filters.items():
+            conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            params += values
+        return ('WHERE ' + ' AND '.join(conditions) if conditions else ''), params
+
+    def page(self, con, request):
+        """Return one page of rows plus the filtered row count for a normalized request"""
+        where, params = self._where(request['filters'])
+        total_rows = con.execute(f"SELECT COUNT(*) FROM {ECOMMERCE_TABLE} {where};", params).fetchone()[0]
+
+        # rowid keeps paging stable for ties and when no sort is requested
+        order = 'rowid'
+        if request['sort']:
+            order = f"\"{request['sort']}\" {'DESC' if request['descending'] else 'ASC'} NULLS LAST, rowid"
+        offset = (request['page'] - 1) * request['page_size']
+        cursor = con.execute(
+            f"SELECT * FROM {ECOMMERCE_TABLE} {where} ORDER BY {order} LIMIT ? OFFSET ?;",
+            params + [request['page_size'], offset]
+        )
+        return {
+            'columns': [desc[0] for desc in cursor.description],
+            'rows': cursor.fetchall(),
+            'page': request['page'],
+            'page_size': request['page_size'],
+            'total_rows': total_rows,
+            'total_pages': max(1, math.ceil(total_rows / request['page_size']))
+        }
+
+    def facets(self, con):
+        """Return the distinct values of every filter column"""
+        return {
+            column: [row[0] for row in con.execute(
+                f"SELECT DISTINCT {column} FROM {ECOMMERCE_TABLE} WHERE {column} IS NOT NULL ORDER BY 1;"
+            ).fetchall()]
+            for column in FILTER_COLUMNS if column in self.columns
+        }
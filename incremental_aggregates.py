@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Incremental Aggregate Store
+Ingests only rows appended to a sales CSV since the last run and merges them
+into materialized per-dimension aggregates kept in a persistent DuckDB file
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+from analysis_registry import amount_filter, failure_flag
+
+TAIL_CHECK_BYTES = 4096
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class IncrementalAggregateStore:
+    def __init__(self, con, csv_file_path, dimensions, contract=None, time_series=None):
+        self.con = con
+        self.csv_file_path = csv_file_path
+        self.dimensions = dimensions  # [(grouping expression, label, bound params), ...]
+        self.contract = contract  # optional CsvSchemaContract; deltas are then read with the recorded types
+        self.time_series = time_series  # optional TimeSeriesStore fed from the same deltas
+
+    def _signature(self):
+        """Describe what the store aggregates; a change forces a rebuild from the first row"""
+        return json.dumps([self.dimensions, self.time_series.dimensions if self.time_series else None])
+
+    def _create_tables(self):
+        self.con.execute("""
+        CREATE TABLE IF NOT EXISTS ingest_state (
+            source VARCHAR,
+            dimensions VARCHAR,
+            byte_offset BIGINT,
+            rows_ingested BIGINT,
+            tail_hash VARCHAR
+        );
+        CREATE TABLE IF NOT EXISTS seen_orders (
+            order_id VARCHAR PRIMARY KEY
+        );
+        CREATE TABLE IF NOT EXISTS running_aggregates (
+            dimension VARCHAR,
+            group_value VARCHAR,
+            total_orders BIGINT,
+            total_revenue DOUBLE,
+            failed_orders BIGINT
+        );
+        """)
+        if self.time_series:
+            self.time_series.create_tables()
+
+    def _reset(self):
+        self.con.execute("""
+        DROP TABLE IF EXISTS ingest_state;
+        DROP TABLE IF EXISTS seen_orders;
+        DROP TABLE IF EXISTS running_aggregates;
+        """)
+        if self.time_series:
+            self.time_series.reset()
+        self._create_tables()
+
+    def _tail_hash(self, f, offset):
+        """Hash the bytes just before the high-water mark to detect rewritten history"""
+        start = max(0, offset - TAIL_CHECK_BYTES)
+        f.seek(start)
+        return hashlib.sha256(f.read(offset - start)).hexdigest()
+
+    def _load_state(self, f, size):
+        """Return (byte_offset, rows_ingested), or None when the store must be rebuilt"""
+        state = self.con.execute("""
+        SELECT source, dimensions, byte_offset, rows_ingested, tail_hash FROM ingest_state;
+        """).fetchone()
+        if state is None:
+            return None
+
+        source, dimensions, byte_offset, rows_ingested, tail_hash = state
+        if source != os.path.abspath(self.csv_file_path) or dimensions != self._signature():
+            return None
+        if size < byte_offset or self._tail_hash(f, byte_offset) != tail_hash:
+            return None
+        return byte_offset, rows_ingested
+
+    def _last_line_end(self, f, start, size):
+        """Return the offset just past the last newline at or after start, scanning backwards"""
+        position = size
+        while position > start:
+            chunk_start = max(start, position - COPY_CHUNK_SIZE)
+            f.seek(chunk_start)
+            newline = f.read(position - chunk_start).rfind(b'\n')
+            if newline >= 0:
+                return chunk_start + newline + 1
+            position = chunk_start
+        return start
+
+    def _write_delta(self, f, header, offset, end):
+        """Copy the header plus the appended byte range into a temporary CSV"""
+        fd, delta_path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'wb') as out:
+            out.write(header)
+            f.seek(offset)
+            remaining = end - offset
+            while remaining > 0:
+                chunk = f.read(min(COPY_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                out.write(chunk)
+                remaining -= len(chunk)
+        return delta_path
+
+    def ingest(self):
+        """Ingest newly appended rows and merge them into the running aggregates; returns the row count"""
+        self._create_tables()
+
+        with open(self.csv_file_path, 'rb') as f:
+            header = f.readline()
+            size = os.fstat(f.fileno()).st_size
+
+            state = self._load_state(f, size)
+            if state is None:
+                self._reset()
+                state = (len(header), 0)
+            byte_offset, rows_ingested = state
+
+            # Only consume complete lines so a partially written final row is picked up next run
+            end = self._last_line_end(f, byte_offset, size)
+            if end <= byte_offset:
+                return 0
+
+            delta_path = self._write_delta(f, header, byte_offset, end)
+            tail_hash = self._tail_hash(f, end)
+
+        # Merge and advance the high-water mark atomically so a failed run never double counts
+        self.con.execute("BEGIN TRANSACTION;")
+        try:
+            delta_rows = self._merge_delta(delta_path)
+            self.con.execute("DELETE FROM ingest_state;")
+            self.con.execute(
+                "INSERT INTO ingest_state VALUES (?, ?, ?, ?, ?);",
+                [os.path.abspath(self.csv_file_path), self._signature(), end,
+                 rows_ingested + delta_rows, tail_hash]
+            )
+            self.con.execute("COMMIT;")
+        except Exception:
+            self.con.execute("ROLLBACK;")
+            raise
+        finally:
+            os.remove(delta_path)
+        return delta_rows
+
+    def _merge_delta(self, delta_path):
+        projections = ',\n                '.join(
+            f"CAST({expression} AS VARCHAR) AS {label}" for expression, label, _ in self.dimensions
+        )
+        grouping_sets = ', '.join(['()'] + [f"({label})" for _, label, _ in self.dimensions])
+        dimension_case = '\n                    '.join(
+            f"WHEN GROUPING({label}) = 0 THEN '{label}'" for _, label, _ in self.dimensions
+        )
+        value_case = '\n                    '.join(
+            f"WHEN GROUPING({label}) = 0 THEN {label}" for _, label, _ in self.dimensions
+        )
+        failed_sql, failed_params = failure_flag()
+        amount_sql, amount_params = amount_filter()
+
+        # A small delta would sniff to different types than the full file, so it is read under the contract
+        def read_delta(source, params):
+            return f"CREATE OR REPLACE TEMP TABLE amazon_sales_delta AS SELECT * FROM {source};", params
+
+        if self.contract:
+            self.contract.execute(self.con, read_delta, path=delta_path)
+        else:
+            self.con.execute(*read_delta("read_csv_auto(?, HEADER=TRUE, types={'Amount': 'DOUBLE'})", [delta_path]))
+        delta_rows = self.con.execute("SELECT COUNT(*) FROM amazon_sales_delta;").fetchone()[0]
+
+        self.con.execute(f"""
+        INSERT OR IGNORE INTO seen_orders
+        SELECT DISTINCT "Order ID" FROM amazon_sales_delta WHERE {amount_sql} AND "Order ID" IS NOT NULL;
+        """, amount_params)
+
+        # Fold the delta's grouping sets into the existing partials; the table holds one row per group
+        self.con.execute(f"""
+        CREATE OR REPLACE TABLE running_aggregates AS
+        WITH base AS (
+            SELECT
+                {projections},
+                Amount,
+                {failed_sql} as is_failed
+            FROM amazon_sales_delta
+            WHERE {amount_sql}
+        ),
+        delta AS (
+            SELECT
+                CASE
+                    {dimension_case}
+                    ELSE '*'
+                END as dimension,
+                CASE
+                    {value_case}
+                END as group_value,
+                COUNT(*) as total_orders,
+                SUM(Amount) as total_revenue,
+                COUNT(*) FILTER (WHERE is_failed) as failed_orders
+            FROM base
+            GROUP BY GROUPING SETS ({grouping_sets})
+        )
+        SELECT
+            dimension,
+            group_value,
+            SUM(total_orders)::BIGINT as total_orders,
+            SUM(total_revenue) as total_revenue,
+            SUM(failed_orders)::BIGINT as failed_orders
+        FROM (
+            SELECT * FROM running_aggregates
+            UNION ALL
+            SELECT * FROM delta
+        )
+        GROUP BY dimension, group_value;
+        """, [param for _, _, params in self.dimensions for param in params] + failed_params + amount_params)
+        if self.time_series:
+            self.time_series.merge('amazon_sales_delta')
+        self.con.execute("DROP TABLE amazon_sales_delta;")
+        return delta_rows
+
+    def fetch(self):
+        """Return (total, groups): the overall row as a dict and an Arrow table of groups per dimension label"""
+        import pyarrow.compute as pc
+
+        table = self.con.execute("""
+        SELECT
+            dimension,
+            group_value,
+            total_orders,
+            total_revenue,
+            total_revenue / total_orders as avg_order_value,
+            failed_orders,
+            ROUND(100.0 * total_revenue / MAX(total_revenue) FILTER (WHERE dimension = '*') OVER (), 2) as revenue_percentage,
+            ROUND(100.0 * failed_orders / total_orders, 2) as failure_rate
+        FROM running_aggregates;
+        """).to_arrow_table()
+
+        totals = table.filter(pc.equal(table['dimension'], '*')).to_pylist()
+        total = totals[0] if totals else None
+        groups = {}
+        for _, label, _ in self.dimensions:
+            rows = table.filter(pc.equal(table['dimension'], label))
+            groups[label] = rows.append_column(label, rows['group_value'])
+
+        if total is not None:
+            total['unique_orders'] = self.con.execute("SELECT COUNT(*) FROM seen_orders;").fetchone()[0]
+        return total, groups
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Model Training
+Encoded feature matrices built in DuckDB and cached per column on disk, with
+logistic regression and naive Bayes classifiers cross-validated in parallel
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+from analysis_registry import SAMPLE_SEED, amount_filter, failure_flag
+from dataset_profiler import DATASET_PROFILES, DatasetProfiler, load_table, quote_identifier
+from query_result_cache import dataset_fingerprint
+
+FEATURE_CACHE_DIR = os.path.join('.duckdb_cache', 'features')
+MODEL_RESULTS_FILE = 'model_results.json'
+
+DEFAULT_FOLDS = 5
+DECISION_THRESHOLD = 0.5
+
+# One-hot encoding keeps at most this many levels per categorical column; rarer levels encode as all zeros
+MAX_ENCODED_LEVELS = 30
+
+# Classification targets; label and where are (sql, params). Features that give the outcome away,
+# such as order_status for returns or Courier Status for failures, are left out
+MODEL_SPECS = {
+    'attrition': {
+        'csv': DATASET_PROFILES['healthcare']['csv'],
+        'label': ('CAST("Attrition" AS VARCHAR) IN (?, ?)', ['Yes', 'true']),
+        'numeric': DATASET_PROFILES['healthcare']['numeric'],
+        'categorical': [name for name in DATASET_PROFILES['healthcare']['categorical'] if name != 'Attrition']
+    },
+    'returns': {
+        'csv': DATASET_PROFILES['ecommerce']['csv'],
+        'label': ('CAST("returned" AS VARCHAR) IN (?, ?)', ['Y', 'true']),
+        'numeric': ['unit_price', 'quantity', 'discount', 'shipping_cost', 'days_to_ship'],
+        'categorical': ['category', 'sub_category', 'channel', 'payment_method', 'customer_segment', 'country']
+    },
+    'failures': {
+        # Trained on the sales table loaded by AmazonAnalysisGenerator
+        'label': failure_flag(),
+        'where': amount_filter(),
+        'numeric': ['Qty', 'Amount'],
+        'categorical': ['Fulfilment', 'ship-service-level', 'Category', 'Size', 'ship-state', 'B2B']
+    }
+}
+
+
+def _digest(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:24]
+
+
+class FeatureCache:
+    """Encoded feature blocks stored as .npy files, one per source column
+
+    A block's key covers the column's content hash and its encoding, so after a
+    data refresh only blocks whose column actually changed are rebuilt. A
+    manifest per dataset fingerprint lets an unchanged dataset skip DuckDB entirely.
+    """
+
+    def __init__(self, cache_dir=FEATURE_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.rebuilt = 0
+        self.reused = 0
+
+    def _block_path(self, key):
+        return os.path.join(self.cache_dir, key + '.npy')
+
+    def _manifest_path(self, name, fingerprint):
+        return os.path.join(self.cache_dir, f"{name}-{fingerprint[:24]}.json")
+
+    def _assemble(self, manifest):
+        import numpy as np
+
+        # Memory-mapped blocks are only copied once, into the combined matrix
+        blocks = [np.load(self._block_path(block['key']), mmap_mode='r') for block in manifest['blocks']]
+        X = np.hstack(blocks) if blocks else np.empty((manifest['rows'], 0))
+        y = np.array(np.load(self._block_path(manifest['label']), mmap_mode='r'))
+        names = [name for block in manifest['blocks'] for name in block['names']]
+        return X, y, names
+
+    def load(self, name, fingerprint):
+        """Return (X, y, feature names) for an unchanged dataset, or None"""
+        try:
+            with open(self._manifest_path(name, fingerprint)) as f:
+                manifest = json.load(f)
+            matrices = self._assemble(manifest)
+        except (OSError, ValueError, KeyError):
+            return None
+        self.reused += len(manifest['blocks']) + 1
+        return matrices
+
+    def build(self, con, table, name, spec, fingerprint):
+        """Encode spec's features from table, rebuilding only stale blocks; returns (X, y, feature names)"""
+        import numpy as np
+
+        # Streaming loads may have left out some feature columns
+        columns = {row[0] for row in con.execute(f"DESCRIBE {table};").fetchall()}
+        numeric = [column for column in spec['numeric'] if column in columns]
+        categorical = [column for column in spec['categorical'] if column in columns]
+        label_sql, label_params = spec['label']
+        where_sql, where_params = spec.get('where', ('TRUE', []))
+
+        # Pass 1: per-column content hashes (rowid ties them to row order) and means for null filling
+        expressions = ['COUNT(*)', f"bit_xor(hash(rowid, {label_sql}))"]
+        params = list(label_params)
+        for column in numeric + categorical:
+            expressions.append(f"bit_xor(hash(rowid, {quote_identifier(column)}))")
+        for column in numeric:
+            expressions.append(f"AVG(CAST({quote_identifier(column)} AS DOUBLE))")
+        stats = con.execute(f"SELECT {', '.join(expressions)} FROM {table} WHERE {where_sql};",
+                            params + where_params).fetchone()
+        rows, label_hash = stats[0], stats[1]
+        hashes = dict(zip(numeric + categorical, stats[2:2 + len(numeric) + len(categorical)]))
+        means = dict(zip(numeric, stats[2 + len(numeric) + len(categorical):]))
+
+        # Pass 2: levels of every categorical column in one GROUPING SETS scan; the most frequent is the baseline
+        frequencies = {}
+        if categorical:
+            selected = ', '.join(quote_identifier(column) for column in categorical)
+            con.execute(f"CREATE OR REPLACE TEMP TABLE model_levels AS SELECT {selected} FROM {table} WHERE {where_sql};",
+                        where_params)
+            frequencies, _ = DatasetProfiler(con, 'model_levels', [], categorical, max_levels=MAX_ENCODED_LEVELS + 1
+                                             ).frequency_tables(categorical)
+            con.execute("DROP TABLE model_levels;")
+
+        blocks = []
+        for column in numeric:
+            encoding = {'column': column, 'kind': 'numeric', 'fill': means[column]}
+            blocks.append(dict(encoding, names=[column], sql=[f"COALESCE(CAST({quote_identifier(column)} AS DOUBLE), ?)"],
+                               params=[[means[column] or 0.0]]))
+        for column in categorical:
+            levels = [level['value'] for level in frequencies[column] if level['value'] is not None][1:MAX_ENCODED_LEVELS + 1]
+            encoding = {'column': column, 'kind': 'categorical', 'levels': levels}
+            blocks.append(dict(encoding, names=[f"{column}={level}" for level in levels],
+                               sql=[f"CAST(COALESCE(CAST({quote_identifier(column)} AS VARCHAR) = ?, FALSE) AS DOUBLE)"
+                                    for _ in levels],
+                               params=[[level] for level in levels]))
+        for block in blocks:
+            block['key'] = _digest([block['column'], block['kind'], block.get('levels'), block.get('fill'),
+                                    hashes[block['column']], rows, where_sql, where_params])
+        label = {'key': _digest(['label', label_sql, label_params, label_hash, rows, where_sql, where_params]),
+                 'names': ['label'], 'sql': [f"CAST(COALESCE({label_sql}, FALSE) AS DOUBLE)"], 'params': [label_params]}
+
+        # Pass 3: encode every stale block in one scan, ordered by rowid to line up with cached blocks
+        stale = [block for block in blocks + [label] if not os.path.exists(self._block_path(block['key']))]
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if stale:
+            projections = []
+            params = []
+            for block in stale:
+                for sql, block_params in zip(block['sql'], block['params']):
+                    projections.append(f"{sql} as f{len(projections)}")
+                    params += block_params
+            arrays = con.execute(
+                f"SELECT {', '.join(projections)} FROM {table} WHERE {where_sql} ORDER BY rowid;", params + where_params
+            ).fetchnumpy() if projections else {}
+            position = 0
+            for block in stale:
+                width = len(block['sql'])
+                if block is label:
+                    matrix = np.asarray(arrays['f' + str(position)], dtype=np.float64)
+                else:
+                    matrix = np.column_stack([np.asarray(arrays[f"f{position + i}"], dtype=np.float64)
+                                              for i in range(width)]) if width else np.empty((rows, 0))
+                position += width
+                tmp_path = f"{self._block_path(block['key'])}.{os.getpid()}.tmp.npy"
+                np.save(tmp_path, matrix)
+                os.replace(tmp_path, self._block_path(block['key']))
+        self.rebuilt += len(stale)
+        self.reused += len(blocks) + 1 - len(stale)
+
+        manifest = {
+            'rows': rows,
+            'label': label['key'],
+            'blocks': [{'key': block['key'], 'column': block['column'], 'names': block['names']} for block in blocks]
+        }
+        with open(self._manifest_path(name, fingerprint), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return self._assemble(manifest)
+
+
+def stratified_folds(y, folds, seed=SAMPLE_SEED):
+    """Return test-index arrays for folds that keep each class's share"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    assignments = np.empty(len(y), dtype=np.int64)
+    for value in np.unique(y):
+        members = np.flatnonzero(y == value)
+        rng.shuffle(members)
+        assignments[members] = np.arange(len(members)) % folds
+    return [np.flatnonzero(assignments == fold) for fold in range(folds)]
+
+
+class LogisticRegression:
+    """L2-regularized logistic regression fit by Newton's method on standardized features"""
+
+    def __init__(self, l2=1.0, iterations=50, tolerance=1e-6, balanced=True):
+        self.l2 = l2
+        self.iterations = iterations
+        self.tolerance = tolerance
+        self.balanced = balanced  # weight classes inversely to their frequency, as outcomes are rare
+
+    def fit(self, X, y):
+        import numpy as np
+
+        self.mean = X.mean(axis=0)
+        self.scale = X.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        Xb = np.hstack([np.ones((len(X), 1)), (X - self.mean) / self.scale])
+        weights = np.ones(len(y))
+        if self.balanced:
+            positives = y.sum()
+            if 0 < positives < len(y):
+                weights = np.where(y == 1, len(y) / (2 * positives), len(y) / (2 * (len(y) - positives)))
+
+        penalty = np.full(Xb.shape[1], self.l2)
+        penalty[0] = 0.0  # the intercept is not shrunk
+        self.coefficients = np.zeros(Xb.shape[1])
+        for _ in range(self.iterations):
+            p = 1.0 / (1.0 + np.exp(-(Xb @ self.coefficients)))
+            gradient = Xb.T @ (weights * (p - y)) + penalty * self.coefficients
+            hessian = (Xb.T * (weights * p * (1 - p))) @ Xb + np.diag(penalty)
+            step = np.linalg.solve(hessian + 1e-9 * np.eye(len(penalty)), gradient)
+            self.coefficients -= step
+            if np.abs(step).max() < self.tolerance:
+                break
+        return self
+
+    def predict_proba(self, X):
+        import numpy as np
+
+        z = self.coefficients[0] + ((X - self.mean) / self.scale) @ self.coefficients[1:]
+        return 1.0 / (1.0 + np.exp(-z))
+
+
+class GaussianNaiveBayes:
+    """Gaussian naive Bayes with variance smoothing"""
+
+    def __init__(self, smoothing=1e-9):
+        self.smoothing = smoothing
+
+    def fit(self, X, y):
+        import numpy as np
+
+        epsilon = self.smoothing * max(X.var(axis=0).max(), 1e-12) if X.size else self.smoothing
+        self.log_priors = []
+        self.means = []
+        self.variances = []
+        for value in (0, 1):
+            members = X[y == value]
+            self.log_priors.append(np.log(max(len(members), 1) / len(X)))
+            self.means.append(members.mean(axis=0) if len(members) else np.zeros(X.shape[1]))
+            self.variances.append((members.var(axis=0) if len(members) else np.zeros(X.shape[1])) + epsilon)
+        return self
+
+    def predict_proba(self, X):
+        import numpy as np
+
+        log_likelihoods = [
+            log_prior - 0.5 * (np.log(2 * np.pi * variance) + (X - mean) ** 2 / variance).sum(axis=1)
+            for log_prior, mean, variance in zip(self.log_priors, self.means, self.variances)
+        ]
+        # Posterior of class 1 as a logistic of the log-odds, stable for large magnitudes
+        return 1.0 / (1.0 + np.exp(np.clip(log_likelihoods[0] - log_likelihoods[1], -700, 700)))
+
+
+MODEL_TYPES = {
+    'logistic_regression': LogisticRegression,
+    'naive_bayes': GaussianNaiveBayes
+}
+
+
+def roc_auc(y, scores):
+    """Area under the ROC curve from average ranks (the Mann-Whitney statistic)"""
+    import numpy as np
+
+    positives = int(y.sum())
+    negatives = len(y) - positives
+    if not positives or not negatives:
+        return None
+    order = np.argsort(scores, kind='mergesort')
+    ranks = np.empty(len(scores))
+    ranks[order] = np.arange(1, len(scores) + 1)
+    # Tied scores share their average rank
+    _, inverse, counts = np.unique(scores, return_inverse=True, return_counts=True)
+    rank_sums = np.bincount(inverse, weights=ranks)
+    ranks = (rank_sums / counts)[inverse]
+    return float((ranks[y == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def classification_metrics(y, probabilities, threshold=DECISION_THRESHOLD):
+    """Confusion counts and the rates reported in assets/Source_code.R, plus ROC AUC"""
+    predicted = probabilities >= threshold
+    actual = y == 1
+    tp = int((predicted & actual).sum())
+    tn = int((~predicted & ~actual).sum())
+    fp = int((predicted & ~actual).sum())
+    fn = int((~predicted & actual).sum())
+
+    def ratio(numerator, denominator):
+        return numerator / denominator if denominator else None
+
+    precision = ratio(tp, tp + fp)
+    recall = ratio(tp, tp + fn)
+    return {
+        'tp': tp, 'tn': tn, 'fp': fp, 'fn': fn,
+        'accuracy': ratio(tp + tn, len(y)),
+        'precision': precision,
+        'recall': recall,
+        'specificity': ratio(tn, tn + fp),
+        'f1': ratio(2 * precision * recall, precision + recall) if precision is not None and recall is not None else None,
+        'roc_auc': roc_auc(y, probabilities)
+    }
+
+
+def _fit_fold(model_type, X, y, test_index):
+    import numpy as np
+
+    train = np.ones(len(y), dtype=bool)
+    train[test_index] = False
+    model = MODEL_TYPES[model_type]().fit(X[train], y[train])
+    return classification_metrics(y[test_index], model.predict_proba(X[test_index]))
+
+
+def cross_validate(X, y, model_types=None, folds=DEFAULT_FOLDS, max_workers=None):
+    """Score every model type on every fold concurrently; returns {model: {'folds': [...], 'mean': {...}}}"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    model_types = list(model_types or MODEL_TYPES)
+    test_indexes = stratified_folds(y, folds)
+    # NumPy releases the GIL in its linear algebra, so threads share X without copying it per worker
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {(model_type, fold): executor.submit(_fit_fold, model_type, X, y, test_index)
+                   for model_type in model_types for fold, test_index in enumerate(test_indexes)}
+        scores = {model_type: [futures[(model_type, fold)].result() for fold in range(folds)]
+                  for model_type in model_types}
+
+    results = {}
+    for model_type, fold_metrics in scores.items():
+        mean = {}
+        for metric in ['accuracy', 'precision', 'recall', 'specificity', 'f1', 'roc_auc']:
+            values = [fold[metric] for fold in fold_metrics if fold[metric] is not None]
+            mean[metric] = round(sum(values) / len(values), 4) if values else None
+        results[model_type] = {'folds': fold_metrics, 'mean': mean}
+    return results
+
+
+def train_models(X, y, names, folds=DEFAULT_FOLDS, max_workers=None, top_features=10):
+    """Cross-validate every model type and fit the logistic model on all rows for its strongest features"""
+    import numpy as np
+
+    started = time.perf_counter()
+    results = {
+        'rows': int(len(y)),
+        'features': len(names),
+        'positive_rate': round(100.0 * float(y.mean()), 2) if len(y) else None,
+        'folds': folds,
+        'models': cross_validate(X, y, folds=folds, max_workers=max_workers)
+    }
+    model = LogisticRegression().fit(X, y)
+    strongest = np.argsort(-np.abs(model.coefficients[1:]))[:top_features]
+    results['top_features'] = [{'feature': names[i], 'coefficient': round(float(model.coefficients[1 + i]), 4)}
+                               for i in strongest]
+    results['training_seconds'] = round(time.perf_counter() - started, 3)
+    return results
+
+
+def print_model_results(name, results, cache):
+    print(f"\n🤖 {name.title()} Models: {results['rows']:,} rows, {results['features']} features, "
+          f"{results['positive_rate']}% positive, {results['folds']}-fold cross-validation")
+    print(f"   Feature blocks: {cache.rebuilt} rebuilt, {cache.reused} reused from cache")
+    for model_type, scores in results['models'].items():
+        mean = scores['mean']
+        formatted = ', '.join(f"{metric} {value:.3f}" for metric, value in mean.items() if value is not None)
+        print(f"   {model_type.replace('_', ' ')}: {formatted}")
+    print("   Strongest logistic regression features (standardized):")
+    for feature in results['top_features']:
+        print(f"      {feature['feature']}: {feature['coefficient']:+.3f}")
+
+
+def model_dataset(con, table, name, spec, fingerprint, cache=None, folds=DEFAULT_FOLDS, max_workers=None):
+    """Build (or reuse) the feature matrices for table and train on them"""
+    cache = cache or FeatureCache()
+    matrices = cache.load(name, fingerprint) or cache.build(con, table, name, spec, fingerprint)
+    return train_models(*matrices, folds=folds, max_workers=max_workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train and cross-validate attrition or returns classifiers')
+    parser.add_argument('target', choices=[name for name, spec in MODEL_SPECS.items() if 'csv' in spec])
+    parser.add_argument('--csv', help='train on this CSV instead of the shipped dataset')
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS)
+    parser.add_argument('--workers', type=int, help='threads for the cross-validation folds')
+    parser.add_argument('--cache-dir', default='.duckdb_cache', help='Parquet cache directory')
+    parser.add_argument('--feature-cache-dir', default=FEATURE_CACHE_DIR, help='encoded feature block directory')
+    parser.add_argument('--output', default=MODEL_RESULTS_FILE, help='write the model results as JSON here')
+    args = parser.parse_args(argv)
+
+    spec = MODEL_SPECS[args.target]
+    csv_file_path = args.csv or spec['csv']
+    if not os.path.exists(csv_file_path):
+        print(f"❌ File not found at: {csv_file_path}")
+        return
+    if args.folds < 2:
+        parser.error('--folds must be at least 2')
+
+    cache = FeatureCache(args.feature_cache_dir)
+    fingerprint = dataset_fingerprint([csv_file_path], {'model': args.target})
+    matrices = cache.load(args.target, fingerprint)
+    try:
+        if matrices is None:
+            import duckdb
+
+            # Only a new or changed dataset is loaded into DuckDB
+            con = duckdb.connect(database=':memory:')
+            try:
+                load_table(con, csv_file_path, 'dataset', args.cache_dir)
+                matrices = cache.build(con, 'dataset', args.target, spec, fingerprint)
+            finally:
+                con.close()
+        results = train_models(*matrices, folds=args.folds, max_workers=args.workers)
+    except Exception as e:
+        print(f"❌ Error training {args.target} models: {e}")
+        return
+
+    print_model_results(args.target, results, cache)
+    with open(args.output, 'w') as f:
+        json.dump({args.target: results}, f, indent=2)
+    print(f"\n✅ Model results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Query Instrumentation
+Records wall time, rows scanned/returned and DuckDB profiles for every query,
+plus pipeline stage spans, and writes them as JSON or a Chrome trace
+"""
+
+import contextlib
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Setting either variable turns instrumentation on without code changes
+PROFILE_ENV_VAR = 'AMAZON_ANALYSIS_PROFILE'
+TRACE_ENV_VAR = 'AMAZON_ANALYSIS_TRACE'
+
+SCAN_OPERATORS = ('TABLE_SCAN', 'READ_CSV', 'READ_PARQUET', 'SEQ_SCAN')
+
+
+def _tree_nodes(node):
+    yield node
+    for child in node.get('children', []):
+        yield from _tree_nodes(child)
+
+
+def rows_scanned(profile):
+    """Return rows scanned from a DuckDB JSON profile, falling back to scan operator cardinalities"""
+    if 'cumulative_rows_scanned' in profile:
+        return profile['cumulative_rows_scanned']
+    total = 0
+    for node in _tree_nodes(profile):
+        operator = node.get('operator_type') or node.get('name') or ''
+        if any(scan in operator.upper() for scan in SCAN_OPERATORS):
+            total += node.get('operator_cardinality', node.get('cardinality', 0))
+    return total
+
+
+def rows_returned(profile):
+    """Return result rows from a DuckDB JSON profile"""
+    if 'rows_returned' in profile:
+        return profile['rows_returned']
+    children = profile.get('children') or [{}]
+    return children[0].get('operator_cardinality', children[0].get('cardinality'))
+
+
+class QueryRecorder:
+    def __init__(self, profile_path=None, trace_path=None):
+        self.profile_path = profile_path
+        self.trace_path = trace_path
+        self.queries = []
+        self.stages = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls):
+        """Return a recorder when the profiling environment variables are set, else None"""
+        profile_path = os.environ.get(PROFILE_ENV_VAR)
+        trace_path = os.environ.get(TRACE_ENV_VAR)
+        if not profile_path and not trace_path:
+            return None
+        return cls(profile_path or 'amazon_analysis_profile.json', trace_path)
+
+    def _offset(self, timestamp):
+        return timestamp - self._origin
+
+    def record_query(self, sql, label, start, end, profile):
+        entry = {
+            'connection': label,
+            'thread': threading.get_ident(),
+            'sql': ' '.join(sql.split()),
+            'start_seconds': self._offset(start),
+            'wall_seconds': end - start,
+            'rows_scanned': rows_scanned(profile) if profile else None,
+            'rows_returned': rows_returned(profile) if profile else None,
+            'profile': profile
+        }
+        with self._lock:
+            self.queries.append(entry)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Record a pipeline stage span"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.stages.append({
+                    'stage': name,
+                    'thread': threading.get_ident(),
+                    'start_seconds': self._offset(start),
+                    'wall_seconds': end - start
+                })
+
+    def report(self):
+        return {
+            'stages': self.stages,
+            'queries': self.queries,
+            'total_query_seconds': sum(query['wall_seconds'] for query in self.queries),
+            'total_rows_scanned': sum(query['rows_scanned'] or 0 for query in self.queries)
+        }
+
+    def chrome_trace(self):
+        """Return stages and queries as Chrome trace-event JSON (load in chrome://tracing or Perfetto)"""
+        events = []
+        for stage in self.stages:
+            events.append({
+                'name': stage['stage'], 'cat': 'stage', 'ph': 'X', 'pid': os.getpid(), 'tid': stage['thread'],
+                'ts': stage['start_seconds'] * 1e6, 'dur': stage['wall_seconds'] * 1e6
+            })
+        for query in self.queries:
+            events.append({
+                'name': query['sql'][:80], 'cat': 'query', 'ph': 'X', 'pid': os.getpid(), 'tid': query['thread'],
+                'ts': query['start_seconds'] * 1e6, 'dur': query['wall_seconds'] * 1e6,
+                'args': {'sql': query['sql'], 'rows_scanned': query['rows_scanned'],
+                         'rows_returned': query['rows_returned'], 'connection': query['connection']}
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self):
+        """Write the JSON report and, if requested, the Chrome trace; returns the written paths"""
+        written = []
+        if self.profile_path:
+            with open(self.profile_path, 'w') as f:
+                json.dump(self.report(), f, indent=2, default=str)
+            written.append(self.profile_path)
+        if self.trace_path:
+            with open(self.trace_path, 'w') as f:
+                json.dump(self.chrome_trace(), f, default=str)
+            written.append(self.trace_path)
+        return written
+
+
+class InstrumentedConnection:
+    """Wraps a DuckDB connection so every execute() is timed and profiled"""
+
+    def __init__(self, con, recorder, label='main'):
+        self._con = con
+        self._recorder = recorder
+        self._label = label
+        self._cursor_ids = itertools.count(1)
+        self._pending = None
+
+        fd, self._profile_file = tempfile.mkstemp(suffix='.json', prefix='duckdb_profile_')
+        os.close(fd)
+        con.execute("SET enable_profiling = 'json';")
+        con.execute(f"SET profiling_output = '{self._profile_file}';")
+
+    def _read_profile(self):
+        # Consume the file so a query that writes no profile is never paired with a stale one
+        try:
+            with open(self._profile_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+        finally:
+            if os.path.exists(self._profile_file):
+                os.remove(self._profile_file)
+
+    def execute(self, query, parameters=None):
+        self._finish_pending()
+        start = time.perf_counter()
+        if parameters is None:
+            self._con.execute(query)
+        else:
+            self._con.execute(query, parameters)
+
+        # Statements without a result set are profiled on completion; SELECTs only once fetched
+        profile = self._read_profile()
+        if profile is not None:
+            self._recorder.record_query(query, self._label, start, time.perf_counter(), profile)
+        else:
+            self._pending = (query, start)
+        return _InstrumentedResult(self)
+
+    def _finish_pending(self):
+        if self._pending:
+            query, start = self._pending
+            self._pending = None
+            self._recorder.record_query(query, self._label, start, time.perf_counter(), self._read_profile())
+
+    def cursor(self):
+        label = f"{self._label}-cursor-{next(self._cursor_ids)}"
+        return InstrumentedConnection(self._con.cursor(), self._recorder, label)
+
+    def close(self):
+        self._finish_pending()
+        self._con.close()
+        if os.path.exists(self._profile_file):
+            os.remove(self._profile_file)
+
+    def __getattr__(self, name):
+        return getattr(self._con, name)
+
+
+class _InstrumentedResult:
+    """Result handle that completes the pending query record when its rows are fetched"""
+
+    FETCH_METHODS = ('fetchall', 'fetchone', 'fetchmany', 'fetchnumpy', 'fetchdf', 'df', 'arrow',
+                     'to_arrow_table', 'to_arrow_reader', 'fetch_arrow_table', 'fetch_record_batch', 'pl')
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __getattr__(self, name):
+        attribute = getattr(self._connection._con, name)
+        if name not in self.FETCH_METHODS:
+            return attribute
+
+        def fetch(*args, **kwargs):
+            result = attribute(*args, **kwargs)
+            self._connection._finish_pending()
+            return result
+        return fetch
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Query Result Cache
+Stores query results on disk as Arrow IPC files keyed by dataset fingerprint,
+normalized SQL and parameters, evicting least recently used entries beyond a
+size budget
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+DEFAULT_CACHE_DIR = os.path.join('.duckdb_cache', 'results')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Quoted literals and identifiers are kept verbatim while normalizing the rest
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_COMMENT = re.compile(r"--[^\n]*")
+
+
+def normalize_sql(sql):
+    """Strip comments, collapse whitespace and drop trailing semicolons outside quoted text"""
+    parts = _QUOTED.split(sql)
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r'\s+', ' ', _COMMENT.sub(' ', parts[i]))
+    return ''.join(parts).strip().rstrip(';').strip()
+
+
+def dataset_fingerprint(paths, options=None):
+    """Fingerprint source files by path, size and mtime, plus any load options that shape the table"""
+    entries = []
+    for path in sorted(paths):
+        stat = os.stat(path)
+        entries.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+    payload = json.dumps([entries, options or {}], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class QueryResultCache:
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, fingerprint, sql, parameters=None):
+        payload = json.dumps([fingerprint, normalize_sql(sql), parameters], default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.arrow')
+
+    def get(self, key):
+        """Return the cached Arrow table for a key, or None on a miss"""
+        import pyarrow as pa
+
+        path = self._path(key)
+        try:
+            with pa.OSFile(path, 'rb') as f:
+                entry = pa.ipc.open_file(f).read_all()
+            os.utime(path)  # mtime doubles as the LRU recency stamp
+        except (OSError, ValueError):  # missing, or truncated (pyarrow.ArrowInvalid)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, key, table):
+        import pyarrow as pa
+
+        path = self._path(key)
+        # Unique per process and thread, since batch workers may share the cache directory
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with pa.OSFile(tmp_path, 'wb') as f:
+            with pa.ipc.new_file(f, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.arrow'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def fetch(self, con, fingerprint, sql, parameters=None, before_miss=None):
+        """Return the result as an Arrow table from the cache, running the query on con only on a miss"""
+        key = self.key(fingerprint, sql, parameters)
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+
+        if before_miss:
+            before_miss()
+        cursor = con.execute(sql) if parameters is None else con.execute(sql, parameters)
+        table = cursor.to_arrow_table()
+        self.put(key, table)
+        return table
+
+    def stats_line(self):
+        return f"🗄️ Result cache: {self.hits} hit(s), {self.misses} miss(es), {self.evictions} eviction(s)"
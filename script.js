@@ -276,6 +276,12 @@ const getProjectVisualization = (projectType) => {
                 <span id="ecom-page-info">Page 1</span>
                 <button id="ecom-next">Next</button>
               </div>
+              <div class="filters">
+                <select id="ecom-filter-category" data-filter="category"><option value="">All categories</option></select>
+                <select id="ecom-filter-channel" data-filter="channel"><option value="">All channels</option></select>
+                <select id="ecom-filter-country" data-filter="country"><option value="">All countries</option></select>
+                <select id="ecom-filter-order_status" data-filter="order_status"><option value="">All statuses</option></select>
+              </div>
               <div>
                 Rows per page:
                 <select id="ecom-page-size">
@@ -474,10 +480,23 @@ document.addEventListener('click', (e) => {
 });
 
 // ----- Tabs + Data (CSV) -----
+// Pages are served by the local analytics service (start_duckdb_server.py) only when the page
+// opts in with ?api=http://localhost:4213 or <script data-api-base="...">, so ordinary visitors
+// never probe their own localhost; otherwise the CSV is downloaded once and paged in the browser.
+const ECOM_API_BASE = new URLSearchParams(window.location.search).get('api')
+  || (document.currentScript && document.currentScript.dataset.apiBase) || '';
+const ECOM_FILTER_COLUMNS = ['category', 'channel', 'country', 'order_status'];
+let __ecomSource = null;
 let __ecomCsvRows = null;
 let __ecomHeaders = null;
 let __ecomPage = 1;
 let __ecomPageSize = 20;
+let __ecomTotalPages = 1;
+let __ecomSort = null;
+let __ecomDesc = false;
+let __ecomFilters = {};
+let __ecomRequest = 0;
+let __ecomAbort = null;
 
 const initEcommerceTabs = () => {
   const buttons = document.querySelectorAll('.tab-button');
@@ -499,8 +518,9 @@ const initializeEcommerceDataTab = async () => {
   const next = document.getElementById('ecom-next');
   const pageInfo = document.getElementById('ecom-page-info');
   const pageSizeSel = document.getElementById('ecom-page-size');
+  const table = document.getElementById('ecom-table');
 
-  if (!prev || !next || !pageInfo || !pageSizeSel) return;
+  if (!prev || !next || !pageInfo || !pageSizeSel || !table) return;
 
   pageSizeSel.addEventListener('change', () => {
     __ecomPageSize = parseInt(pageSizeSel.value, 10);
@@ -511,31 +531,104 @@ const initializeEcommerceDataTab = async () => {
     if (__ecomPage > 1) { __ecomPage -= 1; renderEcommerceTable(); }
   });
   next.addEventListener('click', () => {
-    const totalPages = Math.ceil((__ecomCsvRows?.length || 0) / __ecomPageSize);
-    if (__ecomPage < totalPages) { __ecomPage += 1; renderEcommerceTable(); }
+    if (__ecomPage < __ecomTotalPages) { __ecomPage += 1; renderEcommerceTable(); }
+  });
+  document.querySelectorAll('[data-filter]').forEach(sel => {
+    sel.addEventListener('change', () => {
+      __ecomFilters[sel.dataset.filter] = sel.value;
+      __ecomPage = 1;
+      renderEcommerceTable();
+    });
+  });
+  table.addEventListener('click', (e) => {
+    const column = e.target.dataset && e.target.dataset.sort;
+    if (!column) return;
+    __ecomDesc = __ecomSort === column ? !__ecomDesc : false;
+    __ecomSort = column;
+    __ecomPage = 1;
+    renderEcommerceTable();
   });
 
-  if (!__ecomCsvRows) {
-    await loadEcommerceCsv();
+  if (!__ecomSource) {
+    __ecomSource = await loadEcommerceFacets() ? 'api' : 'csv';
+    if (__ecomSource === 'csv') await loadEcommerceCsv();
   }
   renderEcommerceTable();
 };
 
+const fillEcommerceFilters = (facets) => {
+  ECOM_FILTER_COLUMNS.forEach(column => {
+    const sel = document.getElementById(`ecom-filter-${column}`);
+    if (!sel || !facets[column]) return;
+    sel.innerHTML = sel.options[0].outerHTML +
+      facets[column].map(v => `<option value="${escapeHtml(v)}">${escapeHtml(v)}</option>`).join('');
+  });
+};
+
+const loadEcommerceFacets = async () => {
+  if (!ECOM_API_BASE) return false;
+  try {
+    const res = await fetch(`${ECOM_API_BASE}/ecommerce/facets`);
+    if (!res.ok) return false;
+    fillEcommerceFilters(await res.json());
+    return true;
+  } catch (_) {
+    return false;
+  }
+};
+
 const loadEcommerceCsv = async () => {
   // Try loading user's CSV placed in assets. Falls back silently if missing.
   try {
-    const res = await fetch(`assets/cleaned_data.csv?v=${Date.now()}`);
+    const res = await fetch('assets/cleaned_data.csv');
     if (!res.ok) return;
     const text = await res.text();
     const lines = text.split(/\r?\n/).filter(l => l.trim().length > 0);
     if (lines.length === 0) return;
     __ecomHeaders = parseCsvLine(lines[0]);
     __ecomCsvRows = lines.slice(1).map(parseCsvLine);
+    const facets = {};
+    ECOM_FILTER_COLUMNS.forEach(column => {
+      const index = __ecomHeaders.indexOf(column);
+      if (index >= 0) facets[column] = [...new Set(__ecomCsvRows.map(r => r[index]))].sort();
+    });
+    fillEcommerceFilters(facets);
   } catch (_) {
     // ignore
   }
 };
 
+// Server-side page: only the requested rows cross the wire, and unchanged pages revalidate by ETag
+const fetchEcommercePage = async (signal) => {
+  const params = new URLSearchParams({ page: __ecomPage, page_size: __ecomPageSize });
+  if (__ecomSort) { params.set('sort', __ecomSort); params.set('desc', __ecomDesc ? '1' : '0'); }
+  Object.entries(__ecomFilters).forEach(([column, value]) => value && params.append(column, value));
+  const res = await fetch(`${ECOM_API_BASE}/ecommerce/orders?${params}`, { cache: 'no-cache', signal });
+  if (!res.ok) return null;
+  return res.json();
+};
+
+// Client-side fallback with the same filtering, sorting and paging semantics
+const pageEcommerceCsv = () => {
+  if (!__ecomHeaders) return null;
+  let rows = __ecomCsvRows.filter(r => Object.entries(__ecomFilters).every(([column, value]) =>
+    !value || r[__ecomHeaders.indexOf(column)] === value));
+  if (__ecomSort) {
+    const index = __ecomHeaders.indexOf(__ecomSort);
+    const numeric = rows.every(r => r[index] === '' || !isNaN(r[index]));
+    rows = rows.slice().sort((a, b) => {
+      const order = numeric ? Number(a[index]) - Number(b[index]) : a[index].localeCompare(b[index]);
+      return __ecomDesc ? -order : order;
+    });
+  }
+  const start = (__ecomPage - 1) * __ecomPageSize;
+  return {
+    columns: __ecomHeaders,
+    rows: rows.slice(start, start + __ecomPageSize),
+    total_pages: Math.ceil(rows.length / __ecomPageSize) || 1
+  };
+};
+
 const parseCsvLine = (line) => {
   const result = [];
   let current = '';
@@ -556,21 +649,30 @@ const parseCsvLine = (line) => {
   return result;
 };
 
-const renderEcommerceTable = () => {
+const renderEcommerceTable = async () => {
   const table = document.getElementById('ecom-table');
   const pageInfo = document.getElementById('ecom-page-info');
-  if (!table || !__ecomHeaders) {
+  // Only the latest request renders: a newer page, sort or filter click aborts the one in flight
+  const request = ++__ecomRequest;
+  if (__ecomAbort) __ecomAbort.abort();
+  const controller = __ecomAbort = __ecomSource === 'api' ? new AbortController() : null;
+  let data = null;
+  try {
+    data = controller ? await fetchEcommercePage(controller.signal) : pageEcommerceCsv();
+  } catch (_) {
+    // ignore
+  }
+  if (request !== __ecomRequest) return;
+  if (!table || !data) {
     table && (table.innerHTML = '<tbody><tr><td>CSV not found at assets/cleaned_data.csv</td></tr></tbody>');
     return;
   }
-  const start = (__ecomPage - 1) * __ecomPageSize;
-  const end = Math.min(start + __ecomPageSize, __ecomCsvRows.length);
-  const rows = __ecomCsvRows.slice(start, end);
-  const thead = `<thead><tr>${__ecomHeaders.map(h => `<th>${escapeHtml(h)}</th>`).join('')}</tr></thead>`;
-  const tbody = `<tbody>${rows.map(r => `<tr>${r.map(c => `<td>${escapeHtml(c)}</td>`).join('')}</tr>`).join('')}</tbody>`;
+  const arrow = (h) => h === __ecomSort ? (__ecomDesc ? ' ▼' : ' ▲') : '';
+  const thead = `<thead><tr>${data.columns.map(h => `<th data-sort="${escapeHtml(h)}">${escapeHtml(h)}${arrow(h)}</th>`).join('')}</tr></thead>`;
+  const tbody = `<tbody>${data.rows.map(r => `<tr>${r.map(c => `<td>${escapeHtml(c ?? '')}</td>`).join('')}</tr>`).join('')}</tbody>`;
   table.innerHTML = thead + tbody;
-  const totalPages = Math.ceil(__ecomCsvRows.length / __ecomPageSize) || 1;
-  pageInfo.textContent = `Page ${__ecomPage} of ${totalPages}`;
+  __ecomTotalPages = data.total_pages;
+  pageInfo.textContent = `Page ${__ecomPage} of ${__ecomTotalPages}`;
 };
 
 const escapeHtml = (s) => String(s)
@@ -5,9 +5,12 @@ Handles encoding issues and creates basic analysis
 """
 
 import duckdb
-import pandas as pd
 import json
 
+from analysis_registry import ANALYSIS_REGISTRY, compile_analysis_query
+from csv_schema import CsvSchemaContract
+from query_result_cache import DEFAULT_CACHE_DIR, QueryResultCache, dataset_fingerprint
+
 def run_analysis():
     print("🚀 Starting Amazon Analysis...")
     
@@ -15,105 +18,66 @@ def run_analysis():
     con = duckdb.connect(database=':memory:')
     
     try:
-        # Try different encodings
         csv_file = r'C:\Users\swath\DashCam_Practicum\temp_portfolio\hq4743.github.io\Amazon Sale Report.csv'
         
-        # Load data with UTF-8 first
-        try:
-            con.execute(f"""
-                CREATE OR REPLACE TABLE amazon_sales AS
-                SELECT * FROM read_csv_auto('{csv_file}', HEADER=TRUE, ENCODING='UTF8');
-            """)
-            print("✅ Loaded data with UTF-8 encoding")
-        except:
-            try:
-                con.execute(f"""
-                    CREATE OR REPLACE TABLE amazon_sales AS
-                    SELECT * FROM read_csv_auto('{csv_file}', HEADER=TRUE, ENCODING='LATIN1');
-                """)
-                print("✅ Loaded data with LATIN1 encoding")
-            except:
-                con.execute(f"""
-                    CREATE OR REPLACE TABLE amazon_sales AS
-                    SELECT * FROM read_csv_auto('{csv_file}', HEADER=TRUE);
-                """)
-                print("✅ Loaded data with auto-detected encoding")
-        
+        # Results are served from the cache while the CSV is unchanged; the data is
+        # only loaded when a query misses
+        cache = QueryResultCache(DEFAULT_CACHE_DIR)
+        fingerprint = dataset_fingerprint([csv_file])
+        loaded = []
+
+        def load_data():
+            if loaded:
+                return
+            # Encoding and column types come from the schema contract recorded on first sight
+            contract = CsvSchemaContract(csv_file).load(con)
+            contract.execute(con, lambda source, params: (
+                f"CREATE OR REPLACE TABLE amazon_sales AS SELECT * FROM {source};", params
+            ))
+            print(f"✅ Loaded data with {contract.encoding} encoding")
+            loaded.append(True)
+
+        def query(sql, params=None):
+            return cache.fetch(con, fingerprint, sql, params, before_miss=load_data).to_pylist()
+
+        def analysis(key, **overrides):
+            return query(*compile_analysis_query(ANALYSIS_REGISTRY[key], **overrides))
+
         # Get basic stats
-        result = con.execute("SELECT COUNT(*) as total_records FROM amazon_sales").fetchone()
-        print(f"📊 Total Records: {result[0]:,}")
+        total_records = query("SELECT COUNT(*) as total_records FROM amazon_sales")[0]['total_records']
+        print(f"📊 Total Records: {total_records:,}")
         
         # Channel analysis
-        channel_query = """
-        SELECT 
-            Fulfilment,
-            COUNT(*) as total_orders,
-            SUM(Amount) as total_revenue,
-            ROUND(100.0 * SUM(Amount) / (SELECT SUM(Amount) FROM amazon_sales WHERE Amount > 0), 2) as revenue_percentage,
-            COUNT(CASE WHEN Status IN ('Cancelled', 'Undelivered', 'RTO', 'Lost') THEN 1 END) as failed_orders,
-            ROUND(100.0 * COUNT(CASE WHEN Status IN ('Cancelled', 'Undelivered', 'RTO', 'Lost') THEN 1 END) / COUNT(*), 2) as failure_rate
-        FROM amazon_sales
-        WHERE Amount > 0
-        GROUP BY Fulfilment
-        ORDER BY total_revenue DESC;
-        """
-        
-        channel_results = con.execute(channel_query).fetchall()
+        channel_results = analysis('channel_analysis')
         print(f"\n🚚 Channel Performance:")
         for row in channel_results:
-            print(f"   {row[0]}: {row[3]}% revenue, {row[5]}% failure rate")
+            print(f"   {row['fulfillment']}: {row['revenue_percentage']}% revenue, {row['failure_rate']}% failure rate")
         
         # Geographic analysis
-        geo_query = """
-        SELECT 
-            "ship-state" as state,
-            COUNT(*) as total_orders,
-            COUNT(CASE WHEN Status IN ('Cancelled', 'Undelivered', 'RTO', 'Lost') THEN 1 END) as failed_orders,
-            ROUND(100.0 * COUNT(CASE WHEN Status IN ('Cancelled', 'Undelivered', 'RTO', 'Lost') THEN 1 END) / COUNT(*), 2) as failure_rate
-        FROM amazon_sales
-        WHERE Amount > 0 AND "ship-state" IS NOT NULL
-        GROUP BY "ship-state"
-        HAVING COUNT(*) >= 50
-        ORDER BY failure_rate DESC
-        LIMIT 5;
-        """
-        
-        geo_results = con.execute(geo_query).fetchall()
+        geo_results = analysis('geographic_analysis', min_orders=50, limit=5)
         print(f"\n🗺️ Top 5 States by Failure Rate:")
         for row in geo_results:
-            print(f"   {row[0]}: {row[3]}% failure rate ({row[2]} failed out of {row[1]} orders)")
+            print(f"   {row['state']}: {row['failure_rate']}% failure rate ({row['failed_orders']} failed out of {row['total_orders']} orders)")
         
         # Category analysis
-        category_query = """
-        SELECT 
-            Category,
-            COUNT(*) as total_orders,
-            SUM(Amount) as total_revenue,
-            ROUND(100.0 * SUM(Amount) / (SELECT SUM(Amount) FROM amazon_sales WHERE Amount > 0), 2) as revenue_percentage
-        FROM amazon_sales
-        WHERE Amount > 0 AND Category IS NOT NULL
-        GROUP BY Category
-        ORDER BY total_revenue DESC
-        LIMIT 5;
-        """
-        
-        category_results = con.execute(category_query).fetchall()
+        category_results = analysis('category_analysis', limit=5)
         print(f"\n📦 Top 5 Categories by Revenue:")
         for row in category_results:
-            print(f"   {row[0]}: {row[3]}% revenue share (₹{row[2]:,.2f})")
+            print(f"   {row['category']}: {row['revenue_percentage']}% revenue share (₹{row['total_revenue']:,.2f})")
         
         # Save results
         results = {
-            'total_records': result[0],
-            'channel_analysis': [{'fulfillment': r[0], 'revenue_percentage': r[3], 'failure_rate': r[5]} for r in channel_results],
-            'geographic_analysis': [{'state': r[0], 'failure_rate': r[3], 'failed_orders': r[2], 'total_orders': r[1]} for r in geo_results],
-            'category_analysis': [{'category': r[0], 'revenue_percentage': r[3], 'total_revenue': r[2]} for r in category_results]
+            'total_records': total_records,
+            'channel_analysis': [{'fulfillment': r['fulfillment'], 'revenue_percentage': r['revenue_percentage'], 'failure_rate': r['failure_rate']} for r in channel_results],
+            'geographic_analysis': [{'state': r['state'], 'failure_rate': r['failure_rate'], 'failed_orders': r['failed_orders'], 'total_orders': r['total_orders']} for r in geo_results],
+            'category_analysis': [{'category': r['category'], 'revenue_percentage': r['revenue_percentage'], 'total_revenue': r['total_revenue']} for r in category_results]
         }
         
         with open('amazon_analysis_results.json', 'w') as f:
             json.dump(results, f, indent=2)
         
         print(f"\n✅ Analysis complete! Results saved to amazon_analysis_results.json")
+        print(cache.stats_line())
         
     except Exception as e:
         print(f"❌ Error: {e}")
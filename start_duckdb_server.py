@@ -1,103 +1,107 @@
 #!/usr/bin/env python3
 """
 DuckDB Server Starter Script
-Starts the DuckDB web interface on localhost:4213
+Starts the in-process Amazon analytics service on localhost:4213
 """
 
-import subprocess
+import argparse
 import sys
-import os
-import webbrowser
 import time
+import webbrowser
+
+from amazon_analysis_generator import DEFAULT_CSV_PATH
+from ecommerce_table import DEFAULT_ECOMMERCE_CSV
+from analytics_service import (DEFAULT_HOST, DEFAULT_POLL_SECONDS, DEFAULT_PORT, DEFAULT_QUEUE_SIZE,
+                               DEFAULT_WORKERS, start_service, wait_until_ready)
+
+def start_duckdb_server(args):
+    """Start the analytics service and block until interrupted"""
+    print("🚀 Starting DuckDB Analytics Service...")
 
-def start_duckdb_server():
-    """Start DuckDB web interface server"""
-    print("🚀 Starting DuckDB Web Interface...")
-    
-    # Check if DuckDB is installed
     try:
-        result = subprocess.run(['duckdb', '--version'], capture_output=True, text=True)
-        if result.returncode == 0:
-            print(f"✅ DuckDB found: {result.stdout.strip()}")
-        else:
-            print("❌ DuckDB not found. Please install DuckDB first.")
-            return False
-    except FileNotFoundError:
-        print("❌ DuckDB not found. Please install DuckDB first.")
-        print("   Install with: pip install duckdb")
+        service, server = start_service(
+            None if args.no_sales else args.csv, host=args.host, port=args.port,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            max_workers=args.workers, queue_size=args.queue_size, poll_seconds=args.poll_seconds,
+            ecommerce_csv_path=None if args.no_ecommerce else args.ecommerce_csv,
+            snapshot_dir=args.snapshot
+        )
+    except OSError as e:
+        print(f"❌ Could not listen on {args.host}:{args.port}: {e}")
         return False
-    
-    # Create database file if it doesn't exist
-    db_file = "amazon_sales.db"
-    if not os.path.exists(db_file):
-        print(f"📊 Creating database file: {db_file}")
+
+    base_url = f"http://{args.host}:{args.port}"
+    print(f"⏳ Loading data, waiting for {base_url}/ready...")
+    ready, status = wait_until_ready(base_url)
+    if not ready:
+        print(f"❌ Service did not become ready: {(status or {}).get('error') or 'timed out'}")
+        server.shutdown()
+        server.server_close()
+        return False
+
+    for label, rows in (('sales', status['rows']), ('e-commerce', status['ecommerce_rows'])):
+        if rows is not None:
+            print(f"✅ Serving {rows:,} {label} rows from a warm DuckDB database")
+    print(f"🔗 API: {base_url}/")
+
+    if not args.no_browser:
         try:
-            # Create database and load data
-            subprocess.run([
-                'duckdb', db_file, '-c', 
-                f"CREATE TABLE amazon_sales AS SELECT * FROM read_csv_auto('Amazon Sale Report.csv', HEADER=TRUE, ENCODING='LATIN1');"
-            ], check=True)
-            print("✅ Database created and data loaded")
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Error creating database: {e}")
-            return False
-    
-    # Start DuckDB web interface
-    print("🌐 Starting DuckDB web interface on localhost:4213...")
+            webbrowser.open(f"{base_url}/ready")
+            print("🌐 Browser opened automatically")
+        except Exception as e:
+            print(f"⚠️  Could not open browser automatically: {e}")
+
+    print("\n📋 Available endpoints:")
+    print("   - GET /ready                  readiness and loaded dataset fingerprint")
+    print("   - GET /analyses               available analyses")
+    print("   - GET /analyses/summary       data summary")
+    print("   - GET /analyses/<name>        grouped analysis (?limit=&min_orders=)")
+    print("   - GET /drill/<name>/<level>   top-K drill-down (?parent=&order_by=&limit=&min_orders=)")
+    print("   - GET /ecommerce/orders       paged e-commerce rows (?page=&page_size=&sort=&desc=&category=...)")
+    print("   - GET /ecommerce/facets       filter values for category, channel, country, order_status")
+    print("   - Tables reload automatically when their source files change")
+    print("   - Press Ctrl+C to stop the server")
+
     try:
-        # Start the server in the background
-        process = subprocess.Popen([
-            'duckdb', db_file, '--ui', '--port', '4213'
-        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        
-        # Wait a moment for the server to start
-        time.sleep(3)
-        
-        # Check if the process is still running
-        if process.poll() is None:
-            print("✅ DuckDB web interface started successfully!")
-            print("🔗 Access your analysis at: http://localhost:4213/")
-            
-            # Open browser automatically
-            try:
-                webbrowser.open('http://localhost:4213/')
-                print("🌐 Browser opened automatically")
-            except:
-                print("⚠️  Could not open browser automatically")
-            
-            print("\n📋 Available actions:")
-            print("   - Press Ctrl+C to stop the server")
-            print("   - Visit http://localhost:4213/ in your browser")
-            print("   - The database 'amazon_sales' is pre-loaded with your data")
-            
-            # Keep the script running
-            try:
-                process.wait()
-            except KeyboardInterrupt:
-                print("\n🛑 Stopping DuckDB server...")
-                process.terminate()
-                print("✅ Server stopped")
-            
-        else:
-            print("❌ Failed to start DuckDB web interface")
-            stdout, stderr = process.communicate()
-            print(f"Error: {stderr.decode()}")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Error starting server: {e}")
-        return False
-    
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping analytics service...")
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.stop()
+        print("✅ Server stopped")
+
     return True
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description='Serve the Amazon analyses from a warm in-process DuckDB database')
+    parser.add_argument('--csv', default=DEFAULT_CSV_PATH, help='sales CSV, or a glob/directory of shards')
+    parser.add_argument('--no-sales', action='store_true', help='serve only the e-commerce table')
+    parser.add_argument('--ecommerce-csv', default=DEFAULT_ECOMMERCE_CSV, help='e-commerce orders CSV for the data table')
+    parser.add_argument('--no-ecommerce', action='store_true', help='serve only the sales analyses')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='concurrent query workers')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help='requests allowed to wait for a worker before new ones get 503')
+    parser.add_argument('--poll-seconds', type=float, default=DEFAULT_POLL_SECONDS,
+                        help='how often the source is checked for changes')
+    parser.add_argument('--cache-dir', default='.duckdb_cache', help='Parquet cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='parse the CSV directly on every load')
+    parser.add_argument('--snapshot', metavar='DIR',
+                        help='open the sales table from a memory-mapped Arrow snapshot in DIR, writing it when stale')
+    parser.add_argument('--no-browser', action='store_true')
+    args = parser.parse_args()
+
     print("=" * 60)
     print("🦆 DuckDB Amazon Analysis Server")
     print("=" * 60)
-    
-    if start_duckdb_server():
-        print("\n🎉 DuckDB server setup complete!")
+
+    if start_duckdb_server(args):
+        print("\n🎉 DuckDB server session complete!")
     else:
         print("\n❌ Failed to start DuckDB server")
         sys.exit(1)
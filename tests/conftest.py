@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+# The analysis modules are flat scripts at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_benchmark import generate_synthetic_sales  # noqa: E402
+
+SYNTHETIC_ROWS = 5000
+
+
+@pytest.fixture(scope='session')
+def synthetic_csv(tmp_path_factory):
+    """A synthetic Amazon Sale Report, generated once per session; copy it before modifying"""
+    path = str(tmp_path_factory.mktemp('data') / 'sales.csv')
+    generate_synthetic_sales(path, SYNTHETIC_ROWS)
+    return path
+
+
+@pytest.fixture
+def sales_csv(synthetic_csv, tmp_path):
+    """A private copy of the synthetic report that a test may append to or rewrite"""
+    path = str(tmp_path / 'sales.csv')
+    with open(synthetic_csv, 'rb') as source, open(path, 'wb') as target:
+        target.write(source.read())
+    return path
+
+
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    """Run every test from its own directory, since the pipeline writes default caches and outputs there"""
+    monkeypatch.chdir(tmp_path)
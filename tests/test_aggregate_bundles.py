@@ -0,0 +1,27 @@
+import json
+import os
+
+from aggregate_bundles import MANIFEST_FILE, build_bundles
+
+
+def test_bundles_are_content_hashed_and_stale_ones_pruned(sales_csv):
+    # A bundle from an earlier build that is no longer generated
+    os.makedirs('aggregates')
+    for suffix in ['', '.gz']:
+        with open(os.path.join('aggregates', 'daily.0123456789ab.json' + suffix), 'w') as f:
+            f.write('[]')
+
+    manifest = build_bundles(sales_csv, 'aggregates', cache_dir=None)
+    assert set(manifest['bundles']) == {'channel', 'state', 'charts'}
+    with open(os.path.join('aggregates', MANIFEST_FILE)) as f:
+        assert json.load(f)['bundles'] == manifest['bundles']
+
+    files = sorted(os.listdir('aggregates'))
+    assert not any(name.startswith('daily.') or name.endswith('.tmp') for name in files)
+    channel = manifest['bundles']['channel']
+    with open(os.path.join('aggregates', channel['file'])) as f:
+        assert {row['fulfillment'] for row in json.load(f)} == {'Merchant', 'Amazon'}
+
+    # Unchanged data rebuilds to the same hashed names
+    assert build_bundles(sales_csv, 'aggregates', cache_dir=None)['bundles'] == manifest['bundles']
+    assert sorted(os.listdir('aggregates')) == files
@@ -0,0 +1,16 @@
+from amazon_benchmark import STAGES, benchmark_dataset, compare_to_baseline
+
+
+def test_every_pipeline_stage_is_timed_with_its_throughput(sales_csv, tmp_path):
+    result = benchmark_dataset(sales_csv, str(tmp_path / 'output'))
+    assert list(result['timings']) == STAGES
+    assert 'analyze_time_series' in STAGES
+    assert result['rows'] == 5000
+    assert set(result['rows_per_second']) == set(STAGES)
+    assert result['rows_per_second']['load'] == result['rows'] / result['timings']['load']
+
+
+def test_only_slowdowns_beyond_the_threshold_are_regressions():
+    baseline = {'results': {'1000': {'timings': {'load': 1.0, 'analyze_time_series': 0.5}}}}
+    report = {'results': {'1000': {'timings': {'load': 1.1, 'analyze_time_series': 0.8, 'save_results': 9.0}}}}
+    assert compare_to_baseline(report, baseline) == [('1000', 'analyze_time_series', 0.5, 0.8)]
@@ -0,0 +1,45 @@
+import json
+import os
+
+from amazon_analysis_generator import RESULTS_FILE, AmazonAnalysisGenerator
+
+
+def run_full(csv, output_dir, **options):
+    analyzer = AmazonAnalysisGenerator(csv, chart_format='json', export_dir=None, output_dir=output_dir, **options)
+    assert analyzer.run_full_analysis()
+    with open(os.path.join(output_dir, RESULTS_FILE)) as f:
+        return json.load(f)
+
+
+def test_parallel_snapshot_matches_plain_run_on_cold_and_warm_result_cache(sales_csv):
+    expected = run_full(sales_csv, 'plain')
+    options = {'parallel': True, 'snapshot_dir': 'snapshot', 'result_cache_dir': 'results'}
+
+    # Cold: the result cache defers the load while worker cursors need the snapshot registered
+    assert run_full(sales_csv, 'cold', **options) == expected
+    with open(os.path.join('snapshot', 'manifest.json')) as f:
+        manifest = json.load(f)
+    assert {'summary', 'channel_analysis', 'geographic_analysis', 'category_analysis'} <= set(manifest['aggregates'])
+
+    # Warm: the table and results come from the mapped snapshot
+    assert run_full(sales_csv, 'warm', **options) == expected
+
+
+def test_snapshot_is_replaced_when_the_source_changes(sales_csv):
+    first = AmazonAnalysisGenerator(sales_csv, snapshot_dir='snapshot')
+    assert first.connect_to_duckdb()
+    rows = first.con.execute("SELECT COUNT(*) FROM amazon_sales;").fetchone()[0]
+    first.close_connection()
+
+    with open(sales_csv) as f:
+        header, first_row = f.readline(), f.readline()
+    with open(sales_csv, 'a') as f:
+        f.write(first_row)
+
+    second = AmazonAnalysisGenerator(sales_csv, snapshot_dir='snapshot')
+    assert second.connect_to_duckdb()
+    assert second.con.execute("SELECT COUNT(*) FROM amazon_sales;").fetchone()[0] == rows + 1
+    with second.cursor() as cursor:
+        assert cursor.execute("SELECT COUNT(*) FROM amazon_sales;").fetchone()[0] == rows + 1
+    second.close_connection()
+    assert len([name for name in os.listdir('snapshot') if name.startswith('amazon_sales-')]) == 1
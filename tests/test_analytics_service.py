@@ -0,0 +1,115 @@
+import http.client
+import json
+
+import duckdb
+import pytest
+
+from analytics_service import etag_matches, start_service, wait_until_ready
+
+
+@pytest.fixture
+def ecommerce_csv(tmp_path):
+    """A small generated e-commerce orders CSV with the filter columns the table serves"""
+    path = str(tmp_path / 'orders.csv')
+    duckdb.connect().execute(f"""
+    COPY (
+        SELECT
+            printf('O%07d', i) as order_id,
+            ['Fashion', 'Toys', 'Home'][1 + i % 3] as category,
+            ['Social', 'Organic', 'Email'][1 + i % 3] as channel,
+            ['US', 'CA'][1 + i % 2] as country,
+            CASE WHEN i % 7 = 0 THEN 'Cancelled' ELSE 'Completed' END as order_status,
+            ROUND(10 + (i * 37) % 500 + 0.25, 2) as revenue
+        FROM range(200) t(i)
+    ) TO '{path}' (HEADER, DELIMITER ',');
+    """)
+    return path
+
+
+@pytest.fixture
+def service(sales_csv, ecommerce_csv):
+    service, server = start_service(sales_csv, port=0, poll_seconds=3600, ecommerce_csv_path=ecommerce_csv)
+    port = server.server_address[1]
+    ready, status = wait_until_ready(f"http://127.0.0.1:{port}", timeout=60)
+    assert ready, status
+    yield service, port
+    server.shutdown()
+    server.server_close()
+    service.stop()
+
+
+def get(port, path, headers=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    connection.request('GET', path, headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response.status, response.headers, json.loads(body) if body else None
+
+
+def test_unchanged_page_is_revalidated_with_304(service):
+    _, port = service
+    path = '/ecommerce/orders?page=2&page_size=10&sort=revenue&desc=1&country=CA'
+    status, headers, page = get(port, path)
+    assert status == 200
+    assert page['total_rows'] == 100 and len(page['rows']) == 10
+    revenues = [row[page['columns'].index('revenue')] for row in page['rows']]
+    assert revenues == sorted(revenues, reverse=True)
+
+    status, not_modified, body = get(port, path, {'If-None-Match': headers['ETag']})
+    assert (status, body) == (304, None)
+    assert not_modified['ETag'] == headers['ETag']
+
+    # Another page, filter or sort is a different representation
+    status, other, _ = get(port, path.replace('country=CA', 'country=US'), {'If-None-Match': headers['ETag']})
+    assert status == 200 and other['ETag'] != headers['ETag']
+
+
+def test_if_none_match_lists_weak_tags_and_wildcards():
+    etag = '"0123abcd"'
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"stale", W/{etag}', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"0123abcd-gzip", "0123"', etag)
+    assert not etag_matches('"stale"', etag)
+
+
+def test_revalidation_parses_the_if_none_match_list(service):
+    _, port = service
+    path = '/ecommerce/orders?page=1&page_size=5'
+    _, headers, _ = get(port, path)
+    for header in (f'"stale", W/{headers["ETag"]}', '*'):
+        assert get(port, path, {'If-None-Match': header})[0] == 304
+    assert get(port, path, {'If-None-Match': '"stale"'})[0] == 200
+
+
+@pytest.mark.parametrize('query', ['sort=missing', 'colour=red', 'country=CA&ship_mode=Air'])
+def test_unknown_columns_are_rejected_with_400(service, query):
+    _, port = service
+    status, _, body = get(port, f'/ecommerce/orders?{query}')
+    assert status == 400
+    assert 'unknown column' in body['error'] or 'cannot filter by' in body['error']
+
+
+def test_etag_changes_when_the_source_is_reloaded(service, ecommerce_csv):
+    analytics, port = service
+    path = '/ecommerce/facets'
+    status, headers, facets = get(port, path)
+    assert status == 200
+    assert facets['country'] == ['CA', 'US']
+
+    with open(ecommerce_csv, 'a') as f:
+        f.write('O9999999,Fashion,Social,MX,Completed,99.5\n')
+    assert analytics.reload_if_changed()
+
+    status, reloaded, facets = get(port, path, {'If-None-Match': headers['ETag']})
+    assert status == 200 and reloaded['ETag'] != headers['ETag']
+    assert facets['country'] == ['CA', 'MX', 'US']
+
+
+def test_sales_analyses_are_served_alongside(service):
+    _, port = service
+    status, _, payload = get(port, '/analyses/channel_analysis')
+    assert status == 200
+    assert {row['fulfillment'] for row in payload['rows']} == {'Amazon', 'Merchant'}
@@ -0,0 +1,48 @@
+import pytest
+
+from amazon_analysis_generator import AmazonAnalysisGenerator
+
+
+def fused_results(csv_path, sample_percent=None):
+    analyzer = AmazonAnalysisGenerator(csv_path, sample_percent=sample_percent)
+    assert analyzer.connect_to_duckdb()
+    analyzer.run_fused_analysis()
+    analyzer.close_connection()
+    return analyzer.results
+
+
+@pytest.fixture
+def exact(sales_csv):
+    return fused_results(sales_csv)
+
+
+def test_sampled_totals_fall_within_their_margins(sales_csv, exact):
+    approximate = fused_results(sales_csv, sample_percent=25)
+    summary = approximate['summary']
+    assert summary['sample_percent'] == 25
+    for name in ('total_records', 'unique_orders', 'total_revenue'):
+        assert summary[f"{name}_margin"] > 0
+        assert abs(summary[name] - exact['summary'][name]) <= summary[f"{name}_margin"], name
+        assert summary[name] == pytest.approx(exact['summary'][name], rel=0.1), name
+
+    exact_channels = {row['fulfillment']: row for row in exact['channel_analysis']}
+    for row in approximate['channel_analysis']:
+        expected = exact_channels[row['fulfillment']]
+        assert abs(row['total_orders'] - expected['total_orders']) <= row['total_orders_margin']
+        assert abs(row['failure_rate'] - expected['failure_rate']) <= row['failure_rate_margin']
+
+
+def test_full_sample_reproduces_the_exact_totals(sales_csv, exact):
+    summary = fused_results(sales_csv, sample_percent=100)['summary']
+    assert summary['total_records'] == exact['summary']['total_records']
+    assert summary['total_revenue'] == pytest.approx(exact['summary']['total_revenue'])
+    assert summary['total_records_margin'] == 0
+
+
+def test_exact_mode_reports_no_sampling(sales_csv, exact):
+    assert 'sample_percent' not in exact['summary']
+    assert not [name for name in exact['summary'] if name.endswith('_margin')]
+    for key, rows in exact.items():
+        if key != 'summary':
+            assert not [name for row in rows for name in row if name.endswith('_margin')], key
+    assert fused_results(sales_csv) == exact
@@ -0,0 +1,31 @@
+import duckdb
+import pytest
+
+from batch_runner import build_rollup, run_dataset
+
+
+@pytest.fixture
+def many_category_csv(synthetic_csv, tmp_path):
+    """The synthetic report with its rows spread over 12 categories, more than category_analysis keeps"""
+    path = str(tmp_path / 'many_categories.csv')
+    duckdb.connect().execute(f"""
+    COPY (
+        SELECT * REPLACE ('Category ' || ("index" % 12) AS Category)
+        FROM read_csv_auto('{synthetic_csv}', HEADER=TRUE)
+    ) TO '{path}' (HEADER, DELIMITER ',');
+    """)
+    return path
+
+
+def test_rollup_covers_categories_outside_each_datasets_top_10(many_category_csv):
+    outcome = run_dataset({
+        'name': 'seller', 'csv': many_category_csv, 'output_dir': 'seller', 'threads': 1, 'memory_limit': None,
+        'cache_dir': None, 'result_cache_dir': None, 'chart_format': 'json', 'export_dir': None
+    })
+    assert outcome['ok'], outcome.get('error')
+    assert len(outcome['results']['category_analysis']) == 10
+
+    rollup = build_rollup([outcome])
+    assert len(rollup['categories']) == 12
+    assert sum(row['total_revenue'] for row in rollup['categories']) == pytest.approx(rollup['total_revenue'])
+    assert sum(row['revenue_percentage'] for row in rollup['categories']) == pytest.approx(100, abs=0.1)
@@ -0,0 +1,51 @@
+import os
+
+import duckdb
+
+from csv_parquet_cache import ensure_parquet_cache
+from csv_schema import CsvSchemaContract
+
+
+def test_latin1_csv_converts_without_a_schema_contract(tmp_path):
+    path = str(tmp_path / 'latin1.csv')
+    with open(path, 'wb') as f:
+        f.write('name,amount\nCafé,1.5\nNiño,2\n'.encode('latin-1'))
+    con = duckdb.connect()
+    parquet_path, hit = ensure_parquet_cache(con, path, 'cache')
+    assert not hit
+    assert con.execute("SELECT name FROM read_parquet(?) ORDER BY amount;", [parquet_path]).fetchall() == [('Café',), ('Niño',)]
+
+
+def test_cache_is_reused_until_size_content_or_contract_changes(sales_csv):
+    con = duckdb.connect()
+    assert not ensure_parquet_cache(con, sales_csv, 'cache')[1]
+    assert ensure_parquet_cache(con, sales_csv, 'cache')[1]
+
+    # Touched but unchanged content is still a hit
+    stat = os.stat(sales_csv)
+    os.utime(sales_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert ensure_parquet_cache(con, sales_csv, 'cache')[1]
+
+    # Same size, different content
+    with open(sales_csv, 'r+b') as f:
+        f.seek(-2, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-2, os.SEEK_END)
+        f.write(b'8' if last != b'8' else b'9')
+    os.utime(sales_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+    assert not ensure_parquet_cache(con, sales_csv, 'cache')[1]
+
+    # Different size
+    with open(sales_csv, 'rb') as f:
+        f.readline()
+        row = f.readline()
+    with open(sales_csv, 'ab') as f:
+        f.write(row)
+    assert not ensure_parquet_cache(con, sales_csv, 'cache')[1]
+    parquet_path, hit = ensure_parquet_cache(con, sales_csv, 'cache')
+    assert hit
+
+    # Reading under a schema contract is a different cache entry than sniffing
+    contract = CsvSchemaContract(sales_csv, 'cache').load(con)
+    assert not ensure_parquet_cache(con, sales_csv, 'cache', contract)[1]
+    assert ensure_parquet_cache(con, sales_csv, 'cache', contract)[1]
@@ -0,0 +1,55 @@
+import duckdb
+import pytest
+
+from amazon_analysis_generator import AmazonAnalysisGenerator
+from csv_schema import CsvSchemaContract, SchemaDriftError
+
+
+def rewrite_header(csv_path, old, new):
+    with open(csv_path, 'rb') as f:
+        header, rows = f.readline(), f.read()
+    with open(csv_path, 'wb') as f:
+        f.write(header.replace(old.encode(), new.encode()) + rows)
+
+
+def test_renamed_column_is_drift_until_refreshed(sales_csv):
+    con = duckdb.connect()
+    contract = CsvSchemaContract(sales_csv, 'cache').load(con)
+    assert contract.columns['Amount'] == 'DOUBLE'
+
+    rewrite_header(sales_csv, 'ship-state', 'shipping-state')
+    with pytest.raises(SchemaDriftError, match='missing ship-state; new shipping-state'):
+        CsvSchemaContract(sales_csv, 'cache').load(con)
+
+    refreshed = CsvSchemaContract(sales_csv, 'cache').load(con, refresh=True)
+    assert 'shipping-state' in refreshed.columns
+    assert 'shipping-state' in CsvSchemaContract(sales_csv, 'cache').load(con).columns
+
+
+def test_values_that_break_the_recorded_types_are_drift(sales_csv):
+    con = duckdb.connect()
+    contract = CsvSchemaContract(sales_csv, 'cache').load(con)
+
+    with open(sales_csv, 'rb') as f:
+        header = f.readline().decode().rstrip('\r\n').split(',')
+        row = f.readline().decode().rstrip('\r\n').split(',')
+    row[header.index('Amount')] = 'n/a'
+    with open(sales_csv, 'a') as f:
+        f.write(','.join(row) + '\n')
+
+    with pytest.raises(SchemaDriftError):
+        contract.execute(con, lambda sql, params: (f"SELECT SUM(Amount) FROM {sql};", params)).fetchall()
+
+
+def test_analysis_refuses_to_load_a_drifted_csv(sales_csv):
+    analyzer = AmazonAnalysisGenerator(sales_csv, cache_dir='cache')
+    assert analyzer.connect_to_duckdb()
+    analyzer.close_connection()
+
+    rewrite_header(sales_csv, 'Style', 'Style Code')
+    analyzer = AmazonAnalysisGenerator(sales_csv, cache_dir='cache')
+    assert not analyzer.connect_to_duckdb()
+
+    analyzer = AmazonAnalysisGenerator(sales_csv, cache_dir='cache', refresh_schema=True)
+    assert analyzer.connect_to_duckdb()
+    analyzer.close_connection()
@@ -0,0 +1,48 @@
+import duckdb
+import pytest
+
+from dataset_profiler import DatasetProfiler
+
+
+@pytest.fixture
+def sales_table(sales_csv):
+    con = duckdb.connect()
+    con.execute("CREATE TABLE sales AS SELECT * FROM read_csv_auto(?);", [sales_csv])
+    yield con
+    con.close()
+
+
+def direct_crosstab(con, outcome, group):
+    return {
+        (row[0], row[1]): (row[2], row[3]) for row in con.execute(f"""
+        SELECT outcome, group_value, COUNT(*), ROUND(100.0 * COUNT(*) / SUM(COUNT(*)) OVER (PARTITION BY group_value), 2)
+        FROM (SELECT CAST("{outcome}" AS VARCHAR) as outcome, CAST("{group}" AS VARCHAR) as group_value FROM sales)
+        GROUP BY outcome, group_value;
+        """).fetchall()
+    }
+
+
+def test_repeated_and_reversed_pairs_are_counted_once(sales_table):
+    pairs = [['Status', 'Fulfilment'], ['Status', 'Fulfilment'], ['Fulfilment', 'Status'], ['Courier Status', 'Category']]
+    profiler = DatasetProfiler(sales_table, 'sales', crosstabs=pairs)
+    crosstabs = profiler.crosstab_tables()
+    assert [[crosstab['outcome'], crosstab['group']] for crosstab in crosstabs] == [pairs[0], pairs[2], pairs[3]]
+
+    rows = sales_table.execute("SELECT COUNT(*) FROM sales;").fetchone()[0]
+    for crosstab in crosstabs:
+        cells = {(cell['outcome'], cell['group_value']): (cell['count'], cell['percentage']) for cell in crosstab['cells']}
+        assert sum(count for count, _ in cells.values()) == rows
+        assert cells == direct_crosstab(sales_table, crosstab['outcome'], crosstab['group'])
+
+
+def test_profile_summarizes_numeric_and_categorical_columns(sales_table):
+    profile = DatasetProfiler(sales_table, 'sales', crosstabs=[['Status', 'Fulfilment']]).profile()
+    amount = sales_table.execute("SELECT MIN(Amount), MAX(Amount), COUNT(*) FROM sales;").fetchone()
+    assert profile['rows'] == amount[2]
+    assert (profile['columns']['Amount']['min'], profile['columns']['Amount']['max']) == pytest.approx(amount[:2])
+    assert sum(entry['count'] for entry in profile['frequencies']['Fulfilment']) == amount[2]
+
+
+def test_pairs_need_two_different_columns(sales_table):
+    with pytest.raises(ValueError):
+        DatasetProfiler(sales_table, 'sales', crosstabs=[['Status', 'Status']])
@@ -0,0 +1,23 @@
+from amazon_analysis_generator import AmazonAnalysisGenerator
+
+
+def test_sku_drill_down_matches_a_direct_group_by_and_prints_each_rows_path(sales_csv, capsys):
+    analyzer = AmazonAnalysisGenerator(sales_csv, drill_downs=['product'])
+    assert analyzer.connect_to_duckdb()
+    analyzer.analyze_drill_down('product', 'sku', order_by='total_revenue', limit=5, min_orders=1)
+    rows = analyzer.results['drill_product_sku']
+
+    expected = analyzer.con.execute("""
+    SELECT Category, SKU, COUNT(*), ROUND(SUM(Amount), 2)
+    FROM amazon_sales
+    WHERE Amount > 0
+    GROUP BY Category, SKU
+    ORDER BY SUM(Amount) DESC
+    LIMIT 5;
+    """).fetchall()
+    assert [(row['category'], row['sku'], row['total_orders'], round(row['total_revenue'], 2)) for row in rows] == expected
+
+    output = capsys.readouterr().out
+    for category, sku, _, _ in expected:
+        assert f"   {category} › {sku}: " in output
+    analyzer.close_connection()
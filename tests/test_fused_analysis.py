@@ -0,0 +1,34 @@
+import pytest
+
+from amazon_analysis_generator import AmazonAnalysisGenerator
+from analysis_registry import ANALYSIS_REGISTRY, compile_analysis_query
+
+
+def rows_by_group(rows, label, fields):
+    return {(row[label], field): row[field] for row in rows for field in fields}
+
+
+def test_fused_scan_matches_each_standalone_analysis_query(sales_csv):
+    analyzer = AmazonAnalysisGenerator(sales_csv, analysis_keys=list(ANALYSIS_REGISTRY))
+    assert analyzer.connect_to_duckdb()
+    analyzer.run_fused_analysis()
+
+    for key, spec in ANALYSIS_REGISTRY.items():
+        sql, params = compile_analysis_query(spec)
+        result = analyzer.con.execute(sql, params)
+        columns = [desc[0] for desc in result.description]
+        expected = [dict(zip(columns, row)) for row in result.fetchall()]
+        fused = analyzer.results[key]
+        fields = spec['fields']
+        assert len(fused) == len(expected), key
+        # Groups and measures match; ranks may differ only among ties
+        assert rows_by_group(fused, spec['label'], fields) == pytest.approx(rows_by_group(expected, spec['label'], fields)), key
+        assert [row[spec['order_by']] for row in fused] == pytest.approx([row[spec['order_by']] for row in expected]), key
+
+    total = analyzer.con.execute("""
+    SELECT COUNT(*), COUNT(DISTINCT "Order ID"), SUM(Amount) FROM amazon_sales WHERE Amount > 0;
+    """).fetchone()
+    summary = analyzer.results['summary']
+    assert (summary['total_records'], summary['unique_orders']) == total[:2]
+    assert summary['total_revenue'] == pytest.approx(total[2])
+    analyzer.close_connection()
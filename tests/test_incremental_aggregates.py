@@ -0,0 +1,69 @@
+import pytest
+
+from amazon_analysis_generator import AmazonAnalysisGenerator
+
+
+def incremental_results(csv_path):
+    analyzer = AmazonAnalysisGenerator(csv_path, incremental=True)
+    assert analyzer.connect_to_duckdb()
+    analyzer.run_incremental_analysis()
+    analyzer.close_connection()
+    return analyzer.results
+
+
+def full_results(csv_path):
+    analyzer = AmazonAnalysisGenerator(csv_path)
+    assert analyzer.connect_to_duckdb()
+    analyzer.run_fused_analysis()
+    analyzer.close_connection()
+    return analyzer.results
+
+
+def assert_same_results(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, rows in expected.items():
+        if key == 'summary':
+            assert actual[key] == pytest.approx(rows)
+            continue
+        assert len(actual[key]) == len(rows), key
+        for actual_row, expected_row in zip(actual[key], rows):
+            assert actual_row == pytest.approx(expected_row), key
+
+
+def test_appended_rows_merge_to_the_full_recompute(sales_csv):
+    with open(sales_csv, 'rb') as f:
+        lines = f.readlines()
+    split = len(lines) // 2
+    with open(sales_csv, 'wb') as f:
+        f.writelines(lines[:split])
+
+    assert_same_results(incremental_results(sales_csv), full_results(sales_csv))
+
+    with open(sales_csv, 'ab') as f:
+        f.writelines(lines[split:])
+
+    assert_same_results(incremental_results(sales_csv), full_results(sales_csv))
+
+
+def test_rewritten_history_is_rebuilt_from_the_first_row(sales_csv):
+    incremental_results(sales_csv)
+
+    with open(sales_csv, 'rb') as f:
+        lines = f.readlines()
+    with open(sales_csv, 'wb') as f:
+        f.writelines(lines[:1] + lines[1:][::-1][:len(lines) // 3])
+
+    assert_same_results(incremental_results(sales_csv), full_results(sales_csv))
+
+
+def test_switching_analyses_keeps_the_running_aggregates(sales_csv, capsys):
+    with open(sales_csv, 'rb') as f:
+        rows = len(f.readlines()) - 1
+    city = AmazonAnalysisGenerator(sales_csv, incremental=True, analysis_keys=['city_analysis'])
+    assert city.connect_to_duckdb()
+    city.close_connection()
+    assert f"Incrementally ingested {rows:,} new rows" in capsys.readouterr().out
+
+    results = incremental_results(sales_csv)
+    assert "Incrementally ingested 0 new rows" in capsys.readouterr().out
+    assert_same_results(results, full_results(sales_csv))
@@ -0,0 +1,78 @@
+import duckdb
+import numpy as np
+import pytest
+
+from amazon_analysis_generator import AmazonAnalysisGenerator
+from model_training import MODEL_SPECS, FeatureCache, cross_validate, stratified_folds, train_models
+
+SPEC = MODEL_SPECS['failures']
+
+
+@pytest.fixture
+def con(sales_csv):
+    con = duckdb.connect()
+    con.execute("CREATE TABLE sales AS SELECT * FROM read_csv_auto(?);", [sales_csv])
+    yield con
+    con.close()
+
+
+def test_unchanged_data_reuses_every_block(con, tmp_path):
+    cache_dir = str(tmp_path / 'features')
+    X, y, names = FeatureCache(cache_dir).build(con, 'sales', 'failures', SPEC, 'first')
+    rows = con.execute("SELECT COUNT(*) FROM sales WHERE Amount > 0;").fetchone()[0]
+    assert X.shape == (rows, len(names)) and y.shape == (rows,)
+    assert 'Fulfilment=Amazon' in names
+
+    cache = FeatureCache(cache_dir)
+    reloaded = cache.load('failures', 'first')
+    assert cache.reused == len(SPEC['numeric']) + len(SPEC['categorical']) + 1
+    assert np.array_equal(reloaded[0], X) and np.array_equal(reloaded[1], y) and reloaded[2] == names
+
+    cache = FeatureCache(cache_dir)
+    assert cache.load('failures', 'second') is None
+    cache.build(con, 'sales', 'failures', SPEC, 'second')
+    assert cache.rebuilt == 0
+
+
+def test_changed_column_rebuilds_only_its_block(con, tmp_path):
+    cache_dir = str(tmp_path / 'features')
+    FeatureCache(cache_dir).build(con, 'sales', 'failures', SPEC, 'before')
+
+    con.execute("UPDATE sales SET Qty = Qty + 1 WHERE rowid % 7 = 0;")
+    cache = FeatureCache(cache_dir)
+    X, y, names = cache.build(con, 'sales', 'failures', SPEC, 'after')
+    assert cache.rebuilt == 1
+
+    fresh = FeatureCache(str(tmp_path / 'fresh')).build(con, 'sales', 'failures', SPEC, 'after')
+    assert np.array_equal(X, fresh[0]) and np.array_equal(y, fresh[1]) and names == fresh[2]
+
+
+def test_cross_validation_is_deterministic_and_covers_every_row(con, tmp_path):
+    X, y, names = FeatureCache(str(tmp_path / 'features')).build(con, 'sales', 'failures', SPEC, 'fingerprint')
+    folds = stratified_folds(y, 5)
+    assert sorted(np.concatenate(folds).tolist()) == list(range(len(y)))
+    # Every fold keeps the overall share of failures
+    for test_index in folds:
+        assert y[test_index].mean() == pytest.approx(y.mean(), abs=0.01)
+
+    results = cross_validate(X, y, folds=5, max_workers=2)
+    assert results == cross_validate(X, y, folds=5, max_workers=1)
+    for model_type in ('logistic_regression', 'naive_bayes'):
+        fold_metrics = results[model_type]['folds']
+        assert sum(fold['tp'] + fold['tn'] + fold['fp'] + fold['fn'] for fold in fold_metrics) == len(y)
+        # Merchant orders fail far more often than Amazon-fulfilled ones in the synthetic data
+        assert results[model_type]['mean']['roc_auc'] > 0.6, model_type
+
+    trained = train_models(X, y, names, folds=3)
+    amazon = [feature['coefficient'] for feature in trained['top_features'] if feature['feature'] == 'Fulfilment=Amazon']
+    assert amazon and amazon[0] < 0
+
+
+def test_failure_model_reuses_the_cache_on_rerun(sales_csv, capsys):
+    for _ in range(2):
+        analyzer = AmazonAnalysisGenerator(sales_csv, result_cache_dir='results')
+        assert analyzer.connect_to_duckdb()
+        analyzer.train_failure_model(folds=3)
+        analyzer.close_connection()
+    assert "Feature blocks: 0 rebuilt, 9 reused from cache" in capsys.readouterr().out
+    assert analyzer.results['failure_model']['rows'] > 0
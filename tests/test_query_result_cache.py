@@ -0,0 +1,69 @@
+import json
+import os
+
+from amazon_analysis_generator import AmazonAnalysisGenerator
+from csv_schema import CsvSchemaContract
+
+
+def cached_run(csv_path, cache_dir):
+    analyzer = AmazonAnalysisGenerator(csv_path, result_cache_dir=cache_dir)
+    assert analyzer.connect_to_duckdb()
+    analyzer.run_fused_analysis()
+    analyzer.close_connection()
+    return analyzer
+
+
+def test_unchanged_source_is_answered_from_the_cache(sales_csv, tmp_path):
+    cache_dir = str(tmp_path / 'results')
+    cold = cached_run(sales_csv, cache_dir)
+    assert cold.result_cache.misses > 0
+
+    warm = cached_run(sales_csv, cache_dir)
+    assert (warm.result_cache.hits, warm.result_cache.misses) == (cold.result_cache.misses, 0)
+    assert warm.results == cold.results
+
+
+def test_mtime_change_invalidates_entries(sales_csv, tmp_path):
+    cache_dir = str(tmp_path / 'results')
+    cold = cached_run(sales_csv, cache_dir)
+
+    stat = os.stat(sales_csv)
+    os.utime(sales_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    touched = cached_run(sales_csv, cache_dir)
+    assert (touched.result_cache.hits, touched.result_cache.misses) == (0, cold.result_cache.misses)
+    assert touched.results == cold.results
+
+
+def test_appended_rows_invalidate_entries(sales_csv, tmp_path):
+    cache_dir = str(tmp_path / 'results')
+    cold = cached_run(sales_csv, cache_dir)
+
+    with open(sales_csv, 'rb') as f:
+        lines = f.readlines()
+    with open(sales_csv, 'ab') as f:
+        f.writelines(lines[1:101])
+    grown = cached_run(sales_csv, cache_dir)
+    assert grown.result_cache.hits == 0
+    assert grown.results['summary']['total_records'] > cold.results['summary']['total_records']
+
+
+def test_schema_contract_change_invalidates_entries(sales_csv, tmp_path):
+    cache_dir = str(tmp_path / 'results')
+    cold = cached_run(sales_csv, cache_dir)
+
+    # Results computed under one contract are not served under another, even for the same file
+    contract = CsvSchemaContract(sales_csv, '.duckdb_cache')
+    with open(contract.path) as f:
+        recorded = json.load(f)
+    recorded['columns']['Qty'] = 'DOUBLE'
+    with open(contract.path, 'w') as f:
+        json.dump(recorded, f)
+    retyped = cached_run(sales_csv, cache_dir)
+    assert (retyped.result_cache.hits, retyped.result_cache.misses) == (0, cold.result_cache.misses)
+
+    # Refreshing re-detects the original contract, whose entries are still cached
+    refreshed = AmazonAnalysisGenerator(sales_csv, result_cache_dir=cache_dir, refresh_schema=True)
+    assert refreshed.connect_to_duckdb()
+    refreshed.run_fused_analysis()
+    refreshed.close_connection()
+    assert (refreshed.result_cache.hits, refreshed.result_cache.misses) == (cold.result_cache.misses, 0)
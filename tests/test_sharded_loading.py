@@ -0,0 +1,53 @@
+import os
+
+import duckdb
+import pytest
+
+from amazon_analysis_generator import AmazonAnalysisGenerator
+
+
+@pytest.fixture
+def partitioned_dir(sales_csv, tmp_path):
+    """The synthetic report written as hive-partitioned Parquet shards by month and fulfilment channel"""
+    path = str(tmp_path / 'shards')
+    duckdb.connect().execute(f"""
+    COPY (
+        SELECT *, strftime(Date, '%Y-%m') as month, Fulfilment as channel
+        FROM read_csv_auto('{sales_csv}')
+    ) TO '{path}' (FORMAT PARQUET, PARTITION_BY (month, channel));
+    """)
+    return path
+
+
+def load(source, **options):
+    analyzer = AmazonAnalysisGenerator(source, **options)
+    assert analyzer.connect_to_duckdb()
+    return analyzer
+
+
+def test_directory_of_shards_loads_every_row(sales_csv, partitioned_dir):
+    expected = duckdb.connect().execute(f"SELECT COUNT(*) FROM read_csv_auto('{sales_csv}');").fetchone()[0]
+    analyzer = load(partitioned_dir)
+    assert analyzer.con.execute("SELECT COUNT(*) FROM amazon_sales;").fetchone()[0] == expected
+    analyzer.close_connection()
+
+
+def test_partition_filters_prune_shards(sales_csv, partitioned_dir):
+    expected = duckdb.connect().execute(f"""
+    SELECT COUNT(*) FROM read_csv_auto('{sales_csv}')
+    WHERE Fulfilment = 'Amazon' AND strftime(Date, '%Y-%m') BETWEEN '2022-04' AND '2022-05';
+    """).fetchone()[0]
+    analyzer = load(os.path.join(partitioned_dir, '**', '*.parquet'),
+                    partition_filters={'month': ('2022-04', '2022-05'), 'channel': 'Amazon'})
+    assert analyzer.con.execute("SELECT COUNT(*) FROM amazon_sales;").fetchone()[0] == expected
+    assert analyzer.con.execute("SELECT DISTINCT Fulfilment FROM amazon_sales;").fetchall() == [('Amazon',)]
+    analyzer.close_connection()
+
+
+def test_pattern_matching_no_shards_names_the_pattern(tmp_path, capsys):
+    pattern = str(tmp_path / 'missing' / '*.csv')
+    analyzer = AmazonAnalysisGenerator(pattern)
+    with pytest.raises(FileNotFoundError, match='missing'):
+        analyzer.resolve_shards()
+    assert not analyzer.connect_to_duckdb()
+    assert f"No CSV or Parquet shards match {pattern}" in capsys.readouterr().out
@@ -0,0 +1,42 @@
+import pytest
+
+from amazon_analysis_generator import AmazonAnalysisGenerator
+
+
+def time_series(csv_path, **options):
+    analyzer = AmazonAnalysisGenerator(csv_path, **options)
+    assert analyzer.connect_to_duckdb()
+    analyzer.analyze_time_series()
+    analyzer.close_connection()
+    return analyzer.results['time_series']
+
+
+def assert_same_series(actual, expected):
+    for name in ('daily', 'weekly'):
+        assert len(actual[name]) == len(expected[name]), name
+        for actual_row, expected_row in zip(actual[name], expected[name]):
+            assert actual_row == pytest.approx(expected_row), name
+
+
+def test_store_windows_match_the_full_recompute_after_appends(sales_csv):
+    with open(sales_csv, 'rb') as f:
+        lines = f.readlines()
+    split = len(lines) // 2
+    with open(sales_csv, 'wb') as f:
+        f.writelines(lines[:split])
+    time_series(sales_csv, incremental=True)
+
+    with open(sales_csv, 'ab') as f:
+        f.writelines(lines[split:])
+    full = time_series(sales_csv)
+    assert_same_series(time_series(sales_csv, incremental=True), full)
+
+    overall = [row for row in full['daily'] if row['dimension'] == '*']
+    assert sum(row['total_orders'] for row in overall) == sum(row['total_orders'] for row in full['weekly'] if row['dimension'] == '*')
+    assert overall[-1]['orders_7d'] == sum(row['total_orders'] for row in overall[-7:])
+
+
+def test_cached_daily_series_still_rolls_up_weeks(sales_csv, tmp_path):
+    cache_dir = str(tmp_path / 'results')
+    cold = time_series(sales_csv, result_cache_dir=cache_dir)
+    assert_same_series(time_series(sales_csv, result_cache_dir=cache_dir), cold)
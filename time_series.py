@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Time Series Analysis
+Daily and weekly order, revenue and failure-rate series overall and per channel
+and state, with trailing rolling windows computed by DuckDB window functions
+"""
+
+from analysis_registry import (ANALYSIS_REGISTRY, MEASURES, amount_filter, dimension_expression,
+                               failure_flag, failure_rate, order_date)
+
+# Trailing windows, in days, reported alongside each daily value
+ROLLING_WINDOWS = [7, 28]
+
+# Registry analyses whose dimensions the series are split by, besides the overall '*' series
+SERIES_ANALYSES = ['channel_analysis', 'geographic_analysis']
+
+DAILY_TOTALS = ['total_orders', 'total_revenue', 'failed_orders']
+
+
+def series_dimensions():
+    """Return [(expression, label, params), ...] for the series split dimensions"""
+    dimensions = []
+    for key in SERIES_ANALYSES:
+        expression, params = dimension_expression(ANALYSIS_REGISTRY[key])
+        dimensions.append([expression, ANALYSIS_REGISTRY[key]['label'], params])
+    return dimensions
+
+
+def compile_daily_aggregates(source, dimensions):
+    """Compile one GROUPING SETS scan of source into (sql, params) for per-day totals of every series"""
+    date_sql, date_params = order_date()
+    failed_sql, failed_params = failure_flag()
+    amount_sql, amount_params = amount_filter()
+
+    projections = ''.join(f"{expression} AS {label},\n                " for expression, label, _ in dimensions)
+    grouping_sets = ', '.join(['(order_date)'] + [f"(order_date, {label})" for _, label, _ in dimensions])
+    dimension_case = ' '.join(f"WHEN GROUPING({label}) = 0 THEN '{label}'" for _, label, _ in dimensions)
+    value_case = ' '.join(f"WHEN GROUPING({label}) = 0 THEN CAST({label} AS VARCHAR)" for _, label, _ in dimensions)
+
+    sql = f"""
+        WITH base AS (
+            SELECT
+                {date_sql} as order_date,
+                {projections}Amount,
+                {failed_sql} as is_failed
+            FROM {source}
+            WHERE {amount_sql}
+        )
+        SELECT
+            CASE {dimension_case} ELSE '*' END as dimension,
+            CASE {value_case} END as group_value,
+            order_date,
+            {MEASURES['total_orders']} as total_orders,
+            {MEASURES['total_revenue']} as total_revenue,
+            {MEASURES['failed_orders']} as failed_orders
+        FROM base
+        WHERE order_date IS NOT NULL
+        GROUP BY GROUPING SETS ({grouping_sets})
+        """
+    params = date_params + [param for _, _, params in dimensions for param in params] + failed_params + amount_params
+    return sql, params
+
+
+def compile_rolling_windows(daily_sql, daily_params, since=None):
+    """Compile (sql, params) adding failure rates and trailing windows to daily totals
+
+    With since, only days from since onwards are returned; earlier days are read
+    just far enough back to fill their windows.
+    """
+    columns = [
+        'dimension', 'group_value', 'order_date', *DAILY_TOTALS,
+        f"{failure_rate('failed_orders', 'total_orders')} as failure_rate"
+    ]
+    windows = []
+    for days in ROLLING_WINDOWS:
+        window = f"w{days}"
+        columns += [
+            f"CAST(SUM(total_orders) OVER {window} AS BIGINT) as orders_{days}d",
+            f"SUM(total_revenue) OVER {window} as revenue_{days}d",
+            f"{failure_rate(f'SUM(failed_orders) OVER {window}', f'SUM(total_orders) OVER {window}')} as failure_rate_{days}d"
+        ]
+        # RANGE frames measure calendar days, so days without orders still age out of the window
+        windows.append(f"{window} AS (PARTITION BY dimension, group_value ORDER BY order_date "
+                       f"RANGE BETWEEN INTERVAL {days - 1} DAY PRECEDING AND CURRENT ROW)")
+
+    select_list = ',\n            '.join(columns)
+    params = list(daily_params)
+    where = qualify = ''
+    if since is not None:
+        where = "WHERE order_date >= CAST(? AS DATE) - CAST(? AS INTEGER)"
+        qualify = "QUALIFY order_date >= ?"
+        params += [since, max(ROLLING_WINDOWS) - 1, since]
+
+    sql = f"""
+        WITH daily AS ({daily_sql})
+        SELECT
+            {select_list}
+        FROM daily
+        {where}
+        WINDOW {', '.join(windows)}
+        {qualify}
+        ORDER BY dimension, group_value, order_date
+        """
+    return sql, params
+
+
+def compile_weekly_rollup(daily_sql, daily_params):
+    """Compile (sql, params) rolling daily totals up into ISO weeks starting on Monday"""
+    sql = f"""
+        WITH daily AS ({daily_sql})
+        SELECT
+            dimension,
+            group_value,
+            CAST(date_trunc('week', order_date) AS DATE) as week_start,
+            SUM(total_orders)::BIGINT as total_orders,
+            SUM(total_revenue) as total_revenue,
+            SUM(failed_orders)::BIGINT as failed_orders,
+            {failure_rate('SUM(failed_orders)', 'SUM(total_orders)')} as failure_rate
+        FROM daily
+        GROUP BY dimension, group_value, week_start
+        ORDER BY dimension, group_value, week_start
+        """
+    return sql, list(daily_params)
+
+
+def rollup_weeks(con, daily):
+    """Roll the daily Arrow table from compile_rolling_windows up into weeks without rescanning the source"""
+    con.register('daily_totals', daily)
+    try:
+        return con.execute(*compile_weekly_rollup("SELECT * FROM daily_totals", [])).to_arrow_table()
+    finally:
+        con.unregister('daily_totals')
+
+
+class TimeSeriesStore:
+    """Materialized daily totals and rolling windows kept next to the incremental aggregates"""
+
+    def __init__(self, con, dimensions):
+        self.con = con
+        self.dimensions = dimensions  # [(grouping expression, label, bound params), ...]
+
+    def create_tables(self):
+        window_columns = ''.join(
+            f", orders_{days}d BIGINT, revenue_{days}d DOUBLE, failure_rate_{days}d DOUBLE" for days in ROLLING_WINDOWS
+        )
+        self.con.execute(f"""
+        CREATE TABLE IF NOT EXISTS daily_series (
+            dimension VARCHAR,
+            group_value VARCHAR,
+            order_date DATE,
+            total_orders BIGINT,
+            total_revenue DOUBLE,
+            failed_orders BIGINT
+        );
+        CREATE TABLE IF NOT EXISTS rolling_series (
+            dimension VARCHAR,
+            group_value VARCHAR,
+            order_date DATE,
+            total_orders BIGINT,
+            total_revenue DOUBLE,
+            failed_orders BIGINT,
+            failure_rate DOUBLE{window_columns}
+        );
+        """)
+
+    def reset(self):
+        self.con.execute("DROP TABLE IF EXISTS daily_series; DROP TABLE IF EXISTS rolling_series;")
+        self.create_tables()
+
+    def merge(self, delta_table):
+        """Fold a delta table into the daily totals and refresh windows from the earliest day it touches"""
+        daily_sql, daily_params = compile_daily_aggregates(delta_table, self.dimensions)
+        self.con.execute(f"CREATE OR REPLACE TEMP TABLE daily_delta AS {daily_sql};", daily_params)
+        since = self.con.execute("SELECT MIN(order_date) FROM daily_delta;").fetchone()[0]
+        if since is None:
+            self.con.execute("DROP TABLE daily_delta;")
+            return
+
+        # Append-only sources mostly bring new days, so only the tail of each series is rewritten
+        self.con.execute("""
+        CREATE OR REPLACE TEMP TABLE daily_merged AS
+        SELECT
+            dimension,
+            group_value,
+            order_date,
+            SUM(total_orders)::BIGINT as total_orders,
+            SUM(total_revenue) as total_revenue,
+            SUM(failed_orders)::BIGINT as failed_orders
+        FROM (
+            SELECT * FROM daily_series WHERE order_date >= ?
+            UNION ALL
+            SELECT * FROM daily_delta
+        )
+        GROUP BY dimension, group_value, order_date;
+        """, [since])
+        self.con.execute("DELETE FROM daily_series WHERE order_date >= ?;", [since])
+        self.con.execute("INSERT INTO daily_series SELECT * FROM daily_merged;")
+
+        rolling_sql, rolling_params = compile_rolling_windows("SELECT * FROM daily_series", [], since)
+        self.con.execute("DELETE FROM rolling_series WHERE order_date >= ?;", [since])
+        self.con.execute(f"INSERT INTO rolling_series {rolling_sql};", rolling_params)
+        self.con.execute("DROP TABLE daily_delta; DROP TABLE daily_merged;")
+
+    def fetch(self):
+        """Return {'daily': table, 'weekly': table} of Arrow tables from the materialized series"""
+        weekly_sql, weekly_params = compile_weekly_rollup("SELECT * FROM daily_series", [])
+        return {
+            'daily': self.con.execute(
+                "SELECT * FROM rolling_series ORDER BY dimension, group_value, order_date;"
+            ).to_arrow_table(),
+            'weekly': self.con.execute(weekly_sql, weekly_params).to_arrow_table()
+        }